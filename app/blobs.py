@@ -0,0 +1,402 @@
+"""Content-addressed storage for generated media and the local disk backend."""
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, Optional
+
+import anyio
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from .database import GalleryAsset, session_scope
+
+logger = logging.getLogger(__name__)
+
+BLOB_HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+DATA_URL_PATTERN = re.compile(r"^data:(?P<type>[\w/+.-]+)?(?:;[\w=-]+)*;base64,(?P<data>.*)$", re.S)
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+CHUNK_SIZE = 64 * 1024
+# Leading bytes read to sniff a media type.
+SNIFF_BYTES = 32
+
+_SIGNATURES: list[tuple[bytes, int, str]] = [
+    (b"\x89PNG\r\n\x1a\n", 0, "image/png"),
+    (b"\xff\xd8\xff", 0, "image/jpeg"),
+    (b"GIF87a", 0, "image/gif"),
+    (b"GIF89a", 0, "image/gif"),
+    (b"WEBP", 8, "image/webp"),
+    (b"\x1aE\xdf\xa3", 0, "video/webm"),
+    (b"ID3", 0, "audio/mpeg"),
+    (b"OggS", 0, "audio/ogg"),
+    (b"RIFF", 0, "audio/wav"),
+]
+# ISO base media (``ftyp``) brands; the major brand decides, then compatible ones.
+_FTYP_BRANDS: dict[bytes, str] = {
+    b"avif": "image/avif",
+    b"avis": "image/avif",
+    b"M4A ": "audio/mp4",
+    b"M4B ": "audio/mp4",
+    b"M4P ": "audio/mp4",
+    b"qt  ": "video/quicktime",
+    b"3gp4": "video/3gpp",
+    b"3gp5": "video/3gpp",
+    b"3gp6": "video/3gpp",
+    b"3g2a": "video/3gpp2",
+    **{
+        brand: "video/mp4"
+        for brand in (
+            b"isom", b"iso2", b"iso4", b"iso5", b"iso6", b"mp41", b"mp42",
+            b"avc1", b"dash", b"mmp4", b"M4V ", b"M4VH", b"M4VP", b"f4v ",
+        )
+    },
+}
+
+
+def _sniff_ftyp(head: bytes) -> Optional[str]:
+    if head[4:8] != b"ftyp":
+        return None
+    # Major brand at 8, minor version at 12, then compatible brands.
+    brands = [head[8:12]] + [head[offset : offset + 4] for offset in range(16, len(head) - 3, 4)]
+    for brand in brands:
+        if brand in _FTYP_BRANDS:
+            return _FTYP_BRANDS[brand]
+    return None
+
+
+def _is_mpeg_audio_frame(head: bytes) -> bool:
+    """An MP3 without an ID3 tag starts straight at an MPEG audio frame header."""
+
+    if len(head) < 3 or head[0] != 0xFF or head[1] & 0xE0 != 0xE0:
+        return False
+    version, layer = (head[1] >> 3) & 0x3, (head[1] >> 1) & 0x3
+    bitrate, sample_rate = head[2] >> 4, (head[2] >> 2) & 0x3
+    # Reject the reserved values, which rule out JPEG and random 0xFF runs.
+    return version != 1 and layer != 0 and bitrate != 0xF and sample_rate != 3
+
+
+def sniff_media_type(head: bytes) -> str:
+    """Guess a MIME type from the leading bytes of a file."""
+
+    for signature, offset, media_type in _SIGNATURES:
+        if head[offset : offset + len(signature)] == signature:
+            if media_type == "audio/wav" and head[8:12] != b"WAVE":
+                continue
+            return media_type
+    media_type = _sniff_ftyp(head)
+    if media_type is not None:
+        return media_type
+    if _is_mpeg_audio_frame(head):
+        return "audio/mpeg"
+    return "application/octet-stream"
+
+
+def decode_data_url(url: str) -> Optional[bytes]:
+    """Bytes of a ``data:…;base64,`` URL, or ``None`` for anything else."""
+
+    match = DATA_URL_PATTERN.match(url)
+    if match is None:
+        return None
+    try:
+        return base64.b64decode(match.group("data"), validate=False)
+    except (binascii.Error, ValueError):
+        return None
+
+
+class MediaStore(ABC):
+    """Content-addressed media storage: bytes are stored under their SHA-256 digest.
+
+    Assets reference blobs by their stable ``/media/{sha256}`` URL whatever the
+    backend, so moving media between backends never rewrites database rows.
+    """
+
+    @abstractmethod
+    def exists(self, blob_hash: str) -> bool:
+        """Whether a blob with this digest is stored."""
+
+    @abstractmethod
+    def put_stream(self, chunks: Iterable[bytes]) -> str:
+        """Store the concatenated ``chunks`` and return their digest."""
+
+    @abstractmethod
+    def open(self, blob_hash: str) -> Iterator[bytes]:
+        """Yield the blob's bytes in chunks; raises ``FileNotFoundError`` if absent."""
+
+    @abstractmethod
+    def delete(self, blob_hash: str) -> None:
+        """Remove the blob if it is stored."""
+
+    def direct_url(self, blob_hash: str) -> Optional[str]:
+        """Short-lived URL clients can fetch the blob from, or ``None`` to serve it here."""
+
+        return None
+
+    def public_url(self, blob_hash: str) -> str:
+        """Long-lived URL to hand out in API responses."""
+
+        return media_url(blob_hash)
+
+    def put(self, data: bytes) -> str:
+        return self.put_stream([data])
+
+    def put_data_url(self, url: str) -> Optional[str]:
+        """Store a ``data:…;base64,`` URL and return its ``/media`` URL."""
+
+        data = decode_data_url(url)
+        return None if data is None else media_url(self.put(data))
+
+
+class BlobStore(MediaStore):
+    """Store bytes under their SHA-256 digest in sharded local directories.
+
+    ``ab/cd/abcd…`` keeps directory sizes bounded, and identical payloads are
+    written once no matter how many assets reference them.
+    """
+
+    def __init__(self, root: Path | str):
+        self.root = Path(root)
+
+    def path_for(self, blob_hash: str) -> Path:
+        if not BLOB_HASH_PATTERN.match(blob_hash):
+            raise ValueError(f"Invalid blob hash: {blob_hash!r}")
+        return self.root / blob_hash[:2] / blob_hash[2:4] / blob_hash
+
+    def exists(self, blob_hash: str) -> bool:
+        return self.path_for(blob_hash).is_file()
+
+    def put(self, data: bytes) -> str:
+        """Write ``data`` if it is not stored yet and return its digest."""
+
+        blob_hash = hashlib.sha256(data).hexdigest()
+        if self.path_for(blob_hash).is_file():
+            return blob_hash
+        return self.put_stream([data])
+
+    def put_stream(self, chunks: Iterable[bytes]) -> str:
+        self.root.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, tmp_name = tempfile.mkstemp(dir=self.root, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    handle.write(chunk)
+            blob_hash = digest.hexdigest()
+            path = self.path_for(blob_hash)
+            if path.is_file():
+                os.unlink(tmp_name)
+            else:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        return blob_hash
+
+    def open(self, blob_hash: str) -> Iterator[bytes]:
+        handle = self.path_for(blob_hash).open("rb")
+
+        def chunks() -> Iterator[bytes]:
+            with handle:
+                while chunk := handle.read(CHUNK_SIZE):
+                    yield chunk
+
+        return chunks()
+
+    def delete(self, blob_hash: str) -> None:
+        self.path_for(blob_hash).unlink(missing_ok=True)
+
+
+def media_url(blob_hash: str) -> str:
+    return f"/media/{blob_hash}"
+
+
+class FileRangeResponse(Response):
+    """Send bytes ``start..end`` of an open ``file`` without buffering it.
+
+    The response owns ``file`` and closes it once sent. Servers that
+    advertise the ASGI ``http.response.zerocopysend`` extension get the
+    descriptor and an offset, so the kernel copies the range straight to the
+    socket; otherwise the range is read in chunks.
+    """
+
+    def __init__(
+        self,
+        file: BinaryIO,
+        start: int,
+        end: int,
+        *,
+        status_code: int = 200,
+        media_type: Optional[str] = None,
+        headers: Optional[dict[str, str]] = None,
+    ):
+        super().__init__(status_code=status_code, media_type=media_type, headers=headers)
+        self.file = file
+        self.start = start
+        self.count = end - start + 1
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self._send(scope, send)
+        finally:
+            self.file.close()
+
+    async def _send(self, scope: Scope, send: Send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        if scope["method"].upper() == "HEAD" or self.count <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            await send(
+                {
+                    "type": "http.response.zerocopysend",
+                    "file": self.file.fileno(),
+                    "offset": self.start,
+                    "count": self.count,
+                    "more_body": False,
+                }
+            )
+            return
+
+        handle = anyio.wrap_file(self.file)
+        await handle.seek(self.start)
+        remaining = self.count
+        while remaining > 0:
+            chunk = await handle.read(min(CHUNK_SIZE, remaining))
+            remaining -= len(chunk)
+            more_body = bool(chunk) and remaining > 0
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+            if not chunk:
+                break
+
+
+def range_file_response(
+    request: Request,
+    path: Path,
+    *,
+    media_type: Optional[str] = None,
+    etag: Optional[str] = None,
+    cache_control: Optional[str] = None,
+    extra_headers: Optional[dict[str, str]] = None,
+) -> Response:
+    """Serve ``path`` honouring ``If-None-Match`` and single ``Range`` requests.
+
+    The file is opened once up front and streamed from that descriptor, so a
+    blob evicted or deleted meanwhile is a 404 rather than a failed send.
+    ``media_type`` is sniffed from the file when omitted. Multi-range and
+    malformed ``Range`` headers get the full body with a 200.
+    """
+
+    try:
+        file = path.open("rb")
+    except (FileNotFoundError, IsADirectoryError):
+        raise HTTPException(status_code=404, detail="Media not found")
+    try:
+        size = os.fstat(file.fileno()).st_size
+        if media_type is None:
+            media_type = sniff_media_type(file.read(SNIFF_BYTES))
+        return _range_response(
+            request,
+            file,
+            size,
+            media_type=media_type,
+            etag=etag,
+            cache_control=cache_control,
+            extra_headers=extra_headers,
+        )
+    except BaseException:
+        file.close()
+        raise
+
+
+def _range_response(
+    request: Request,
+    file: BinaryIO,
+    size: int,
+    *,
+    media_type: str,
+    etag: Optional[str],
+    cache_control: Optional[str],
+    extra_headers: Optional[dict[str, str]],
+) -> Response:
+    headers = {"Accept-Ranges": "bytes", **(extra_headers or {})}
+    if etag:
+        headers["ETag"] = f'"{etag}"'
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+
+    if etag and request.headers.get("if-none-match") in {f'"{etag}"', etag, "*"}:
+        file.close()
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    match = RANGE_PATTERN.match(range_header.strip()) if range_header else None
+    # RFC 9110 lets a server ignore a Range it does not support instead of failing.
+    if match and (match.group(1) or match.group(2)) and (
+        not if_range or not etag or if_range == f'"{etag}"'
+    ):
+        first, last = match.groups()
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            start = max(size - int(last), 0)
+            end = size - 1
+        if start >= size or start > end:
+            raise HTTPException(
+                status_code=416,
+                detail="Range not satisfiable",
+                headers={"Content-Range": f"bytes */{size}"},
+            )
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return FileRangeResponse(
+            file, start, end, status_code=206, media_type=media_type, headers=headers
+        )
+
+    headers["Content-Length"] = str(size)
+    return FileRangeResponse(file, 0, size - 1, media_type=media_type, headers=headers)
+
+
+def migrate_data_urls(store: MediaStore, *, batch_size: int = 50) -> int:
+    """Move inline ``data:`` URLs out of ``gallery_assets`` into the media store."""
+
+    migrated = 0
+    last_id = 0
+    while True:
+        with session_scope() as session:
+            assets = (
+                session.query(GalleryAsset)
+                .filter(GalleryAsset.url.like("data:%"), GalleryAsset.id > last_id)
+                .order_by(GalleryAsset.id.asc())
+                .limit(batch_size)
+                .all()
+            )
+            if not assets:
+                break
+            for asset in assets:
+                last_id = asset.id
+                url = store.put_data_url(asset.url)
+                if url is not None:
+                    asset.url = url
+                    migrated += 1
+    if migrated:
+        logger.info(f"Moved {migrated} inline data URL(s) into the blob store")
+    return migrated
@@ -0,0 +1,122 @@
+"""Denormalized counters and response caching for the data catalog."""
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import Counter
+from typing import Optional
+
+from sqlalchemy import event, func, literal, select, union_all, update
+from sqlalchemy.orm import Session
+
+from .database import (
+    Agent,
+    AudioTrack,
+    CatalogCounter,
+    CodeFile,
+    CodeProject,
+    Conversation,
+    Gallery,
+    GalleryAsset,
+    GalleryAssetLink,
+    Message,
+    SessionLocal,
+    WorkspaceWidget,
+    session_scope,
+)
+
+# Stat name -> model, in the order of ``DataCatalogStats``.
+CATALOG_TABLES = {
+    "conversations": Conversation,
+    "messages": Message,
+    "gallery_assets": GalleryAsset,
+    "galleries": Gallery,
+    "agents": Agent,
+    "audio_tracks": AudioTrack,
+    "widgets": WorkspaceWidget,
+    "code_projects": CodeProject,
+    "code_files": CodeFile,
+}
+# Bumped on every flush that touches a catalog model, including plain edits.
+CATALOG_VERSION = "_version"
+
+_COUNTED_MODELS = {model: name for name, model in CATALOG_TABLES.items()}
+_WATCHED_MODELS = tuple(CATALOG_TABLES.values()) + (GalleryAssetLink,)
+
+
+def refresh_catalog_counters() -> dict[str, int]:
+    """Recount every catalog table in one ``UNION ALL`` round trip."""
+
+    query = union_all(
+        *(
+            select(literal(name).label("name"), func.count().label("value")).select_from(model)
+            for name, model in CATALOG_TABLES.items()
+        )
+    )
+    with session_scope() as session:
+        counts = {name: value for name, value in session.execute(query).all()}
+        previous = session.get(CatalogCounter, CATALOG_VERSION)
+        version = (previous.value if previous is not None else 0) + 1
+        session.query(CatalogCounter).delete()
+        for name, value in {**counts, CATALOG_VERSION: version}.items():
+            session.add(CatalogCounter(name=name, value=value))
+    return counts
+
+
+def read_catalog_counters(session: Session) -> dict[str, int]:
+    return {name: value for name, value in session.query(CatalogCounter.name, CatalogCounter.value)}
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _track_catalog_writes(session: Session, flush_context) -> None:
+    deltas: Counter[str] = Counter()
+    touched = False
+    for instances, sign in ((session.new, 1), (session.deleted, -1)):
+        for instance in instances:
+            name = _COUNTED_MODELS.get(type(instance))
+            if name is not None:
+                deltas[name] += sign
+            touched = touched or isinstance(instance, _WATCHED_MODELS)
+    if not touched:
+        touched = any(isinstance(instance, _WATCHED_MODELS) for instance in session.dirty)
+    if not touched:
+        return
+
+    deltas[CATALOG_VERSION] += 1
+    connection = session.connection()
+    counters = CatalogCounter.__table__
+    for name, delta in deltas.items():
+        if delta:
+            connection.execute(
+                update(counters)
+                .where(counters.c.name == name)
+                .values(value=counters.c.value + delta)
+            )
+
+
+class CatalogCache:
+    """Last serialized catalog, valid while the counter version is unchanged.
+
+    The version lives in the database, so writes made by other worker
+    processes invalidate this cache as well.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entry: Optional[tuple[int, str, bytes]] = None
+
+    def get(self, version: int) -> Optional[tuple[str, bytes]]:
+        entry = self._entry
+        if entry is None or entry[0] != version:
+            return None
+        return entry[1], entry[2]
+
+    def put(self, version: int, body: bytes) -> tuple[str, bytes]:
+        etag = hashlib.sha256(body).hexdigest()[:32]
+        with self._lock:
+            self._entry = (version, etag, body)
+        return etag, body
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entry = None
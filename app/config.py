@@ -3,12 +3,19 @@ from __future__ import annotations
 
 from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Literal, Optional
 
-from pydantic import Field
+from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings
 
 
+class RateLimit(BaseModel):
+    """Requests and (optionally) tokens allowed per minute; 0 means unlimited."""
+
+    rpm: int = 0
+    tpm: int = 0
+
+
 class Settings(BaseSettings):
     """Application configuration sourced from environment variables."""
 
@@ -25,9 +32,242 @@ class Settings(BaseSettings):
         alias="DATABASE_URL",
         description="Database connection string",
     )
+    sqlite_profile: Literal["default", "tuned"] = Field(
+        default="tuned",
+        alias="SQLITE_PROFILE",
+        description="'tuned' enables WAL and the pragmas below; 'default' keeps SQLite defaults",
+    )
+    sqlite_busy_timeout_ms: int = Field(
+        default=5000,
+        alias="SQLITE_BUSY_TIMEOUT_MS",
+        description="How long a connection waits for a competing writer before failing",
+    )
+    sqlite_mmap_size: int = Field(
+        default=256 * 1024 * 1024,
+        alias="SQLITE_MMAP_SIZE",
+        description="Bytes of the database file SQLite may memory-map",
+    )
+    sqlite_cache_size_kib: int = Field(
+        default=64 * 1024,
+        alias="SQLITE_CACHE_SIZE_KIB",
+        description="Page cache size per connection, in KiB",
+    )
+    db_pool_size: int = Field(
+        default=10,
+        alias="DB_POOL_SIZE",
+        description="Persistent connections kept in the engine pool",
+    )
+    db_max_overflow: int = Field(
+        default=10,
+        alias="DB_MAX_OVERFLOW",
+        description="Extra connections the pool may open under burst load",
+    )
+    upstream_http2: bool = Field(
+        default=True,
+        alias="UPSTREAM_HTTP2",
+        description="Negotiate HTTP/2 with upstream APIs when the h2 package is installed",
+    )
+    upstream_max_connections: int = Field(
+        default=100,
+        alias="UPSTREAM_MAX_CONNECTIONS",
+        description="Upper bound on open connections in the shared upstream pool",
+    )
+    upstream_max_keepalive_connections: int = Field(
+        default=20,
+        alias="UPSTREAM_MAX_KEEPALIVE_CONNECTIONS",
+        description="Idle connections kept warm for reuse",
+    )
+    upstream_keepalive_expiry_seconds: float = Field(
+        default=30.0,
+        alias="UPSTREAM_KEEPALIVE_EXPIRY_SECONDS",
+        description="How long an idle pooled connection is kept before closing",
+    )
+    upstream_connect_timeout_seconds: float = Field(
+        default=5.0,
+        alias="UPSTREAM_CONNECT_TIMEOUT_SECONDS",
+        description="Timeout for establishing an upstream connection",
+    )
+    upstream_timeout_seconds: float = Field(
+        default=30.0,
+        alias="UPSTREAM_TIMEOUT_SECONDS",
+        description="Default read, write and pool timeout for upstream calls",
+    )
+    model_timeout_seconds: float = Field(
+        default=600.0,
+        alias="MODEL_TIMEOUT_SECONDS",
+        description="Read timeout for model generation calls, which can run for minutes",
+    )
+    upstream_retry_attempts: int = Field(
+        default=3,
+        alias="UPSTREAM_RETRY_ATTEMPTS",
+        description="Total attempts for a retryable upstream failure (1 disables retries)",
+    )
+    upstream_retry_base_delay_seconds: float = Field(
+        default=0.5,
+        alias="UPSTREAM_RETRY_BASE_DELAY_SECONDS",
+        description="Base of the jittered exponential backoff between attempts",
+    )
+    upstream_retry_max_delay_seconds: float = Field(
+        default=8.0,
+        alias="UPSTREAM_RETRY_MAX_DELAY_SECONDS",
+        description="Longest backoff or Retry-After the client will wait before giving up",
+    )
+    circuit_failure_threshold: int = Field(
+        default=5,
+        alias="CIRCUIT_FAILURE_THRESHOLD",
+        description="Consecutive upstream failures that open an endpoint's circuit breaker",
+    )
+    circuit_reset_seconds: float = Field(
+        default=30.0,
+        alias="CIRCUIT_RESET_SECONDS",
+        description="How long an open breaker fails fast before letting a probe through",
+    )
+    upstream_rate_limits: dict[str, RateLimit] = Field(
+        default_factory=lambda: {
+            "openai.responses": RateLimit(rpm=500, tpm=200_000),
+            "openai.images": RateLimit(rpm=50),
+            "openai.videos": RateLimit(rpm=20),
+            "elevenlabs.tts": RateLimit(rpm=100),
+        },
+        alias="UPSTREAM_RATE_LIMITS",
+        description=(
+            "JSON map of endpoint or 'endpoint:model' to {rpm, tpm}; every model gets its own "
+            "buckets sized by the most specific entry"
+        ),
+    )
+    rate_limit_queue_size: int = Field(
+        default=100,
+        alias="RATE_LIMIT_QUEUE_SIZE",
+        description="Requests per endpoint and model that may wait for admission before a 503",
+    )
+    rate_limit_max_wait_seconds: float = Field(
+        default=30.0,
+        alias="RATE_LIMIT_MAX_WAIT_SECONDS",
+        description="Longest a queued request waits for rate-limit admission before a 503",
+    )
     elevenlabs_api_key: Optional[str] = Field(
         default=None, alias="ELEVENLABS_API_KEY", description="ElevenLabs API key"
     )
+    context_token_budget: int = Field(
+        default=8000,
+        alias="CONTEXT_TOKEN_BUDGET",
+        description="Tokens of conversation history sent with each chat turn",
+    )
+    context_summary_max_tokens: int = Field(
+        default=600,
+        alias="CONTEXT_SUMMARY_MAX_TOKENS",
+        description="Upper bound for the rolling summary of turns outside the budget",
+    )
+    history_cache_bytes: int = Field(
+        default=32 * 1024 * 1024,
+        alias="HISTORY_CACHE_BYTES",
+        description="Memory bound for the per-conversation chat history cache",
+    )
+    response_cache_ttl_seconds: int = Field(
+        default=24 * 60 * 60,
+        alias="RESPONSE_CACHE_TTL_SECONDS",
+        description="Lifetime of cached structured widget responses; 0 disables the cache",
+    )
+    response_cache_memory_entries: int = Field(
+        default=512,
+        alias="RESPONSE_CACHE_MEMORY_ENTRIES",
+        description="Structured responses kept in the in-process LRU tier",
+    )
+    response_cache_disk_entries: int = Field(
+        default=10_000,
+        alias="RESPONSE_CACHE_DISK_ENTRIES",
+        description="Structured responses kept in the SQLite tier before LRU eviction",
+    )
+    idempotency_ttl_seconds: int = Field(
+        default=24 * 60 * 60,
+        alias="IDEMPOTENCY_TTL_SECONDS",
+        description="How long a finished response is replayed for a repeated Idempotency-Key",
+    )
+    idempotency_wait_seconds: float = Field(
+        default=120.0,
+        alias="IDEMPOTENCY_WAIT_SECONDS",
+        description="How long a duplicate request waits on the in-flight original before a 409",
+    )
+    media_root: Path = Field(
+        default=Path("./media"),
+        alias="MEDIA_ROOT",
+        description="Directory for the content-addressed media blob store",
+    )
+    media_storage: Literal["local", "s3"] = Field(
+        default="local",
+        alias="MEDIA_STORAGE",
+        description="Backend for media blobs: 'local' (MEDIA_ROOT) or an S3-compatible bucket",
+    )
+    s3_endpoint_url: Optional[str] = Field(
+        default=None,
+        alias="S3_ENDPOINT_URL",
+        description="Base URL of the S3-compatible API, e.g. https://s3.us-east-1.amazonaws.com",
+    )
+    s3_bucket: Optional[str] = Field(default=None, alias="S3_BUCKET", description="Media bucket")
+    s3_region: str = Field(
+        default="us-east-1", alias="S3_REGION", description="Region used to sign S3 requests"
+    )
+    s3_access_key_id: Optional[str] = Field(
+        default=None, alias="S3_ACCESS_KEY_ID", description="S3 access key id"
+    )
+    s3_secret_access_key: Optional[str] = Field(
+        default=None, alias="S3_SECRET_ACCESS_KEY", description="S3 secret access key"
+    )
+    s3_prefix: str = Field(
+        default="media/", alias="S3_PREFIX", description="Key prefix for media objects"
+    )
+    s3_public_base_url: Optional[str] = Field(
+        default=None,
+        alias="S3_PUBLIC_BASE_URL",
+        description="Public (CDN) URL of the bucket; when unset media is served via presigned URLs",
+    )
+    s3_presign_expiry_seconds: int = Field(
+        default=3600,
+        alias="S3_PRESIGN_EXPIRY_SECONDS",
+        description="Lifetime of presigned media download URLs",
+    )
+    max_upload_bytes: int = Field(
+        default=1024 * 1024 * 1024,
+        alias="MAX_UPLOAD_BYTES",
+        description="Largest file accepted by POST /api/gallery/upload",
+    )
+    derivative_widths: list[int] = Field(
+        default_factory=lambda: [320, 640, 960],
+        alias="DERIVATIVE_WIDTHS",
+        description="JSON list of thumbnail widths rendered for gallery images",
+    )
+    derivative_formats: list[str] = Field(
+        default_factory=lambda: ["avif", "webp"],
+        alias="DERIVATIVE_FORMATS",
+        description="Thumbnail formats in order of preference; ones Pillow cannot encode are skipped",
+    )
+    derivative_workers: int = Field(
+        default=2,
+        alias="DERIVATIVE_WORKERS",
+        description="Threads rendering image derivatives in the background",
+    )
+    duplicate_max_distance: int = Field(
+        default=6,
+        ge=0,
+        le=64,
+        alias="DUPLICATE_MAX_DISTANCE",
+        description="Largest perceptual-hash Hamming distance treated as a duplicate image",
+    )
+    video_cache_bytes: int = Field(
+        default=2 * 1024 * 1024 * 1024,
+        alias="VIDEO_CACHE_BYTES",
+        description="Disk bound for proxied Sora videos cached under MEDIA_ROOT/video-cache",
+    )
+    video_poll_interval_seconds: float = Field(
+        default=5.0,
+        alias="VIDEO_POLL_INTERVAL_SECONDS",
+        description="Delay between batched status checks for pending Sora renders",
+    )
+    video_job_timeout_seconds: float = Field(
+        default=1800.0,
+        alias="VIDEO_JOB_TIMEOUT_SECONDS",
+        description="Age after which a pending Sora render is marked as failed",
+    )
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,220 @@
+"""Token-budgeted conversation history with a rolling summary of older turns."""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+from sqlalchemy import event
+
+from .database import Conversation, Message
+from .openai_client import format_message
+
+try:  # pragma: no cover - optional dependency
+    import tiktoken
+except ImportError:  # pragma: no cover - fall back to a character heuristic
+    tiktoken = None
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+# Tokens of framing the Responses API adds around every message.
+MESSAGE_OVERHEAD_TOKENS = 4
+# Once the budget is exceeded, keep only this share of it as verbatim turns so
+# the summary is refreshed every few turns rather than on every message.
+RETAIN_FRACTION = 0.5
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:  # pragma: no cover - encoding files unavailable offline
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with ``tiktoken`` when installed, else estimate ~4 chars per token."""
+
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def turn_tokens(turn: dict[str, Any]) -> int:
+    tokens = turn.get("tokens")
+    if tokens is None:
+        tokens = count_tokens(turn["content"]) + MESSAGE_OVERHEAD_TOKENS
+    return tokens
+
+
+@dataclass
+class ContextWindow:
+    """Turns that fit the budget plus the older turns to fold into the summary."""
+
+    summary: Optional[str]
+    recent: list[dict[str, Any]]
+    evicted: list[dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def summarized_through_id(self) -> Optional[int]:
+        return self.evicted[-1]["id"] if self.evicted else None
+
+    def history(self, summary: Optional[str] = None) -> list[dict[str, str]]:
+        """Return the ``role``/``content`` list to send upstream."""
+
+        summary = summary if summary is not None else self.summary
+        messages = [{"role": "system", "content": SUMMARY_PREFIX + summary}] if summary else []
+        messages.extend(
+            turn.get("formatted") or {"role": turn["role"], "content": turn["content"]}
+            for turn in self.recent
+        )
+        return messages
+
+
+def plan_context(
+    summary: Optional[str], turns: Sequence[dict[str, Any]], *, budget: int
+) -> ContextWindow:
+    """Keep the newest ``turns`` within ``budget`` tokens, summary included.
+
+    ``turns`` are the messages not yet covered by ``summary``, oldest first,
+    each with ``id``, ``role`` and ``content``. The newest turn is always kept.
+    When everything fits nothing is evicted; otherwise the window shrinks to
+    :data:`RETAIN_FRACTION` of the budget and the rest is returned in
+    ``evicted`` for the caller to summarize.
+    """
+
+    turns = list(turns)
+    summary_tokens = count_tokens(SUMMARY_PREFIX + summary) if summary else 0
+    costs = [turn_tokens(turn) for turn in turns]
+    if summary_tokens + sum(costs) <= budget:
+        return ContextWindow(summary=summary, recent=turns)
+
+    allowance = max(int(budget * RETAIN_FRACTION) - summary_tokens, 0)
+    kept = 0
+    used = 0
+    for cost in reversed(costs):
+        if kept and used + cost > allowance:
+            break
+        used += cost
+        kept += 1
+    split = len(turns) - kept
+    return ContextWindow(summary=summary, recent=turns[split:], evicted=turns[:split])
+
+
+# Rough per-turn bookkeeping cost on top of the message text.
+TURN_OVERHEAD_BYTES = 256
+
+
+@dataclass
+class _CachedHistory:
+    through_id: int
+    last_id: int
+    turns: list[dict[str, Any]]
+    size: int
+
+
+class HistoryCache:
+    """LRU of each conversation's unsummarized turns, bounded in bytes.
+
+    Every cached turn carries its token count and its formatted Responses API
+    item, so a hot conversation only reads the messages added since the last
+    turn. Entries are dropped when a message is edited or deleted (see
+    :meth:`watch`) and trimmed when the rolling summary advances.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[int, _CachedHistory] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def load(
+        self,
+        conversation_id: int,
+        through_id: Optional[int],
+        fetch: Callable[[int], Iterable[Any]],
+    ) -> list[dict[str, Any]]:
+        """Return turns after ``through_id``, reading only rows newer than the cache.
+
+        ``fetch(after_id)`` must return the conversation's messages with an id
+        greater than ``after_id``, oldest first, as objects with ``id``,
+        ``role`` and ``content`` attributes.
+        """
+
+        through_id = through_id or 0
+        with self._lock:
+            entry = self._entries.get(conversation_id)
+            if entry is not None and entry.through_id <= through_id:
+                self._entries.move_to_end(conversation_id)
+                self.hits += 1
+                turns = [turn for turn in entry.turns if turn["id"] > through_id]
+                after = max(entry.last_id, through_id)
+            else:
+                self.misses += 1
+                turns = []
+                after = through_id
+
+        turns.extend(self._turn(row) for row in fetch(after))
+        last_id = turns[-1]["id"] if turns else after
+        self._store(conversation_id, _CachedHistory(through_id, last_id, turns, 0))
+        return list(turns)
+
+    def invalidate(self, conversation_id: int) -> None:
+        with self._lock:
+            entry = self._entries.pop(conversation_id, None)
+            if entry is not None:
+                self._size -= entry.size
+
+    def watch(self, session_factory) -> None:
+        """Invalidate conversations whose messages change through ``session_factory``."""
+
+        @event.listens_for(session_factory, "after_flush")
+        def _collect(session, flush_context) -> None:
+            stale = session.info.setdefault("stale_histories", set())
+            for instance in list(session.dirty) + list(session.deleted):
+                if isinstance(instance, Message):
+                    stale.add(instance.conversation_id)
+            for instance in session.deleted:
+                if isinstance(instance, Conversation):
+                    stale.add(instance.id)
+
+        @event.listens_for(session_factory, "after_commit")
+        def _invalidate(session) -> None:
+            for conversation_id in session.info.pop("stale_histories", ()):
+                self.invalidate(conversation_id)
+
+        @event.listens_for(session_factory, "after_rollback")
+        def _discard(session) -> None:
+            session.info.pop("stale_histories", None)
+
+    @staticmethod
+    def _turn(row: Any) -> dict[str, Any]:
+        item = {"role": row.role, "content": row.content}
+        return {
+            "id": row.id,
+            "role": row.role,
+            "content": row.content,
+            "tokens": count_tokens(row.content) + MESSAGE_OVERHEAD_TOKENS,
+            "formatted": format_message(item),
+            "bytes": len(row.content.encode("utf-8")) + TURN_OVERHEAD_BYTES,
+        }
+
+    def _store(self, conversation_id: int, entry: _CachedHistory) -> None:
+        entry.size = sum(turn["bytes"] for turn in entry.turns)
+        with self._lock:
+            previous = self._entries.pop(conversation_id, None)
+            if previous is not None:
+                self._size -= previous.size
+            if entry.size > self.max_bytes:
+                return
+            self._entries[conversation_id] = entry
+            self._size += entry.size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size
@@ -2,31 +2,42 @@
 from __future__ import annotations
 
 from contextlib import contextmanager
-from datetime import datetime
+from datetime import date, datetime
 from typing import Generator
 
 import json
 
+from alembic import command
+from alembic.config import Config as AlembicConfig
 from sqlalchemy import (
+    BigInteger,
+    Date,
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
     UniqueConstraint,
     create_engine,
+    event,
+    func,
+    inspect,
+    select,
 )
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import (
     DeclarativeBase,
     Mapped,
     Session,
+    column_property,
     mapped_column,
     relationship,
     sessionmaker,
 )
 
-from .config import get_settings
+from .config import BASE_DIR, get_settings
 
 
 class Base(DeclarativeBase):
@@ -47,6 +58,9 @@ class Conversation(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
+    # Rolling summary of every message up to and including summary_through_id.
+    summary: Mapped[str | None] = mapped_column(Text, nullable=True)
+    summary_through_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
     messages: Mapped[list[Message]] = relationship(
         "Message",
@@ -55,6 +69,8 @@ class Conversation(Base):
         order_by="Message.created_at",
     )
 
+    __table_args__ = (Index("ix_conversations_updated_at", "updated_at"),)
+
 
 class Message(Base):
     """Chat message exchanged with OpenAI."""
@@ -66,10 +82,20 @@ class Message(Base):
     role: Mapped[str] = mapped_column(String(32), nullable=False)
     content: Mapped[str] = mapped_column(Text, nullable=False)
     model: Mapped[str] = mapped_column(String(128), nullable=True)
+    # Legacy free-form usage; new rows use the integer columns below.
     token_usage: Mapped[str] = mapped_column(String(128), nullable=True)
+    input_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    output_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    cached_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    latency_ms: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
     conversation: Mapped[Conversation] = relationship("Conversation", back_populates="messages")
 
+    __table_args__ = (
+        Index("ix_messages_conversation_created", "conversation_id", "created_at"),
+        Index("ix_messages_conversation_id", "conversation_id", "id"),
+    )
+
 
 class GalleryAsset(Base):
     """Generated asset stored in the gallery."""
@@ -82,6 +108,10 @@ class GalleryAsset(Base):
     description: Mapped[str] = mapped_column(Text, nullable=True)
     url: Mapped[str] = mapped_column(Text, nullable=False)
     metadata_json: Mapped[str] = mapped_column(Text, nullable=True)
+    # JSON list of responsive thumbnails; NULL until the derivative worker has run.
+    derivatives_json: Mapped[str] = mapped_column(Text, nullable=True)
+    # Signed 64-bit dHash of image assets, set alongside the derivatives.
+    perceptual_hash: Mapped[int] = mapped_column(BigInteger, nullable=True)
 
     galleries: Mapped[list["Gallery"]] = relationship(
         "Gallery",
@@ -89,6 +119,11 @@ class GalleryAsset(Base):
         back_populates="assets",
     )
 
+    __table_args__ = (
+        Index("ix_gallery_assets_created_id", "created_at", "id"),
+        Index("ix_gallery_assets_perceptual_hash", "perceptual_hash"),
+    )
+
     @property
     def gallery_ids(self) -> list[int]:
         return [gallery.id for gallery in self.galleries]
@@ -113,9 +148,7 @@ class Gallery(Base):
         order_by="GalleryAsset.created_at.desc()",
     )
 
-    @property
-    def asset_count(self) -> int:
-        return len(self.assets)
+    __table_args__ = (Index("ix_galleries_updated_at", "updated_at"),)
 
 
 class Agent(Base):
@@ -131,6 +164,8 @@ class Agent(Base):
     capabilities_json: Mapped[str] = mapped_column(Text, nullable=True)
     tools_json: Mapped[str] = mapped_column(Text, nullable=True)
 
+    __table_args__ = (Index("ix_agents_updated_at", "updated_at"),)
+
     @property
     def capabilities(self) -> list[str]:
         if not self.capabilities_json:
@@ -173,7 +208,10 @@ class GalleryAssetLink(Base):
     gallery_id: Mapped[int] = mapped_column(ForeignKey("galleries.id", ondelete="CASCADE"))
     asset_id: Mapped[int] = mapped_column(ForeignKey("gallery_assets.id", ondelete="CASCADE"))
 
-    __table_args__ = (UniqueConstraint("gallery_id", "asset_id", name="uq_gallery_asset"),)
+    __table_args__ = (
+        UniqueConstraint("gallery_id", "asset_id", name="uq_gallery_asset"),
+        Index("ix_gallery_asset_links_asset", "asset_id"),
+    )
 
 
 class WorkspaceWidget(Base):
@@ -223,10 +261,6 @@ class CodeProject(Base):
         order_by="CodeFile.path",
     )
 
-    @property
-    def file_count(self) -> int:
-        return len(self.files)
-
 
 class CodeFile(Base):
     """Individual file tracked within a code project."""
@@ -259,21 +293,182 @@ class AudioTrack(Base):
     url: Mapped[str] = mapped_column(Text, nullable=False)
     metadata_json: Mapped[str | None] = mapped_column(Text, nullable=True)
 
+    __table_args__ = (Index("ix_audio_tracks_created_at", "created_at"),)
 
-_settings = get_settings()
-engine = create_engine(
-    _settings.database_url,
-    connect_args={"check_same_thread": False}
-    if _settings.database_url.startswith("sqlite")
-    else {},
+
+class GenerationJob(Base):
+    """Durable record of an upstream render that finishes asynchronously."""
+
+    __tablename__ = "generation_jobs"
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    kind: Mapped[str] = mapped_column(String(32), nullable=False, default="video")
+    asset_id: Mapped[int | None] = mapped_column(
+        ForeignKey("gallery_assets.id", ondelete="CASCADE"), nullable=True
+    )
+    upstream_id: Mapped[str] = mapped_column(String(128), nullable=False)
+    status: Mapped[str] = mapped_column(String(32), nullable=False, default="queued")
+    progress: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    next_poll_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Set while one worker process is polling the job, so others skip it.
+    lease_owner: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    lease_until: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (Index("ix_generation_jobs_status_next_poll", "status", "next_poll_at"),)
+
+
+class CatalogCounter(Base):
+    """Denormalized row count backing the data catalog stats."""
+
+    __tablename__ = "catalog_counters"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    value: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class UsageRollup(Base):
+    """Per-model, per-day totals of assistant replies, kept in step on insert."""
+
+    __tablename__ = "usage_rollups"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    model: Mapped[str] = mapped_column(String(128), primary_key=True)
+    responses: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    input_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    output_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    cached_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Replies stored before latency was recorded do not count towards the mean.
+    latency_samples: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    latency_ms_total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    latency_ms_max: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class ResponseCacheEntry(Base):
+    """Persistent tier of the structured response cache."""
+
+    __tablename__ = "response_cache"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    model: Mapped[str] = mapped_column(String(128), nullable=False)
+    value: Mapped[str] = mapped_column(Text, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    accessed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (Index("ix_response_cache_accessed_at", "accessed_at"),)
+
+
+class IdempotencyRecord(Base):
+    """Claim and stored response for an ``Idempotency-Key`` on one endpoint."""
+
+    __tablename__ = "idempotency_keys"
+
+    endpoint: Mapped[str] = mapped_column(String(64), primary_key=True)
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    status: Mapped[str] = mapped_column(String(16), nullable=False)
+    status_code: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    response_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (Index("ix_idempotency_keys_expires_at", "expires_at"),)
+
+
+class RateLimitBucket(Base):
+    """Token bucket level shared by every worker's upstream rate limiter."""
+
+    __tablename__ = "rate_limit_buckets"
+
+    name: Mapped[str] = mapped_column(String(255), primary_key=True)
+    tokens: Mapped[float] = mapped_column(Float, nullable=False)
+    # Epoch seconds of the last refill, comparable across processes.
+    refilled_at: Mapped[float] = mapped_column(Float, nullable=False)
+    granted: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+# Counts are computed in SQL as correlated subqueries so listing rows never
+# loads their child collections.
+Gallery.asset_count = column_property(
+    select(func.count(GalleryAssetLink.id))
+    .where(GalleryAssetLink.gallery_id == Gallery.id)
+    .correlate_except(GalleryAssetLink)
+    .scalar_subquery()
+)
+CodeProject.file_count = column_property(
+    select(func.count(CodeFile.id))
+    .where(CodeFile.project_id == CodeProject.id)
+    .correlate_except(CodeFile)
+    .scalar_subquery()
+)
+Conversation.message_count = column_property(
+    select(func.count(Message.id))
+    .where(Message.conversation_id == Conversation.id)
+    .correlate_except(Message)
+    .scalar_subquery(),
+    deferred=True,
 )
+
+
+def _create_engine(settings) -> Engine:
+    """Build the engine, applying the tuned SQLite profile when selected."""
+
+    url = make_url(settings.database_url)
+    is_sqlite = url.get_backend_name() == "sqlite"
+    in_memory = is_sqlite and url.database in (None, "", ":memory:")
+    options: dict = {}
+    if not in_memory:
+        options.update(pool_size=settings.db_pool_size, max_overflow=settings.db_max_overflow)
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False} if is_sqlite else {},
+        **options,
+    )
+
+    if is_sqlite and settings.sqlite_profile == "tuned":
+
+        @event.listens_for(engine, "connect")
+        def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+            # WAL lets readers proceed while a writer holds the lock and
+            # synchronous=NORMAL is durable across application crashes in WAL mode.
+            cursor = dbapi_connection.cursor()
+            if not in_memory:
+                cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+            cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+            cursor.execute(f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kib)}")
+            cursor.execute("PRAGMA temp_store=MEMORY")
+            cursor.close()
+
+    return engine
+
+
+_settings = get_settings()
+engine = _create_engine(_settings)
 SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
 
 
+def _alembic_config() -> AlembicConfig:
+    config = AlembicConfig(str(BASE_DIR.parent / "alembic.ini"))
+    config.attributes["configure_logger"] = False
+    return config
+
+
 def init_db() -> None:
-    """Create database tables if they do not already exist."""
+    """Create missing tables and bring existing databases to the latest revision.
+
+    A brand-new database gets the full schema from the models and is stamped
+    at ``head``; an existing one is upgraded through the Alembic migrations in
+    ``migrations/versions``.
+    """
 
+    fresh = not inspect(engine).get_table_names()
     Base.metadata.create_all(bind=engine)
+    if fresh:
+        command.stamp(_alembic_config(), "head")
+    else:
+        command.upgrade(_alembic_config(), "head")
 
 
 @contextmanager
@@ -0,0 +1,191 @@
+"""Perceptual hashes and a BK-tree index for near-duplicate gallery images."""
+from __future__ import annotations
+
+import io
+import threading
+from typing import Any, Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from .database import GalleryAsset
+from .storage import MEDIA_URL_PATTERN
+
+try:  # pragma: no cover - optional dependency
+    from PIL import Image
+except ImportError:  # pragma: no cover - perceptual hashing is disabled without Pillow
+    Image = None
+
+# dHash compares HASH_SIZE + 1 columns per row, giving a HASH_SIZE² bit hash.
+HASH_SIZE = 8
+HASH_MASK = (1 << 64) - 1
+
+
+def to_signed(value: int) -> int:
+    """Fit an unsigned 64-bit hash into SQLite's signed INTEGER."""
+
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def hamming(a: int, b: int) -> int:
+    return ((a ^ b) & HASH_MASK).bit_count()
+
+
+def decode_image(data: bytes) -> Any:
+    """Decode ``data`` into an RGB or RGBA Pillow image."""
+
+    with Image.open(io.BytesIO(data)) as image:
+        image.load()
+        has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+        return image.convert("RGBA" if has_alpha else "RGB")
+
+
+def dhash(image: Any) -> int:
+    """Difference hash of an image from :func:`decode_image`, as a signed 64-bit integer.
+
+    Each bit records whether a pixel of the grey 9×8 thumbnail is darker
+    than its right-hand neighbour, so re-encoding, resizing and small edits
+    flip few bits while different images differ in about half of them.
+    Every caller hashes the same decoded RGB/RGBA form, so a generated image
+    and its later re-hash by the derivative worker get identical values.
+    """
+
+    pixels = image.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS).tobytes()
+    bits = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for column in range(HASH_SIZE):
+            bits = (bits << 1) | (pixels[offset + column] < pixels[offset + column + 1])
+    return to_signed(bits)
+
+
+def dhash_bytes(data: bytes) -> Optional[int]:
+    """:func:`dhash` of encoded image bytes; ``None`` without Pillow or for undecodable data."""
+
+    if Image is None:
+        return None
+    try:
+        return dhash(decode_image(data))
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+
+
+class BKTree:
+    """Burkhard–Keller tree over Hamming distance.
+
+    Nodes are ``[hash, items, {distance: child}]``. A search only descends
+    into children whose edge distance is within ``max_distance`` of the
+    query's distance to the node (triangle inequality), so near-duplicate
+    lookups touch a small fraction of the tree.
+    """
+
+    def __init__(self) -> None:
+        self._root: Optional[list] = None
+        self.size = 0
+
+    def add(self, value: int, item: Any) -> None:
+        value &= HASH_MASK
+        self.size += 1
+        if self._root is None:
+            self._root = [value, [item], {}]
+            return
+        node = self._root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item], {}]
+                return
+            node = child
+
+    def search(self, value: int, max_distance: int) -> list[tuple[int, Any]]:
+        """Return ``(distance, item)`` pairs within ``max_distance``, nearest first."""
+
+        value &= HASH_MASK
+        matches = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= max_distance:
+                matches.extend((distance, item) for item in node[1])
+            for edge, child in node[2].items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    stack.append(child)
+        matches.sort(key=lambda match: match[0])
+        return matches
+
+
+class DuplicateIndex:
+    """In-process BK-tree of image asset hashes kept in step with the database.
+
+    Each lookup first reads rows added since the last one (by id), plus the
+    stored images the derivative worker in any process has not processed
+    yet, since it may fill in their hash later. Deleted assets are not
+    removed from the tree; callers drop ids that no longer load.
+    """
+
+    def __init__(self) -> None:
+        self._tree = BKTree()
+        self._lock = threading.Lock()
+        self._last_id = 0
+        self._unhashed: set[int] = set()
+        self._indexed: set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._indexed)
+
+    def _add(self, asset_id: int, value: int) -> None:
+        if asset_id not in self._indexed:
+            self._indexed.add(asset_id)
+            self._tree.add(value, asset_id)
+
+    def add(self, asset_id: int, value: int) -> None:
+        with self._lock:
+            self._unhashed.discard(asset_id)
+            self._add(asset_id, value)
+
+    def refresh(self, session: Session) -> None:
+        with self._lock:
+            condition = GalleryAsset.id > self._last_id
+            if self._unhashed:
+                condition = or_(condition, GalleryAsset.id.in_(self._unhashed))
+            rows = session.execute(
+                select(
+                    GalleryAsset.id,
+                    GalleryAsset.perceptual_hash,
+                    GalleryAsset.url,
+                    GalleryAsset.derivatives_json,
+                )
+                .where(GalleryAsset.asset_type == "image", condition)
+                .order_by(GalleryAsset.id.asc())
+            ).all()
+            unhashed = set()
+            for asset_id, value, url, derivatives_json in rows:
+                if value is not None:
+                    self._add(asset_id, value)
+                elif derivatives_json is None and MEDIA_URL_PATTERN.match(url):
+                    # Only stored blobs the worker has yet to process can still get a hash;
+                    # external URLs and images it could not decode never will.
+                    unhashed.add(asset_id)
+                self._last_id = max(self._last_id, asset_id)
+            # Previously unhashed ids that no longer come back were deleted.
+            self._unhashed = unhashed
+
+    def find(
+        self,
+        session: Session,
+        value: int,
+        max_distance: int,
+        *,
+        exclude: Optional[int] = None,
+    ) -> list[tuple[int, int]]:
+        """``(distance, asset_id)`` pairs of stored images near ``value``, nearest first."""
+
+        self.refresh(session)
+        with self._lock:
+            matches = self._tree.search(value, max_distance)
+        return [(distance, asset_id) for distance, asset_id in matches if asset_id != exclude]
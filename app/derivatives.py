@@ -0,0 +1,204 @@
+"""Responsive WebP/AVIF derivatives of gallery images, rendered off the request path."""
+from __future__ import annotations
+
+import io
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional, Sequence
+
+from sqlalchemy import select, update
+
+from .blobs import MediaStore, media_url
+from .config import Settings
+from .database import GalleryAsset, session_scope
+from .dedupe import DuplicateIndex, decode_image, dhash
+from .storage import MEDIA_URL_PATTERN
+
+try:  # pragma: no cover - optional dependency
+    from PIL import Image
+except ImportError:  # pragma: no cover - derivatives are skipped without Pillow
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# Output format name -> (Pillow format, MIME type, encoder options).
+FORMATS: dict[str, tuple[str, str, dict[str, Any]]] = {
+    "avif": ("AVIF", "image/avif", {"quality": 55}),
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+}
+
+
+def available_formats(requested: Sequence[str]) -> list[str]:
+    """The ``requested`` formats the installed Pillow can encode, in order."""
+
+    if Image is None:
+        return []
+    Image.init()
+    return [name for name in requested if name in FORMATS and FORMATS[name][0] in Image.SAVE]
+
+
+def render_derivatives(
+    source: Any, widths: Sequence[int], formats: Sequence[str]
+) -> list[tuple[bytes, int, int, str]]:
+    """Encode the decoded ``source`` at each width narrower than it, in every format.
+
+    Returns ``(payload, width, height, media_type)`` tuples, narrowest first.
+    An image no wider than the smallest width is re-encoded at its own size.
+    """
+
+    if not formats:
+        return []
+    rendered = []
+    for width in [width for width in sorted(widths) if width < source.width] or [source.width]:
+        height = max(1, round(source.height * width / source.width))
+        resized = (
+            source if width == source.width else source.resize((width, height), Image.LANCZOS)
+        )
+        for name in formats:
+            pillow_format, media_type, options = FORMATS[name]
+            buffer = io.BytesIO()
+            resized.save(buffer, format=pillow_format, **options)
+            rendered.append((buffer.getvalue(), width, height, media_type))
+    return rendered
+
+
+class DerivativeWorker:
+    """Thread pool that renders derivatives and records them on the asset.
+
+    Derivatives are content-addressed blobs in the same media store as the
+    original; their URLs, sizes and types are kept in
+    ``gallery_assets.derivatives_json``. The same pass stores the image's
+    perceptual hash and adds it to ``duplicates``. Without Pillow scheduling
+    is a no-op; without widths or an encoder for any configured format only
+    the hash is recorded.
+    """
+
+    def __init__(
+        self,
+        store: MediaStore,
+        settings: Settings,
+        duplicates: Optional[DuplicateIndex] = None,
+    ):
+        self.store = store
+        self.duplicates = duplicates
+        self.widths = sorted(settings.derivative_widths)
+        self.requested_formats = list(settings.derivative_formats)
+        self.formats = available_formats(settings.derivative_formats) if self.widths else []
+        self.workers = settings.derivative_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending: set[int] = set()
+        self.rendered = 0
+        self.failed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return Image is not None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="derivatives"
+            )
+        return self._executor
+
+    def schedule(self, asset_id: int, url: str) -> bool:
+        """Queue derivatives for an image stored at ``/media/{sha256}``."""
+
+        match = MEDIA_URL_PATTERN.match(url)
+        if not self.enabled or match is None:
+            return False
+        with self._lock:
+            if asset_id in self._pending:
+                return False
+            self._pending.add(asset_id)
+            self.executor.submit(self._run, asset_id, match.group("hash"))
+        return True
+
+    def backfill(self, batch_size: int = 200) -> int:
+        """Queue every stored image that has not been processed yet."""
+
+        if not self.enabled:
+            logger.warning(
+                "Pillow is not installed; image derivatives and duplicate detection are disabled"
+            )
+            return 0
+        skipped = [name for name in self.requested_formats if name not in self.formats]
+        if self.widths and skipped:
+            logger.warning(
+                f"Pillow cannot encode {', '.join(skipped)}; those derivatives are skipped"
+            )
+        scheduled = 0
+        last_id = 0
+        while True:
+            with session_scope() as session:
+                rows = session.execute(
+                    select(GalleryAsset.id, GalleryAsset.url)
+                    .where(
+                        GalleryAsset.id > last_id,
+                        GalleryAsset.asset_type == "image",
+                        GalleryAsset.derivatives_json.is_(None),
+                        GalleryAsset.url.like("/media/%"),
+                    )
+                    .order_by(GalleryAsset.id.asc())
+                    .limit(batch_size)
+                ).all()
+            if not rows:
+                return scheduled
+            for asset_id, url in rows:
+                scheduled += self.schedule(asset_id, url)
+            last_id = rows[-1].id
+
+    def _run(self, asset_id: int, blob_hash: str) -> None:
+        try:
+            derivatives = []
+            perceptual_hash = None
+            try:
+                source = decode_image(b"".join(self.store.open(blob_hash)))
+                perceptual_hash = dhash(source)
+                rendered = render_derivatives(source, self.widths, self.formats)
+            except (OSError, ValueError, Image.DecompressionBombError) as exc:
+                # Recorded as an empty list so the image is not retried on every start.
+                logger.warning(f"No derivatives for asset {asset_id}: {exc}")
+                rendered = []
+            for payload, width, height, media_type in rendered:
+                derivatives.append(
+                    {
+                        "url": media_url(self.store.put(payload)),
+                        "width": width,
+                        "height": height,
+                        "media_type": media_type,
+                    }
+                )
+            with session_scope() as session:
+                session.execute(
+                    update(GalleryAsset)
+                    .where(GalleryAsset.id == asset_id)
+                    .values(
+                        derivatives_json=json.dumps(derivatives),
+                        perceptual_hash=perceptual_hash,
+                    )
+                )
+            if self.duplicates is not None and perceptual_hash is not None:
+                self.duplicates.add(asset_id, perceptual_hash)
+            self.rendered += 1
+        except Exception:  # pragma: no cover - keep the pool alive
+            self.failed += 1
+            logger.exception(f"Rendering derivatives for asset {asset_id} failed")
+        finally:
+            with self._lock:
+                self._pending.discard(asset_id)
+
+    def stats(self) -> dict[str, int]:
+        return {"pending": len(self._pending), "rendered": self.rendered, "failed": self.failed}
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            # Cancelled assets still have NULL derivatives and are backfilled on restart.
+            self._pending.clear()
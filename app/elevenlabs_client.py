@@ -6,6 +6,14 @@ from typing import Any, Dict, Optional
 import httpx
 
 from .config import Settings
+from .http_clients import HTTPClients
+from .ratelimit import RateLimiter
+from .resilience import CircuitOpenError, Resilience
+
+PLACEHOLDER_AUDIO_URL = (
+    "https://cdn.pixabay.com/download/audio/2022/10/25/audio_5c3c7e90f3.mp3"
+)
+DEFAULT_VOICE_ID = "pNInz6obpgDQGcFmaJgB"
 
 
 class ElevenLabsClient:
@@ -13,8 +21,17 @@ class ElevenLabsClient:
 
     BASE_URL = "https://api.elevenlabs.io/v1"
 
-    def __init__(self, settings: Settings):
+    def __init__(
+        self,
+        settings: Settings,
+        http: HTTPClients | None = None,
+        resilience: Resilience | None = None,
+        limiter: RateLimiter | None = None,
+    ):
         self._api_key = settings.elevenlabs_api_key
+        self._http = http or HTTPClients(settings)
+        self._resilience = resilience or Resilience(settings)
+        self._limiter = limiter or RateLimiter(settings)
 
     def _headers(self) -> Dict[str, str]:
         headers = {"Accept": "application/json"}
@@ -22,28 +39,34 @@ class ElevenLabsClient:
             headers["xi-api-key"] = self._api_key
         return headers
 
-    def generate_audio(
+    def _mock_payload(
         self,
-        prompt: str,
         *,
         title: str,
-        voice: Optional[str] = None,
-        style: Optional[str] = None,
-        track_type: str = "music",
-        duration_seconds: Optional[int] = None,
+        voice: Optional[str],
+        style: Optional[str],
+        track_type: str,
+        duration_seconds: Optional[int],
     ) -> Dict[str, Any]:
-        """Generate an audio track or return a mocked placeholder."""
+        return {
+            "url": PLACEHOLDER_AUDIO_URL,
+            "model": "mock-elevenlabs",
+            "voice": voice or "placeholder",
+            "style": style or "inspiration",
+            "track_type": track_type,
+            "duration_seconds": duration_seconds or 30,
+            "description": f"Preview for '{title}' — configure ELEVENLABS_API_KEY for live audio.",
+        }
 
-        if not self._api_key:
-            return {
-                "url": "https://cdn.pixabay.com/download/audio/2022/10/25/audio_5c3c7e90f3.mp3",  # noqa: E501
-                "model": "mock-elevenlabs",
-                "voice": voice or "placeholder",
-                "style": style or "inspiration",
-                "track_type": track_type,
-                "duration_seconds": duration_seconds or 30,
-                "description": f"Preview for '{title}' — configure ELEVENLABS_API_KEY for live audio.",
-            }
+    def _request(
+        self,
+        prompt: str,
+        *,
+        voice: Optional[str],
+        style: Optional[str],
+        duration_seconds: Optional[int],
+    ) -> tuple[str, str, Dict[str, Any]]:
+        """Return ``(voice_id, url, payload)`` for a text-to-speech call."""
 
         payload: Dict[str, Any] = {
             "text": prompt,
@@ -56,28 +79,38 @@ class ElevenLabsClient:
         if duration_seconds:
             payload["duration_seconds"] = duration_seconds
 
-        voice_id = voice or "pNInz6obpgDQGcFmaJgB"
-        url = f"{self.BASE_URL}/text-to-speech/{voice_id}"
+        voice_id = voice or DEFAULT_VOICE_ID
+        return voice_id, f"{self.BASE_URL}/text-to-speech/{voice_id}", payload
 
-        try:
-            with httpx.Client(timeout=30.0) as client:
-                response = client.post(url, headers=self._headers(), json=payload)
-                response.raise_for_status()
-        except httpx.HTTPError as exc:  # pragma: no cover - external dependency
-            return {
-                "url": "https://cdn.pixabay.com/download/audio/2022/10/25/audio_5c3c7e90f3.mp3",
-                "model": "elevenlabs",  # placeholder identifier
-                "voice": voice_id,
-                "style": style,
-                "track_type": track_type,
-                "duration_seconds": duration_seconds or 30,
-                "description": f"Failed to call ElevenLabs: {exc}",
-            }
-
-        audio_url = response.headers.get("Location")
-        if not audio_url:
-            audio_url = "https://cdn.pixabay.com/download/audio/2022/10/25/audio_5c3c7e90f3.mp3"
+    @staticmethod
+    def _error_payload(
+        exc: Exception,
+        *,
+        voice_id: str,
+        style: Optional[str],
+        track_type: str,
+        duration_seconds: Optional[int],
+    ) -> Dict[str, Any]:
+        return {
+            "url": PLACEHOLDER_AUDIO_URL,
+            "model": "elevenlabs",  # placeholder identifier
+            "voice": voice_id,
+            "style": style,
+            "track_type": track_type,
+            "duration_seconds": duration_seconds or 30,
+            "description": f"Failed to call ElevenLabs: {exc}",
+        }
 
+    @staticmethod
+    def _result_payload(
+        response: httpx.Response,
+        *,
+        voice_id: str,
+        style: Optional[str],
+        track_type: str,
+        duration_seconds: Optional[int],
+    ) -> Dict[str, Any]:
+        audio_url = response.headers.get("Location") or PLACEHOLDER_AUDIO_URL
         return {
             "url": audio_url,
             "model": "elevenlabs",
@@ -87,3 +120,96 @@ class ElevenLabsClient:
             "duration_seconds": duration_seconds,
             "description": f"Generated with ElevenLabs voice {voice_id}",
         }
+
+    def generate_audio(
+        self,
+        prompt: str,
+        *,
+        title: str,
+        voice: Optional[str] = None,
+        style: Optional[str] = None,
+        track_type: str = "music",
+        duration_seconds: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Generate an audio track or return a mocked placeholder."""
+
+        if not self._api_key:
+            return self._mock_payload(
+                title=title,
+                voice=voice,
+                style=style,
+                track_type=track_type,
+                duration_seconds=duration_seconds,
+            )
+
+        voice_id, url, payload = self._request(
+            prompt, voice=voice, style=style, duration_seconds=duration_seconds
+        )
+        details = dict(
+            voice_id=voice_id,
+            style=style,
+            track_type=track_type,
+            duration_seconds=duration_seconds,
+        )
+
+        self._limiter.acquire_sync("elevenlabs.tts", model=payload["model_id"])
+        try:
+            response = self._resilience.call(
+                "elevenlabs.tts",
+                lambda: self._http.client.post(
+                    url, headers=self._headers(), json=payload, timeout=self._http.model_timeout
+                ).raise_for_status(),
+            )
+        except (httpx.HTTPError, CircuitOpenError) as exc:  # pragma: no cover - upstream
+            return self._error_payload(exc, **details)
+
+        return self._result_payload(response, **details)
+
+
+class AsyncElevenLabsClient(ElevenLabsClient):
+    """Async flavour of :class:`ElevenLabsClient` on the shared ``httpx.AsyncClient``."""
+
+    async def generate_audio(  # type: ignore[override]
+        self,
+        prompt: str,
+        *,
+        title: str,
+        voice: Optional[str] = None,
+        style: Optional[str] = None,
+        track_type: str = "music",
+        duration_seconds: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Generate an audio track or return a mocked placeholder."""
+
+        if not self._api_key:
+            return self._mock_payload(
+                title=title,
+                voice=voice,
+                style=style,
+                track_type=track_type,
+                duration_seconds=duration_seconds,
+            )
+
+        voice_id, url, payload = self._request(
+            prompt, voice=voice, style=style, duration_seconds=duration_seconds
+        )
+        details = dict(
+            voice_id=voice_id,
+            style=style,
+            track_type=track_type,
+            duration_seconds=duration_seconds,
+        )
+
+        await self._limiter.acquire("elevenlabs.tts", model=payload["model_id"])
+        try:
+            async def post() -> httpx.Response:
+                response = await self._http.async_client.post(
+                    url, headers=self._headers(), json=payload, timeout=self._http.model_timeout
+                )
+                return response.raise_for_status()
+
+            response = await self._resilience.acall("elevenlabs.tts", post)
+        except (httpx.HTTPError, CircuitOpenError) as exc:  # pragma: no cover - upstream
+            return self._error_payload(exc, **details)
+
+        return self._result_payload(response, **details)
@@ -0,0 +1,78 @@
+"""App-lifetime pooled HTTP clients shared by every upstream call."""
+from __future__ import annotations
+
+import importlib.util
+import logging
+from typing import Optional
+
+import httpx
+
+from .config import Settings
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPClients:
+    """One sync and one async ``httpx`` client with keep-alive pools.
+
+    Clients are created on first use (or by :meth:`open` at startup) and
+    reused for the life of the process, so repeated calls to the same
+    upstream skip the TCP and TLS handshake. HTTP/2 is negotiated when
+    enabled and the ``h2`` package is installed; otherwise connections fall
+    back to HTTP/1.1 keep-alive.
+    """
+
+    def __init__(self, settings: Settings):
+        self._settings = settings
+        self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self.http2 = settings.upstream_http2 and importlib.util.find_spec("h2") is not None
+        if settings.upstream_http2 and not self.http2:
+            logger.info("h2 is not installed; upstream calls use HTTP/1.1 keep-alive")
+
+    def _options(self) -> dict:
+        settings = self._settings
+        return {
+            "http2": self.http2,
+            "limits": httpx.Limits(
+                max_connections=settings.upstream_max_connections,
+                max_keepalive_connections=settings.upstream_max_keepalive_connections,
+                keepalive_expiry=settings.upstream_keepalive_expiry_seconds,
+            ),
+            "timeout": httpx.Timeout(
+                settings.upstream_timeout_seconds,
+                connect=settings.upstream_connect_timeout_seconds,
+            ),
+            "follow_redirects": True,
+        }
+
+    @property
+    def model_timeout(self) -> httpx.Timeout:
+        """Timeout for generation calls; the pool default suits proxy and storage traffic."""
+
+        return httpx.Timeout(
+            self._settings.model_timeout_seconds,
+            connect=self._settings.upstream_connect_timeout_seconds,
+        )
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.Client(**self._options())
+        return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        if self._async_client is None or self._async_client.is_closed:
+            self._async_client = httpx.AsyncClient(**self._options())
+        return self._async_client
+
+    def open(self) -> None:
+        self.client
+        self.async_client
+
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.aclose()
+        if self._client is not None:
+            self._client.close()
@@ -0,0 +1,168 @@
+"""``Idempotency-Key`` support for expensive generation endpoints."""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import delete, or_, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from .database import IdempotencyRecord, session_scope
+
+PENDING = "pending"
+COMPLETED = "completed"
+# Slack on top of the slowest handler's upstream budget before a pending
+# claim is assumed to belong to a crashed worker.
+PENDING_LEASE_MARGIN_SECONDS = 60
+REPLAY_HEADER = "Idempotent-Replayed"
+
+
+def request_fingerprint(endpoint: str, payload: BaseModel) -> str:
+    body = json.dumps(payload.model_dump(mode="json"), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{endpoint}\0{body}".encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore:
+    """Claims, waits on and replays requests by ``(endpoint, Idempotency-Key)``.
+
+    The first request inserts a ``pending`` row and runs the handler; its
+    response is stored in the same transaction as the handler's own writes.
+    Repeats replay that response, concurrent duplicates poll until it exists,
+    and a key reused with a different body is rejected. Failed requests
+    release their claim so the client can retry with the same key.
+    """
+
+    def __init__(self, *, ttl_seconds: int, wait_seconds: float, pending_lease_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.wait_seconds = wait_seconds
+        self.pending_lease_seconds = pending_lease_seconds
+
+    async def run(
+        self,
+        endpoint: str,
+        key: Optional[str],
+        payload: BaseModel,
+        db: Session,
+        handler: Callable[[], Awaitable[BaseModel]],
+        *,
+        status_code: int = status.HTTP_200_OK,
+    ):
+        if not key:
+            return await handler()
+
+        fingerprint = request_fingerprint(endpoint, payload)
+        deadline = asyncio.get_running_loop().time() + self.wait_seconds
+        delay = 0.1
+        while True:
+            record = await run_in_threadpool(self._claim, endpoint, key, fingerprint)
+            if record is None:
+                break
+            if record["fingerprint"] != fingerprint:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key was already used with a different request body",
+                )
+            if record["status"] == COMPLETED:
+                return JSONResponse(
+                    json.loads(record["response_json"]),
+                    status_code=record["status_code"],
+                    headers={REPLAY_HEADER: "true"},
+                )
+            if asyncio.get_running_loop().time() >= deadline:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is still in progress",
+                )
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 1.0)
+
+        try:
+            result = await handler()
+        except BaseException:
+            await run_in_threadpool(self._release, endpoint, key)
+            raise
+
+        body = result.model_dump(mode="json")
+
+        def _complete() -> None:
+            # One commit covers the handler's rows and the response that refers to them.
+            db.execute(
+                update(IdempotencyRecord)
+                .where(
+                    IdempotencyRecord.endpoint == endpoint,
+                    IdempotencyRecord.key == key,
+                    IdempotencyRecord.fingerprint == fingerprint,
+                )
+                .values(
+                    status=COMPLETED,
+                    status_code=status_code,
+                    response_json=json.dumps(body),
+                    updated_at=datetime.utcnow(),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+
+        await run_in_threadpool(_complete)
+        return JSONResponse(body, status_code=status_code)
+
+    def _claim(self, endpoint: str, key: str, fingerprint: str) -> Optional[dict[str, Any]]:
+        """Insert a pending claim; return the existing record if someone holds one."""
+
+        now = datetime.utcnow()
+        table = IdempotencyRecord.__table__
+        with session_scope() as session:
+            session.execute(
+                delete(table).where(
+                    or_(
+                        table.c.expires_at <= now,
+                        (table.c.status == PENDING)
+                        & (
+                            table.c.created_at
+                            <= now - timedelta(seconds=self.pending_lease_seconds)
+                        ),
+                    )
+                )
+            )
+            inserted = session.execute(
+                insert(table)
+                .values(
+                    endpoint=endpoint,
+                    key=key,
+                    fingerprint=fingerprint,
+                    status=PENDING,
+                    expires_at=now + timedelta(seconds=self.ttl_seconds),
+                    created_at=now,
+                    updated_at=now,
+                )
+                .on_conflict_do_nothing()
+            ).rowcount
+            if inserted:
+                return None
+            record = session.get(IdempotencyRecord, (endpoint, key))
+            if record is None:  # pragma: no cover - removed between statements
+                return None
+            return {
+                "fingerprint": record.fingerprint,
+                "status": record.status,
+                "status_code": record.status_code,
+                "response_json": record.response_json,
+            }
+
+    def _release(self, endpoint: str, key: str) -> None:
+        with session_scope() as session:
+            session.execute(
+                delete(IdempotencyRecord).where(
+                    IdempotencyRecord.endpoint == endpoint,
+                    IdempotencyRecord.key == key,
+                    IdempotencyRecord.status == PENDING,
+                )
+            )
@@ -0,0 +1,332 @@
+"""Background tracking for long-running Sora video renders."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Optional
+
+from sqlalchemy import event, or_, update
+from sqlalchemy.orm import Session
+
+from .database import GalleryAsset, GenerationJob, session_scope
+from .openai_client import AsyncOpenAIMegaClient
+
+logger = logging.getLogger(__name__)
+
+PENDING_STATUSES = {"queued", "in_progress"}
+MAX_POLL_BACKOFF = timedelta(minutes=5)
+# Long enough to cover one batched status check including its retries.
+LEASE_DURATION = timedelta(minutes=2)
+# How often subscribers re-read the job, to hear about changes made by other workers.
+SUBSCRIBE_RECHECK_SECONDS = 2.0
+
+
+def _snapshot(job: GenerationJob) -> dict[str, Any]:
+    return {
+        "id": job.id,
+        "asset_id": job.asset_id,
+        "video_id": job.upstream_id,
+        "status": job.status,
+        "progress": job.progress,
+        "attempts": job.attempts,
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+    }
+
+
+class VideoJobManager:
+    """Single shared poller for every pending Sora render.
+
+    Jobs live in the ``generation_jobs`` table, so renders that were still
+    pending when the process stopped are picked up again by :meth:`resume`.
+    One background task wakes when jobs are due, checks them in one batch and
+    writes finished renders back to their ``GalleryAsset`` rows. Every worker
+    process runs its own poller, so due jobs are first leased to this one
+    with a single ``UPDATE … RETURNING``; jobs leased elsewhere are skipped
+    until their lease is released or expires. Subscribers receive a snapshot
+    whenever a job changes, whichever process changed it.
+    """
+
+    def __init__(
+        self,
+        client: AsyncOpenAIMegaClient,
+        *,
+        poll_interval: float = 5.0,
+        timeout: float = 1800.0,
+    ):
+        self._client = client
+        self.owner = uuid.uuid4().hex
+        self._poll_interval = timedelta(seconds=poll_interval)
+        self._timeout = timedelta(seconds=timeout)
+        self._listeners: dict[str, set[asyncio.Queue]] = {}
+        self._wakeup = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._loop = asyncio.get_running_loop()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def resume(self) -> int:
+        """Make every unfinished job due immediately; returns how many were found."""
+
+        with session_scope() as session:
+            jobs = (
+                session.query(GenerationJob)
+                .filter(GenerationJob.status.in_(PENDING_STATUSES))
+                .all()
+            )
+            now = datetime.utcnow()
+            for job in jobs:
+                job.next_poll_at = now
+        if jobs:
+            logger.info(f"Resuming {len(jobs)} pending video job(s)")
+            self._wake()
+        return len(jobs)
+
+    def submit(
+        self, *, asset_id: int, video_id: str, session: Optional[Session] = None
+    ) -> dict[str, Any]:
+        """Record a pending render; with ``session`` it joins the caller's transaction.
+
+        A job added to ``session`` is only visible once the caller commits, so
+        the poller is woken from the ``after_commit`` hook set up by :meth:`watch`.
+        """
+
+        job = GenerationJob(
+            id=uuid.uuid4().hex,
+            kind="video",
+            asset_id=asset_id,
+            upstream_id=video_id,
+            status="queued",
+            progress=0,
+            attempts=0,
+            next_poll_at=datetime.utcnow() + self._poll_interval,
+        )
+        if session is not None:
+            session.add(job)
+            session.flush()
+            session.info["video_jobs_submitted"] = True
+            return _snapshot(job)
+        with session_scope() as own_session:
+            own_session.add(job)
+            own_session.flush()
+            snapshot = _snapshot(job)
+        self._wake()
+        return snapshot
+
+    def watch(self, session_factory) -> None:
+        """Wake the poller when a session that submitted jobs commits."""
+
+        @event.listens_for(session_factory, "after_commit")
+        def _wake_after_commit(session) -> None:
+            if session.info.pop("video_jobs_submitted", False):
+                self._wake()
+
+        @event.listens_for(session_factory, "after_rollback")
+        def _discard(session) -> None:
+            session.info.pop("video_jobs_submitted", None)
+
+    def get(self, job_id: str) -> Optional[dict[str, Any]]:
+        with session_scope() as session:
+            job = session.get(GenerationJob, job_id)
+            return _snapshot(job) if job is not None else None
+
+    async def subscribe(self, job_id: str) -> AsyncIterator[dict[str, Any]]:
+        """Yield job snapshots until the job reaches a terminal status.
+
+        Changes made by this process's poller arrive immediately; the row is
+        also re-read every few seconds, since another worker may hold the
+        job's lease and finish it.
+        """
+
+        queue: asyncio.Queue = asyncio.Queue()
+        self._listeners.setdefault(job_id, set()).add(queue)
+        try:
+            snapshot = await asyncio.to_thread(self.get, job_id)
+            last = None
+            while snapshot is not None:
+                if snapshot != last:
+                    yield snapshot
+                    last = snapshot
+                if snapshot["status"] not in PENDING_STATUSES:
+                    return
+                try:
+                    snapshot = await asyncio.wait_for(
+                        queue.get(), timeout=SUBSCRIBE_RECHECK_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    snapshot = await asyncio.to_thread(self.get, job_id)
+        finally:
+            listeners = self._listeners.get(job_id)
+            if listeners is not None:
+                listeners.discard(queue)
+                if not listeners:
+                    self._listeners.pop(job_id, None)
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                delay = await self._poll_due()
+            except Exception:  # pragma: no cover - keep the poller alive
+                logger.exception("Video job poll failed")
+                delay = self._poll_interval.total_seconds()
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _wake(self) -> None:
+        # ``submit`` is called from request threads; asyncio.Event is not thread-safe.
+        if self._loop is not None and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        else:
+            self._wakeup.set()
+
+    async def _poll_due(self) -> Optional[float]:
+        """Poll every due job; return seconds until the next one is due."""
+
+        # Database work runs in worker threads so a busy SQLite lock never
+        # stalls the event loop.
+        due = await asyncio.to_thread(self._claim_due_jobs)
+        if due:
+            statuses = await self._client.fetch_video_statuses(
+                upstream_id for _, upstream_id in due
+            )
+            for job_id, upstream_id in due:
+                snapshot = await asyncio.to_thread(self._apply, job_id, statuses.get(upstream_id))
+                if snapshot is not None:
+                    self._notify(job_id, snapshot)
+        return await asyncio.to_thread(self._next_delay)
+
+    def _claim_due_jobs(self) -> list[tuple[str, str]]:
+        """Lease every due job no other poller holds; return ``(id, upstream_id)`` pairs."""
+
+        now = datetime.utcnow()
+        with session_scope() as session:
+            rows = session.execute(
+                update(GenerationJob)
+                .where(
+                    GenerationJob.status.in_(PENDING_STATUSES),
+                    GenerationJob.next_poll_at <= now,
+                    or_(GenerationJob.lease_until.is_(None), GenerationJob.lease_until < now),
+                )
+                .values(lease_owner=self.owner, lease_until=now + LEASE_DURATION)
+                .returning(GenerationJob.id, GenerationJob.upstream_id)
+                .execution_options(synchronize_session=False)
+            ).all()
+        return [(row.id, row.upstream_id) for row in rows]
+
+    @staticmethod
+    def _next_delay() -> Optional[float]:
+        now = datetime.utcnow()
+        with session_scope() as session:
+            rows = (
+                session.query(GenerationJob.next_poll_at, GenerationJob.lease_until)
+                .filter(GenerationJob.status.in_(PENDING_STATUSES))
+                .all()
+            )
+        if not rows:
+            return None
+        # A job leased by another poller is not due before its lease runs out.
+        next_due = min(
+            max(next_poll_at or now, lease_until or now) for next_poll_at, lease_until in rows
+        )
+        return max(0.0, (next_due - now).total_seconds())
+
+    def _apply(
+        self, job_id: str, status_data: Optional[dict[str, Any]]
+    ) -> Optional[dict[str, Any]]:
+        now = datetime.utcnow()
+        with session_scope() as session:
+            job = session.get(GenerationJob, job_id)
+            if job is None or job.lease_owner != self.owner:
+                # Deleted, or the lease expired and another poller took the job over.
+                return None
+            job.lease_owner = None
+            job.lease_until = None
+            if job.status not in PENDING_STATUSES:
+                return None
+            job.attempts += 1
+            expired = now - job.created_at > self._timeout
+
+            if status_data is None:
+                # Status check failed: back off exponentially before retrying.
+                if expired:
+                    self._finish(session, job, "failed", error="Timed out waiting for the render")
+                else:
+                    backoff = self._poll_interval * 2 ** min(job.attempts, 6)
+                    job.next_poll_at = now + min(backoff, MAX_POLL_BACKOFF)
+            else:
+                status = status_data.get("status") or job.status
+                progress = status_data.get("progress")
+                if isinstance(progress, (int, float)):
+                    job.progress = int(progress)
+
+                if status == "completed":
+                    self._finish(session, job, "completed", status_data=status_data)
+                elif status == "failed":
+                    error = status_data.get("error") or "Unknown error"
+                    self._finish(session, job, "failed", error=str(error))
+                elif expired:
+                    self._finish(session, job, "failed", error="Timed out waiting for the render")
+                else:
+                    job.status = status if status in PENDING_STATUSES else "in_progress"
+                    job.next_poll_at = now + self._poll_interval
+
+            job.updated_at = now
+            session.flush()
+            return _snapshot(job)
+
+    @staticmethod
+    def _finish(
+        session,
+        job: GenerationJob,
+        status: str,
+        *,
+        error: Optional[str] = None,
+        status_data: Optional[dict[str, Any]] = None,
+    ) -> None:
+        status_data = status_data or {}
+        job.status = status
+        job.error = error
+        job.next_poll_at = None
+        if status == "completed":
+            job.progress = 100
+
+        asset = session.get(GalleryAsset, job.asset_id) if job.asset_id else None
+        if asset is None:
+            return
+        metadata = json.loads(asset.metadata_json) if asset.metadata_json else {}
+        metadata["status"] = status
+        if status == "completed":
+            metadata["thumbnail_url"] = status_data.get(
+                "thumbnail_url", "https://placehold.co/640x360?text=Video+Ready"
+            )
+            if status_data.get("revised_prompt"):
+                metadata["revised_prompt"] = status_data["revised_prompt"]
+        else:
+            metadata["error"] = error
+            metadata["thumbnail_url"] = "https://placehold.co/640x360?text=API+Error"
+        asset.metadata_json = json.dumps(metadata)
+        asset.updated_at = datetime.utcnow()
+
+    def _notify(self, job_id: str, snapshot: dict[str, Any]) -> None:
+        for queue in self._listeners.get(job_id, ()):
+            queue.put_nowait(snapshot)
@@ -1,20 +1,51 @@
 """FastAPI entrypoint for the OpenAI Mega App."""
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Callable, Generator
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Callable, Generator, Literal
 
 import json
+import math
 import textwrap
+import time
+from pathlib import Path
 
+import anyio
 import httpx
-from fastapi import Depends, FastAPI, HTTPException, Request, status
-from fastapi.responses import HTMLResponse, StreamingResponse
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, status
+from fastapi.responses import (
+    HTMLResponse,
+    JSONResponse,
+    RedirectResponse,
+    Response,
+    StreamingResponse,
+)
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from sqlalchemy import func
-
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import or_, select, tuple_
+from sqlalchemy.orm.attributes import set_committed_value
+
+from .blobs import (
+    BLOB_HASH_PATTERN,
+    CHUNK_SIZE,
+    IMMUTABLE_CACHE_CONTROL,
+    SNIFF_BYTES,
+    decode_data_url,
+    media_url,
+    migrate_data_urls,
+    range_file_response,
+    sniff_media_type,
+)
+from .catalog import (
+    CATALOG_TABLES,
+    CATALOG_VERSION,
+    CatalogCache,
+    read_catalog_counters,
+    refresh_catalog_counters,
+)
 from .config import BASE_DIR, get_settings
+from .context import HistoryCache, plan_context
 from .database import (
     Agent,
     AudioTrack,
@@ -23,13 +54,30 @@ from .database import (
     Conversation,
     Gallery,
     GalleryAsset,
+    GalleryAssetLink,
     Message,
+    SessionLocal,
     WorkspaceWidget,
     init_db,
     session_scope,
 )
-from .elevenlabs_client import ElevenLabsClient
-from .openai_client import OpenAIMegaClient
+from .dedupe import DuplicateIndex, dhash_bytes
+from .derivatives import DerivativeWorker
+from .elevenlabs_client import AsyncElevenLabsClient
+from .http_clients import HTTPClients
+from .idempotency import PENDING_LEASE_MARGIN_SECONDS, IdempotencyStore
+from .jobs import PENDING_STATUSES, VideoJobManager
+from .openai_client import AsyncOpenAIMegaClient
+from .queries import (
+    asset_membership_options,
+    conversation_summary_options,
+    gallery_assets_query,
+    gallery_options,
+    load_gallery,
+)
+from .ratelimit import RateLimiter, UpstreamBusyError
+from .resilience import Resilience
+from .response_cache import CACHE_BYPASS, CACHE_DEFAULT, ResponseCache, cache_mode
 from .schemas import (
     AgentBuildRequest,
     AgentBuildResponse,
@@ -61,6 +109,7 @@ from .schemas import (
     DocumentDraftRequest,
     DocumentDraftResponse,
     DocumentSection,
+    DuplicateMatch,
     GalleryAssetAssignment,
     GalleryAssetCreate,
     GalleryAssetRead,
@@ -87,6 +136,10 @@ from .schemas import (
     SimulationRunResponse,
     StudioRenderRequest,
     StudioRenderResponse,
+    UsageModelTotals,
+    UsageReport,
+    UsageRollupRead,
+    VideoJobRead,
     VideoRequest,
     VideoResponse,
     WhiteboardSummaryRequest,
@@ -96,10 +149,54 @@ from .schemas import (
     WorkspaceWidgetSummary,
     WorkspaceWidgetUpdate,
 )
+from .storage import create_media_store
+from .uploads import MultipartError, MultipartReader, blocking_chunks, parse_boundary
+from .usage import read_usage, read_usage_totals, usage_counts
+from .video_cache import VideoCache
 
 settings = get_settings()
-openai_client = OpenAIMegaClient(settings=settings)
-elevenlabs_client = ElevenLabsClient(settings=settings)
+http_clients = HTTPClients(settings)
+resilience = Resilience(settings)
+rate_limiter = RateLimiter(settings)
+openai_client = AsyncOpenAIMegaClient(
+    settings=settings, http=http_clients, resilience=resilience, limiter=rate_limiter
+)
+elevenlabs_client = AsyncElevenLabsClient(
+    settings=settings, http=http_clients, resilience=resilience, limiter=rate_limiter
+)
+catalog_cache = CatalogCache()
+history_cache = HistoryCache(settings.history_cache_bytes)
+history_cache.watch(SessionLocal)
+idempotency = IdempotencyStore(
+    ttl_seconds=settings.idempotency_ttl_seconds,
+    wait_seconds=settings.idempotency_wait_seconds,
+    # A live handler may queue for admission, then spend every attempt on the model timeout.
+    pending_lease_seconds=settings.rate_limit_max_wait_seconds
+    + settings.upstream_retry_attempts
+    * (
+        settings.upstream_connect_timeout_seconds
+        + settings.model_timeout_seconds
+        + settings.upstream_retry_max_delay_seconds
+    )
+    + PENDING_LEASE_MARGIN_SECONDS,
+)
+response_cache = ResponseCache(
+    ttl_seconds=settings.response_cache_ttl_seconds,
+    memory_entries=settings.response_cache_memory_entries,
+    disk_entries=settings.response_cache_disk_entries,
+)
+media_store = create_media_store(settings, http_clients)
+duplicate_index = DuplicateIndex()
+derivative_worker = DerivativeWorker(media_store, settings, duplicate_index)
+video_cache = VideoCache(settings.media_root / "video-cache", settings.video_cache_bytes)
+# Finished renders never change, but OpenAI expires them, so browsers revalidate daily.
+VIDEO_CACHE_CONTROL = "private, max-age=86400"
+video_jobs = VideoJobManager(
+    openai_client,
+    poll_interval=settings.video_poll_interval_seconds,
+    timeout=settings.video_job_timeout_seconds,
+)
+video_jobs.watch(SessionLocal)
 app = FastAPI(title="OpenAI Mega App", version="1.0.0")
 
 
@@ -207,32 +304,85 @@ def ensure_default_code_project(db) -> CodeProject:
     return project
 
 
-def ai_structured_response(
+IDEMPOTENCY_KEY_HEADER = Header(default=None, alias="Idempotency-Key", max_length=255)
+
+
+def response_cache_mode(request: Request) -> str:
+    """Per-request cache policy from ``X-Response-Cache`` or ``Cache-Control``."""
+
+    return cache_mode(
+        request.headers.get("cache-control"), request.headers.get("x-response-cache")
+    )
+
+
+async def ai_structured_response(
     system_prompt: str,
     user_prompt: str,
     fallback: Callable[[], dict],
     *,
     model: str = "gpt-4.1-mini",
+    cache: str = CACHE_DEFAULT,
 ) -> tuple[dict, str]:
-    """Call OpenAI for structured JSON responses, falling back to local data."""
+    """Call OpenAI for structured JSON responses, falling back to local data.
+
+    Parsed responses are cached by model and prompt hashes; ``cache`` is
+    ``refresh`` to skip the lookup or ``bypass`` to skip the cache entirely.
+    Fallback data is never cached.
+    """
 
     if not openai_client.is_live:
         data = fallback()
         return data, "offline-simulated"
 
-    response = openai_client.structured_chat(system_prompt, user_prompt, model=model)
+    key = response_cache.key(model, system_prompt, user_prompt)
+    if response_cache.enabled and cache == CACHE_DEFAULT:
+        cached = response_cache.get_memory(key)
+        if cached is None:
+            cached = await run_in_threadpool(response_cache.get_disk, key)
+        if cached is not None:
+            return cached["data"], cached["model"]
+    elif cache != CACHE_DEFAULT:
+        response_cache.bypasses += 1
+
+    response = await openai_client.structured_chat(system_prompt, user_prompt, model=model)
     content = response.get("content", "")
+    model_used = response.get("model", model)
     try:
         data = json.loads(content)
     except json.JSONDecodeError:
-        data = fallback()
-    model_used = response.get("model", model)
+        return fallback(), model_used
+    if response_cache.enabled and cache != CACHE_BYPASS:
+        await run_in_threadpool(
+            response_cache.put, key, model, {"data": data, "model": model_used}
+        )
     return data, model_used
 
 
+@app.exception_handler(UpstreamBusyError)
+async def upstream_busy_handler(request: Request, exc: UpstreamBusyError) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+    )
+
+
 @app.on_event("startup")
-def on_startup() -> None:
+async def on_startup() -> None:
+    http_clients.open()
     init_db()
+    refresh_catalog_counters()
+    migrate_data_urls(media_store)
+    derivative_worker.backfill()
+    video_jobs.resume()
+    video_jobs.start()
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    await video_jobs.stop()
+    derivative_worker.shutdown()
+    await http_clients.aclose()
 
 
 app.mount(
@@ -249,6 +399,33 @@ def index(request: Request) -> HTMLResponse:
     return templates.TemplateResponse("index.html", {"request": request})
 
 
+@app.get("/media/{blob_hash}")
+def get_media(blob_hash: str, request: Request):
+    """Serve an immutable blob by its SHA-256 digest.
+
+    Backends with direct URLs (an S3-compatible bucket) get a redirect so the
+    bytes are downloaded from the object store rather than through the app.
+    """
+
+    if not BLOB_HASH_PATTERN.match(blob_hash):
+        raise HTTPException(status_code=404, detail="Media not found")
+    direct_url = media_store.direct_url(blob_hash)
+    if direct_url is not None:
+        # Let browsers reuse the redirect while the presigned URL is still valid.
+        max_age = settings.s3_presign_expiry_seconds // 2
+        return RedirectResponse(
+            direct_url,
+            status_code=status.HTTP_307_TEMPORARY_REDIRECT,
+            headers={"Cache-Control": f"private, max-age={max_age}"},
+        )
+    return range_file_response(
+        request,
+        media_store.path_for(blob_hash),
+        etag=blob_hash,
+        cache_control=IMMUTABLE_CACHE_CONTROL,
+    )
+
+
 @app.get("/api/conversations", response_model=list[ConversationRead])
 def list_conversations(db=Depends(get_db)):
     conversations = db.query(Conversation).order_by(Conversation.updated_at.desc()).all()
@@ -302,66 +479,338 @@ def delete_conversation(conversation_id: int, db=Depends(get_db)):
     return None
 
 
+MESSAGE_PAGE_MAX = 500
+MESSAGE_STREAM_BATCH = 200
+
+
+def _message_page_cursor(db, conversation_id: int, before_id: int | None, limit: int):
+    """Return the oldest id of the page when older messages remain, else ``None``.
+
+    Probes ``ix_messages_conversation_id`` for the ``limit``-th and
+    ``limit + 1``-th newest ids so the page itself can be read as a plain
+    ascending range.
+    """
+
+    query = db.query(Message.id).filter(Message.conversation_id == conversation_id)
+    if before_id is not None:
+        query = query.filter(Message.id < before_id)
+    ids = [
+        row.id
+        for row in query.order_by(Message.id.desc()).offset(limit - 1).limit(2)
+    ]
+    return ids[0] if len(ids) == 2 else None
+
+
+def _stream_messages(statement) -> Generator[str, None, None]:
+    # Runs in the threadpool with its own session so rows are serialized
+    # while the cursor advances instead of being collected first.
+    with session_scope() as session:
+        rows = session.scalars(statement.execution_options(yield_per=MESSAGE_STREAM_BATCH))
+        for message in rows:
+            yield MessageRead.model_validate(message).model_dump_json() + "\n"
+
+
 @app.get(
     "/api/conversations/{conversation_id}/messages",
     response_model=list[MessageRead],
 )
-def list_messages(conversation_id: int, db=Depends(get_db)):
-    conversation = db.get(Conversation, conversation_id)
-    if conversation is None:
+def list_messages(
+    conversation_id: int,
+    before_id: int | None = None,
+    limit: int | None = Query(default=None, ge=1, le=MESSAGE_PAGE_MAX),
+    format: Literal["json", "ndjson"] = "json",
+    db=Depends(get_db),
+):
+    """List a conversation's messages oldest first.
+
+    Without ``limit`` the whole thread is returned. With it, only the newest
+    ``limit`` messages older than ``before_id`` are, and ``X-Next-Cursor``
+    holds the ``before_id`` of the next older page. ``format=ndjson`` streams
+    one message per line from a server-side cursor.
+    """
+
+    if db.get(Conversation, conversation_id) is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
-    return conversation.messages
+
+    statement = select(Message).where(Message.conversation_id == conversation_id)
+    if before_id is not None:
+        statement = statement.where(Message.id < before_id)
+    headers = {}
+    if limit is not None:
+        cursor = _message_page_cursor(db, conversation_id, before_id, limit)
+        if cursor is not None:
+            statement = statement.where(Message.id >= cursor)
+            headers["X-Next-Cursor"] = str(cursor)
+    statement = statement.order_by(Message.id)
+
+    if format == "ndjson":
+        return StreamingResponse(
+            _stream_messages(statement), media_type="application/x-ndjson", headers=headers
+        )
+    items = [
+        MessageRead.model_validate(message).model_dump(mode="json")
+        for message in db.scalars(statement)
+    ]
+    return JSONResponse(items, headers=headers)
+
+
+def _unsummarized_turns(db, conversation: Conversation) -> list[dict[str, Any]]:
+    """Messages newer than the conversation's rolling summary, oldest first.
+
+    Served from ``history_cache`` so a hot conversation only reads the rows
+    added since its previous turn.
+    """
+
+    def fetch(after_id: int):
+        return (
+            db.query(Message.id, Message.role, Message.content)
+            .filter(Message.conversation_id == conversation.id, Message.id > after_id)
+            .order_by(Message.id.asc())
+            .all()
+        )
+
+    return history_cache.load(conversation.id, conversation.summary_through_id, fetch)
+
+
+async def _context_history(
+    db, conversation: Conversation, turns: list[dict[str, Any]]
+) -> list[dict[str, str]]:
+    """Fit ``turns`` into the token budget, folding older turns into the summary."""
+
+    window = plan_context(conversation.summary, turns, budget=settings.context_token_budget)
+    if not window.evicted:
+        return window.history()
+
+    summary = await openai_client.summarize_conversation(
+        conversation.summary,
+        window.evicted,
+        max_tokens=settings.context_summary_max_tokens,
+    )
+
+    def _store_summary() -> None:
+        conversation.summary = summary
+        conversation.summary_through_id = window.summarized_through_id
+        db.commit()
+
+    await run_in_threadpool(_store_summary)
+    return window.history(summary)
 
 
 @app.post(
     "/api/conversations/{conversation_id}/messages",
     response_model=OpenAIResponse,
 )
-def send_message(conversation_id: int, payload: MessageCreate, db=Depends(get_db)):
-    conversation = db.get(Conversation, conversation_id)
-    if conversation is None:
-        raise HTTPException(status_code=404, detail="Conversation not found")
+async def send_message(conversation_id: int, payload: MessageCreate, db=Depends(get_db)):
+    def _store_user_message() -> tuple[Conversation, Message, list[dict[str, Any]]]:
+        conversation = db.get(Conversation, conversation_id)
+        if conversation is None:
+            raise HTTPException(status_code=404, detail="Conversation not found")
+
+        user_message = Message(
+            conversation_id=conversation_id,
+            role="user",
+            content=payload.content,
+            model=payload.model,
+        )
+        db.add(user_message)
+        db.flush()
+        db.refresh(user_message)
+        # Release the SQLite write lock before waiting on the model.
+        db.commit()
+        return conversation, user_message, _unsummarized_turns(db, conversation)
+
+    conversation, user_message, turns = await run_in_threadpool(_store_user_message)
+    history = await _context_history(db, conversation, turns)
+    started = time.perf_counter()
+    assistant_payload = await openai_client.chat(history, model=payload.model)
+    latency_ms = round((time.perf_counter() - started) * 1000)
+
+    def _store_assistant_message() -> OpenAIResponse:
+        assistant_message = Message(
+            conversation_id=conversation_id,
+            role="assistant",
+            content=assistant_payload["content"],
+            model=assistant_payload["model"],
+            latency_ms=latency_ms,
+            **usage_counts(assistant_payload.get("usage")),
+        )
+        conversation.updated_at = datetime.utcnow()
+        db.add(assistant_message)
+        db.flush()
+        db.refresh(assistant_message)
 
-    user_message = Message(
-        conversation_id=conversation_id,
-        role="user",
-        content=payload.content,
-        model=payload.model,
-    )
-    db.add(user_message)
-    db.flush()
-    db.refresh(user_message)
+        db.refresh(conversation)
 
-    history = (
-        [{"role": message.role, "content": message.content} for message in conversation.messages]
-        + [{"role": "user", "content": payload.content}]
-    )
-    assistant_payload = openai_client.chat(history, model=payload.model)
-    assistant_message = Message(
-        conversation_id=conversation_id,
-        role="assistant",
-        content=assistant_payload["content"],
-        model=assistant_payload["model"],
-        token_usage=str(assistant_payload.get("usage", {})),
-    )
-    conversation.updated_at = datetime.utcnow()
-    db.add(assistant_message)
-    db.flush()
-    db.refresh(assistant_message)
+        return OpenAIResponse(
+            conversation=ConversationRead.model_validate(conversation),
+            user_message=MessageRead.model_validate(user_message),
+            assistant_message=MessageRead.model_validate(assistant_message),
+        )
 
-    db.refresh(conversation)
+    return await run_in_threadpool(_store_assistant_message)
+
+
+def _sse_event(event: str, data: dict) -> str:
+    """Encode a single Server-Sent Events frame."""
+
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@app.post("/api/conversations/{conversation_id}/messages/stream")
+async def stream_message(conversation_id: int, payload: MessageCreate, db=Depends(get_db)):
+    """Stream the assistant reply over SSE, persisting it once the stream ends.
+
+    Emits ``user_message`` straight away, one ``delta`` per token chunk and a
+    final ``done`` event carrying the same body as ``send_message``.
+    """
 
-    return OpenAIResponse(
-        conversation=ConversationRead.model_validate(conversation),
-        user_message=MessageRead.model_validate(user_message),
-        assistant_message=MessageRead.model_validate(assistant_message),
+    def _store_user_message() -> tuple[Conversation, MessageRead, list[dict[str, Any]]]:
+        conversation = db.get(Conversation, conversation_id)
+        if conversation is None:
+            raise HTTPException(status_code=404, detail="Conversation not found")
+
+        user_message = Message(
+            conversation_id=conversation_id,
+            role="user",
+            content=payload.content,
+            model=payload.model,
+        )
+        db.add(user_message)
+        conversation.updated_at = datetime.utcnow()
+        db.flush()
+        db.refresh(user_message)
+        # Release the SQLite write lock before waiting on the summary and the model.
+        db.commit()
+        turns = _unsummarized_turns(db, conversation)
+        return conversation, MessageRead.model_validate(user_message), turns
+
+    conversation, user_read, turns = await run_in_threadpool(_store_user_message)
+    history = await _context_history(db, conversation, turns)
+
+    async def event_stream() -> AsyncIterator[str]:
+        yield _sse_event("user_message", user_read.model_dump(mode="json"))
+
+        assistant_payload: dict = {}
+        started = time.perf_counter()
+        async for event in openai_client.stream_chat(history, model=payload.model):
+            if event["type"] == "delta":
+                yield _sse_event("delta", {"delta": event["delta"]})
+            elif event["type"] == "completed":
+                assistant_payload = event
+        latency_ms = round((time.perf_counter() - started) * 1000)
+
+        def _store_assistant_message() -> OpenAIResponse | None:
+            # The request-scoped session is already closed once the body streams.
+            with session_scope() as session:
+                stored_conversation = session.get(Conversation, conversation_id)
+                if stored_conversation is None:
+                    return None
+                assistant_message = Message(
+                    conversation_id=conversation_id,
+                    role="assistant",
+                    content=assistant_payload.get("content", ""),
+                    model=assistant_payload.get("model", payload.model),
+                    latency_ms=latency_ms,
+                    **usage_counts(assistant_payload.get("usage")),
+                )
+                stored_conversation.updated_at = datetime.utcnow()
+                session.add(assistant_message)
+                session.flush()
+                session.refresh(assistant_message)
+                session.refresh(stored_conversation)
+                return OpenAIResponse(
+                    conversation=ConversationRead.model_validate(stored_conversation),
+                    user_message=user_read,
+                    assistant_message=MessageRead.model_validate(assistant_message),
+                )
+
+        result = await run_in_threadpool(_store_assistant_message)
+        if result is None:
+            yield _sse_event("error", {"detail": "Conversation not found"})
+            return
+        yield _sse_event("done", result.model_dump(mode="json"))
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
+GALLERY_PAGE_DEFAULT = 60
+GALLERY_PAGE_MAX = 200
+
+
+def _parse_gallery_cursor(before: str) -> tuple[datetime, int]:
+    """Split a ``<created_at ISO>,<id>`` keyset cursor."""
+
+    created_at, _, asset_id = before.rpartition(",")
+    try:
+        return datetime.fromisoformat(created_at), int(asset_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="before must look like <created_at>,<id>",
+        )
+
+
+def _parse_fields(fields: str | None, allowed: set[str]) -> set[str] | None:
+    if not fields:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - allowed
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+        )
+    return requested | {"id"}
+
+
 @app.get("/api/gallery", response_model=list[GalleryAssetRead])
-def get_gallery(db=Depends(get_db)):
-    assets = db.query(GalleryAsset).order_by(GalleryAsset.created_at.desc()).all()
-    return assets
+def get_gallery(
+    before: str | None = None,
+    limit: int = Query(default=GALLERY_PAGE_DEFAULT, ge=1, le=GALLERY_PAGE_MAX),
+    fields: str | None = None,
+    db=Depends(get_db),
+):
+    """List assets newest first, one keyset page at a time.
+
+    ``before`` is the ``X-Next-Cursor`` value of the previous page and
+    ``fields`` a comma-separated projection of ``GalleryAssetRead`` fields.
+    """
+
+    include = _parse_fields(fields, set(GalleryAssetRead.model_fields))
+    query = db.query(GalleryAsset)
+    if include is None or "gallery_ids" in include:
+        query = query.options(*asset_membership_options())
+    if before:
+        cursor_created_at, cursor_id = _parse_gallery_cursor(before)
+        # Row-value comparison lets SQLite seek ix_gallery_assets_created_id.
+        query = query.filter(
+            tuple_(GalleryAsset.created_at, GalleryAsset.id)
+            < tuple_(cursor_created_at, cursor_id)
+        )
+    assets = (
+        query.order_by(GalleryAsset.created_at.desc(), GalleryAsset.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+
+    headers = {}
+    if len(assets) > limit:
+        assets = assets[:limit]
+        last = assets[-1]
+        headers["X-Next-Cursor"] = f"{last.created_at.isoformat()},{last.id}"
+
+    items = []
+    for asset in assets:
+        if include is not None and "gallery_ids" not in include:
+            # Skip the membership lookup the projection does not need.
+            set_committed_value(asset, "galleries", [])
+        item = GalleryAssetRead.model_validate(asset)
+        items.append(item.model_dump(mode="json", include=include))
+    return JSONResponse(items, headers=headers)
 
 
 @app.post("/api/gallery", response_model=GalleryAssetRead, status_code=status.HTTP_201_CREATED)
@@ -370,25 +819,244 @@ def create_gallery_asset(payload: GalleryAssetCreate, db=Depends(get_db)):
         asset_type=payload.asset_type,
         title=payload.title,
         description=payload.description,
-        url=payload.url,
+        url=media_store.put_data_url(payload.url) or payload.url,
         metadata_json=json.dumps(payload.metadata) if payload.metadata else None,
     )
     db.add(asset)
     db.flush()
     db.refresh(asset)
+    if asset.asset_type == "image":
+        derivative_worker.schedule(asset.id, asset.url)
     return asset
 
 
+def _load_duplicates(db, matches: list[tuple[int, int]], limit: int) -> list[DuplicateMatch]:
+    """Load the assets behind ``(distance, asset_id)`` matches, skipping deleted ones."""
+
+    distances = {asset_id: distance for distance, asset_id in matches}
+    assets = (
+        db.query(GalleryAsset)
+        .options(*asset_membership_options())
+        .filter(GalleryAsset.id.in_(list(distances)))
+        .all()
+    )
+    assets.sort(key=lambda asset: (distances[asset.id], asset.id))
+    return [
+        DuplicateMatch(asset=GalleryAssetRead.model_validate(asset), distance=distances[asset.id])
+        for asset in assets[:limit]
+    ]
+
+
+@app.get("/api/gallery/{asset_id}/duplicates", response_model=list[DuplicateMatch])
+def list_gallery_asset_duplicates(
+    asset_id: int,
+    max_distance: int | None = Query(default=None, ge=0, le=64),
+    limit: int = Query(default=GALLERY_PAGE_DEFAULT, ge=1, le=GALLERY_PAGE_MAX),
+    db=Depends(get_db),
+):
+    """Images whose perceptual hash is within ``max_distance`` bits of this one's."""
+
+    asset = db.get(GalleryAsset, asset_id)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    if asset.asset_type != "image":
+        raise HTTPException(status_code=400, detail="Only image assets have duplicates")
+    if not derivative_worker.enabled:
+        raise HTTPException(status_code=503, detail="Duplicate detection requires Pillow; install requirements.txt")
+    if asset.perceptual_hash is None:
+        raise HTTPException(status_code=409, detail="Image has not been hashed yet")
+    if max_distance is None:
+        max_distance = settings.duplicate_max_distance
+    matches = duplicate_index.find(db, asset.perceptual_hash, max_distance, exclude=asset.id)
+    return _load_duplicates(db, matches, limit)
+
+
+# Upload types that become gallery assets, keyed by the sniffed MIME type's major part.
+UPLOAD_ASSET_TYPES = {"image", "video", "audio"}
+UPLOAD_FIELD_MAX_BYTES = 64 * 1024
+
+
+async def _store_upload(chunks: AsyncIterator[bytes]) -> tuple[str, str, int]:
+    """Stream ``chunks`` into the media store; return ``(hash, media type, size)``.
+
+    The type is sniffed from the first bytes, so unsupported files are
+    rejected before the rest of the body is stored.
+    """
+
+    size = 0
+    head = b""
+    media_type = None
+
+    def check_type() -> str:
+        detected = sniff_media_type(head)
+        if detected.split("/")[0] not in UPLOAD_ASSET_TYPES:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Only image, video and audio files can be uploaded",
+            )
+        return detected
+
+    async def checked() -> AsyncIterator[bytes]:
+        nonlocal size, head, media_type
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > settings.max_upload_bytes:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Uploads are limited to {settings.max_upload_bytes} bytes",
+                )
+            if media_type is None:
+                head += chunk[: SNIFF_BYTES - len(head)]
+                if len(head) >= SNIFF_BYTES:
+                    media_type = check_type()
+            yield chunk
+        if media_type is None:
+            media_type = check_type()
+
+    blob_hash = await run_in_threadpool(
+        lambda: media_store.put_stream(blocking_chunks(checked()))
+    )
+    return blob_hash, media_type, size
+
+
+def _parse_upload_metadata(raw: str) -> dict[str, Any]:
+    try:
+        metadata = json.loads(raw)
+    except ValueError:
+        metadata = None
+    if not isinstance(metadata, dict):
+        raise HTTPException(status_code=422, detail="'metadata' must be a JSON object")
+    return metadata
+
+
+def _discard_orphan_blob(blob_hash: str) -> None:
+    """Delete a just-stored upload unless an existing row already uses the same blob."""
+
+    url = media_url(blob_hash)
+    with session_scope() as session:
+        referenced = session.query(GalleryAsset.id).filter(
+            or_(GalleryAsset.url == url, GalleryAsset.derivatives_json.contains(url))
+        ).first() or session.query(AudioTrack.id).filter(AudioTrack.url == url).first()
+    if referenced is None:
+        media_store.delete(blob_hash)
+
+
+@app.post(
+    "/api/gallery/upload", response_model=GalleryAssetRead, status_code=status.HTTP_201_CREATED
+)
+async def upload_gallery_asset(request: Request, db=Depends(get_db)):
+    """Create a gallery asset from a ``multipart/form-data`` upload.
+
+    The ``file`` part is streamed into the media store as it arrives, hashed
+    on the way (identical files are stored once) and typed by sniffing its
+    leading bytes. Optional ``title``, ``description`` and ``metadata`` (a
+    JSON object) fields may come before or after it.
+    """
+
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit():
+        # Allow for the multipart framing around the file.
+        if int(content_length) > settings.max_upload_bytes + UPLOAD_FIELD_MAX_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Uploads are limited to {settings.max_upload_bytes} bytes",
+            )
+
+    fields: dict[str, str] = {}
+    metadata: dict[str, Any] = {}
+    upload = None
+    filename = None
+    try:
+        try:
+            reader = MultipartReader(
+                request.stream(), parse_boundary(request.headers.get("content-type", ""))
+            )
+            while (part := await reader.next_part()) is not None:
+                if part.filename is None:
+                    value = await reader.read_part(UPLOAD_FIELD_MAX_BYTES)
+                    fields[part.name] = value.decode("utf-8", "replace")
+                    if part.name == "metadata" and fields["metadata"]:
+                        # Checked on arrival so a bad field before the file stores nothing.
+                        metadata = _parse_upload_metadata(fields["metadata"])
+                elif part.name == "file" and upload is None:
+                    filename = part.filename
+                    upload = await _store_upload(reader.iter_part())
+        except MultipartError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+        if upload is None:
+            raise HTTPException(status_code=422, detail="A 'file' part is required")
+    except HTTPException:
+        if upload is not None:
+            await run_in_threadpool(_discard_orphan_blob, upload[0])
+        raise
+
+    blob_hash, media_type, size = upload
+    asset = GalleryAsset(
+        asset_type=media_type.split("/")[0],
+        title=(fields.get("title") or filename or "Upload")[:255],
+        description=fields.get("description") or None,
+        url=media_url(blob_hash),
+        metadata_json=json.dumps(
+            {
+                **metadata,
+                "filename": filename,
+                "content_type": media_type,
+                "size_bytes": size,
+                "sha256": blob_hash,
+            }
+        ),
+    )
+
+    def _store() -> GalleryAssetRead:
+        db.add(asset)
+        db.flush()
+        db.refresh(asset)
+        if asset.asset_type == "image":
+            derivative_worker.schedule(asset.id, asset.url)
+        return GalleryAssetRead.model_validate(asset)
+
+    return await run_in_threadpool(_store)
+
+
 @app.post("/api/images", response_model=ImageResponse)
-def generate_image(request: ImageRequest, db=Depends(get_db)):
-    image_info = openai_client.create_image(
+async def generate_image(
+    request: ImageRequest,
+    db=Depends(get_db),
+    idempotency_key: str | None = IDEMPOTENCY_KEY_HEADER,
+):
+    return await idempotency.run(
+        "images", idempotency_key, request, db, lambda: _generate_image(request, db)
+    )
+
+
+async def _generate_image(request: ImageRequest, db) -> ImageResponse:
+    image_info = await openai_client.create_image(
         prompt=request.prompt, size=request.size, quality=request.quality
     )
+    data = decode_data_url(image_info["url"])
+    perceptual_hash = None
+    if request.skip_duplicate and data is not None:
+        # Without Pillow there is no hash and the image is always kept.
+        perceptual_hash = await run_in_threadpool(dhash_bytes, data)
+    if perceptual_hash is not None:
+
+        def _find_duplicate() -> DuplicateMatch | None:
+            matches = duplicate_index.find(db, perceptual_hash, settings.duplicate_max_distance)
+            duplicates = _load_duplicates(db, matches, 1)
+            return duplicates[0] if duplicates else None
+
+        duplicate = await run_in_threadpool(_find_duplicate)
+        if duplicate is not None:
+            return ImageResponse(asset=duplicate.asset, duplicate_of=duplicate.asset.id)
+
+    url = None
+    if data is not None:
+        url = media_url(await run_in_threadpool(media_store.put, data))
     asset = GalleryAsset(
         asset_type="image",
         title=request.prompt[:80],
         description=f"Generated with {image_info['model']} (quality {request.quality})",
-        url=image_info["url"],
+        url=url or image_info["url"],
         metadata_json=json.dumps(
             {
                 "revised_prompt": image_info.get("revised_prompt"),
@@ -397,17 +1065,32 @@ def generate_image(request: ImageRequest, db=Depends(get_db)):
                 "aspect_ratio": request.aspect_ratio,
             }
         ),
+        perceptual_hash=perceptual_hash,
     )
-    db.add(asset)
-    db.flush()
-    db.refresh(asset)
 
-    return ImageResponse(asset=GalleryAssetRead.model_validate(asset))
+    def _store() -> ImageResponse:
+        db.add(asset)
+        db.flush()
+        db.refresh(asset)
+        derivative_worker.schedule(asset.id, asset.url)
+        return ImageResponse(asset=GalleryAssetRead.model_validate(asset))
+
+    return await run_in_threadpool(_store)
 
 
 @app.post("/api/videos", response_model=VideoResponse)
-def generate_video(request: VideoRequest, db=Depends(get_db)):
-    video_info = openai_client.create_video(
+async def generate_video(
+    request: VideoRequest,
+    db=Depends(get_db),
+    idempotency_key: str | None = IDEMPOTENCY_KEY_HEADER,
+):
+    return await idempotency.run(
+        "videos", idempotency_key, request, db, lambda: _generate_video(request, db)
+    )
+
+
+async def _generate_video(request: VideoRequest, db) -> VideoResponse:
+    video_info = await openai_client.start_video(
         prompt=request.prompt,
         aspect_ratio=request.aspect_ratio,
         duration_seconds=request.duration_seconds,
@@ -440,67 +1123,116 @@ def generate_video(request: VideoRequest, db=Depends(get_db)):
                 "duration_seconds": video_info.get("duration_seconds"),
                 "quality": video_info.get("quality"),
                 "orientation": video_info.get("orientation"),
+                "status": video_info.get("status"),
             }
         ),
     )
-    db.add(asset)
-    db.flush()
-    db.refresh(asset)
 
-    return VideoResponse(asset=GalleryAssetRead.model_validate(asset))
+    def _store() -> VideoResponse:
+        db.add(asset)
+        db.flush()
+        db.refresh(asset)
+        job = _track_video_job(db, asset, video_id)
+        return VideoResponse(asset=GalleryAssetRead.model_validate(asset), job=job)
+
+    return await run_in_threadpool(_store)
+
+
+def _track_video_job(db, asset: GalleryAsset, video_id: str | None) -> VideoJobRead | None:
+    """Hand a pending Sora render to the shared poller."""
+
+    if not video_id:
+        return None
+    # Committed together with the asset and the idempotency record; the poller wakes after that.
+    return VideoJobRead(**video_jobs.submit(asset_id=asset.id, video_id=video_id, session=db))
+
+
+@app.get("/api/jobs/{job_id}", response_model=VideoJobRead)
+def get_video_job(job_id: str):
+    job = video_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return VideoJobRead(**job)
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_video_job(job_id: str):
+    """Push job snapshots over SSE until the render completes or fails."""
+
+    if await run_in_threadpool(video_jobs.get, job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream() -> AsyncIterator[str]:
+        async for snapshot in video_jobs.subscribe(job_id):
+            event = "progress" if snapshot["status"] in PENDING_STATUSES else "done"
+            yield _sse_event(event, VideoJobRead(**snapshot).model_dump(mode="json"))
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _download_video(video_id: str, path: Path) -> None:
+    """Stream a finished Sora render from OpenAI into ``path``."""
+
+    async with http_clients.async_client.stream(
+        "GET",
+        f"https://api.openai.com/v1/videos/{video_id}/content",
+        headers={"Authorization": f"Bearer {settings.openai_api_key}"},
+        timeout=60.0,
+    ) as response:
+        if response.status_code == 404:
+            raise HTTPException(status_code=404, detail="Video not found")
+        elif response.status_code == 401:
+            raise HTTPException(status_code=401, detail="Invalid API key")
+        elif response.status_code != 200:
+            await response.aread()
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Failed to fetch video: {response.text[:200]}",
+            )
+        async with await anyio.open_file(path, "wb") as handle:
+            async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                await handle.write(chunk)
 
 
 @app.get("/api/videos/{video_id}/content")
-async def proxy_video_content(video_id: str):
+async def proxy_video_content(video_id: str, request: Request):
     """
     Proxy endpoint to fetch video content from OpenAI with authentication.
-    
+
     The frontend cannot directly access OpenAI's /videos/{id}/content endpoint
-    because it requires an API key. This endpoint fetches the video with proper
-    authentication and streams it to the client.
+    because it requires an API key. The first request downloads the video into
+    the on-disk video cache (concurrent requests share that download); every
+    request, including ``Range`` requests from seeking, is then served from disk.
     """
     if not settings.openai_api_key:
         raise HTTPException(
             status_code=503,
             detail="OpenAI API key not configured"
         )
-    
+
     try:
-        # Fetch the video from OpenAI with authentication
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.get(
-                f"https://api.openai.com/v1/videos/{video_id}/content",
-                headers={
-                    "Authorization": f"Bearer {settings.openai_api_key}",
-                },
-            )
-            
-            if response.status_code == 404:
-                raise HTTPException(status_code=404, detail="Video not found")
-            elif response.status_code == 401:
-                raise HTTPException(status_code=401, detail="Invalid API key")
-            elif response.status_code != 200:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"Failed to fetch video: {response.text[:200]}"
-                )
-            
-            # Stream the video content to the client
-            return StreamingResponse(
-                response.iter_bytes(chunk_size=8192),
-                media_type=response.headers.get("content-type", "video/mp4"),
-                headers={
-                    "Content-Disposition": f'inline; filename="video_{video_id}.mp4"',
-                    "Accept-Ranges": "bytes",
-                }
-            )
-    
+        path = await video_cache.get(video_id, lambda tmp: _download_video(video_id, tmp))
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Video not found")
     except httpx.HTTPError as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error fetching video: {str(e)}"
         )
 
+    return await run_in_threadpool(
+        range_file_response,
+        request,
+        path,
+        etag=video_id,
+        cache_control=VIDEO_CACHE_CONTROL,
+        extra_headers={"Content-Disposition": f'inline; filename="video_{video_id}.mp4"'},
+    )
+
 
 @app.get("/api/widgets", response_model=list[WorkspaceWidgetRead])
 def list_widgets(db=Depends(get_db)):
@@ -625,8 +1357,13 @@ def update_code_file(project_id: int, file_id: int, payload: CodeFileUpdate, db=
 
 
 @app.post("/api/code/projects/{project_id}/generate", response_model=CodeGenerationResponse)
-def generate_code_suggestion(project_id: int, payload: CodeGenerationRequest, db=Depends(get_db)):
-    project = db.get(CodeProject, project_id)
+async def generate_code_suggestion(
+    project_id: int,
+    payload: CodeGenerationRequest,
+    db=Depends(get_db),
+    cache: str = Depends(response_cache_mode),
+):
+    project = await run_in_threadpool(db.get, CodeProject, project_id)
     if project is None:
         raise HTTPException(status_code=404, detail="Project not found")
 
@@ -666,7 +1403,9 @@ def generate_code_suggestion(project_id: int, payload: CodeGenerationRequest, db
     if payload.context:
         context_parts.append(f"Context:\n{payload.context}")
     user_prompt = "\n\n".join(context_parts)
-    data, model_used = ai_structured_response(system_prompt, user_prompt, fallback)
+    data, model_used = await ai_structured_response(
+        system_prompt, user_prompt, fallback, cache=cache
+    )
     return CodeGenerationResponse(
         code=data.get("code", ""),
         explanation=data.get("explanation", ""),
@@ -675,7 +1414,10 @@ def generate_code_suggestion(project_id: int, payload: CodeGenerationRequest, db
 
 
 @app.post("/api/document/draft", response_model=DocumentDraftResponse)
-def draft_document(payload: DocumentDraftRequest):
+async def draft_document(
+    payload: DocumentDraftRequest,
+    cache: str = Depends(response_cache_mode),
+):
     def fallback() -> dict:
         outline = payload.key_points or [
             f"Why {payload.topic} matters for {payload.audience}",
@@ -725,7 +1467,9 @@ def draft_document(payload: DocumentDraftRequest):
         {key_points or '- Emphasise practical outcomes'}
         """
     ).strip()
-    data, model_used = ai_structured_response(system_prompt, user_prompt, fallback)
+    data, model_used = await ai_structured_response(
+        system_prompt, user_prompt, fallback, cache=cache
+    )
     document_data = {
         "title": data.get("title") or baseline["title"],
         "summary": data.get("summary") or baseline["summary"],
@@ -737,7 +1481,10 @@ def draft_document(payload: DocumentDraftRequest):
 
 
 @app.post("/api/presentation/plan", response_model=PresentationPlanResponse)
-def plan_presentation(payload: PresentationPlanRequest):
+async def plan_presentation(
+    payload: PresentationPlanRequest,
+    cache: str = Depends(response_cache_mode),
+):
     def fallback() -> dict:
         slides = [
             {
@@ -795,7 +1542,9 @@ def plan_presentation(payload: PresentationPlanRequest):
         Goals:\n{goals}
         """
     ).strip()
-    data, model_used = ai_structured_response(system_prompt, user_prompt, fallback)
+    data, model_used = await ai_structured_response(
+        system_prompt, user_prompt, fallback, cache=cache
+    )
     plan_data = {
         "headline": data.get("headline") or baseline["headline"],
         "slides": data.get("slides") or baseline["slides"],
@@ -805,7 +1554,10 @@ def plan_presentation(payload: PresentationPlanRequest):
 
 
 @app.post("/api/data/visualize", response_model=DataVisualizationResponse)
-def visualize_data(payload: DataVisualizationRequest):
+async def visualize_data(
+    payload: DataVisualizationRequest,
+    cache: str = Depends(response_cache_mode),
+):
     def fallback() -> dict:
         dataset = [
             {"label": "North America", "value": 42.5},
@@ -837,7 +1589,9 @@ def visualize_data(payload: DataVisualizationRequest):
         Goal: {payload.goal or 'Highlight actionable trends'}
         """
     ).strip()
-    data, model_used = ai_structured_response(system_prompt, user_prompt, fallback)
+    data, model_used = await ai_structured_response(
+        system_prompt, user_prompt, fallback, cache=cache
+    )
     viz_data = {
         "chart_type": data.get("chart_type") or baseline["chart_type"],
         "dataset": data.get("dataset") or baseline["dataset"],
@@ -848,7 +1602,10 @@ def visualize_data(payload: DataVisualizationRequest):
 
 
 @app.post("/api/game/concept", response_model=GameConceptResponse)
-def build_game_concept(payload: GameConceptRequest):
+async def build_game_concept(
+    payload: GameConceptRequest,
+    cache: str = Depends(response_cache_mode),
+):
     def fallback() -> dict:
         return {
             "elevator_pitch": f"{payload.genre.title()} game where players {payload.fantasy.lower()}.",
@@ -887,7 +1644,9 @@ def build_game_concept(payload: GameConceptRequest):
         Pillars:\n{pillars}
         """
     ).strip()
-    data, model_used = ai_structured_response(system_prompt, user_prompt, fallback)
+    data, model_used = await ai_structured_response(
+        system_prompt, user_prompt, fallback, cache=cache
+    )
     concept_data = {
         "elevator_pitch": data.get("elevator_pitch") or baseline["elevator_pitch"],
         "core_loop": data.get("core_loop") or baseline["core_loop"],
@@ -899,7 +1658,10 @@ def build_game_concept(payload: GameConceptRequest):
 
 
 @app.post("/api/avatar/design", response_model=AvatarDesignResponse)
-def design_avatar(payload: AvatarDesignRequest):
+async def design_avatar(
+    payload: AvatarDesignRequest,
+    cache: str = Depends(response_cache_mode),
+):
     def fallback() -> dict:
         palette = ["#0ea5e9", "#38bdf8", "#e0f2fe"] if payload.palette_hint is None else [
             payload.palette_hint,
@@ -934,7 +1696,9 @@ def design_avatar(payload: AvatarDesignRequest):
         Palette hint: {payload.palette_hint or 'cool neutrals'}
         """
     ).strip()
-    data, model_used = ai_structured_response(system_prompt, user_prompt, fallback)
+    data, model_used = await ai_structured_response(
+        system_prompt, user_prompt, fallback, cache=cache
+    )
     avatar_data = {
         "concept_name": data.get("concept_name") or baseline["concept_name"],
         "description": data.get("description") or baseline["description"],
@@ -946,7 +1710,10 @@ def design_avatar(payload: AvatarDesignRequest):
 
 
 @app.post("/api/simulation/run", response_model=SimulationRunResponse)
-def run_simulation(payload: SimulationRunRequest):
+async def run_simulation(
+    payload: SimulationRunRequest,
+    cache: str = Depends(response_cache_mode),
+):
     def fallback() -> dict:
         return {
             "scenario": payload.scenario,
@@ -980,7 +1747,9 @@ def run_simulation(payload: SimulationRunRequest):
         Metrics:\n{metrics}
         """
     ).strip()
-    data, model_used = ai_structured_response(system_prompt, user_prompt, fallback)
+    data, model_used = await ai_structured_response(
+        system_prompt, user_prompt, fallback, cache=cache
+    )
     simulation_data = {
         "scenario": data.get("scenario") or baseline["scenario"],
         "timeline": data.get("timeline") or baseline["timeline"],
@@ -992,7 +1761,10 @@ def run_simulation(payload: SimulationRunRequest):
 
 
 @app.post("/api/whiteboard/summarize", response_model=WhiteboardSummaryResponse)
-def summarize_whiteboard(payload: WhiteboardSummaryRequest):
+async def summarize_whiteboard(
+    payload: WhiteboardSummaryRequest,
+    cache: str = Depends(response_cache_mode),
+):
     def fallback() -> dict:
         notes = payload.notes or []
         highlights = [note.get("text", "") for note in notes][:3]
@@ -1025,7 +1797,9 @@ def summarize_whiteboard(payload: WhiteboardSummaryRequest):
         Notes collected:\n{formatted_notes or '- No notes captured yet'}
         """
     ).strip()
-    data, model_used = ai_structured_response(system_prompt, user_prompt, fallback)
+    data, model_used = await ai_structured_response(
+        system_prompt, user_prompt, fallback, cache=cache
+    )
     summary_data = {
         "highlights": data.get("highlights") or baseline["highlights"],
         "clusters": data.get("clusters") or baseline["clusters"],
@@ -1035,7 +1809,10 @@ def summarize_whiteboard(payload: WhiteboardSummaryRequest):
 
 
 @app.post("/api/knowledge/curate", response_model=KnowledgeBoardResponse)
-def curate_knowledge(payload: KnowledgeBoardRequest):
+async def curate_knowledge(
+    payload: KnowledgeBoardRequest,
+    cache: str = Depends(response_cache_mode),
+):
     def fallback() -> dict:
         columns = [
             {
@@ -1103,7 +1880,9 @@ def curate_knowledge(payload: KnowledgeBoardRequest):
         Audience: {payload.audience or 'Product and GTM teams'}
         """
     ).strip()
-    data, model_used = ai_structured_response(system_prompt, user_prompt, fallback)
+    data, model_used = await ai_structured_response(
+        system_prompt, user_prompt, fallback, cache=cache
+    )
     board_data = {
         "theme": data.get("theme") or baseline["theme"],
         "columns": data.get("columns") or baseline["columns"],
@@ -1114,7 +1893,12 @@ def curate_knowledge(payload: KnowledgeBoardRequest):
 
 @app.get("/api/galleries", response_model=list[GalleryRead])
 def list_galleries(db=Depends(get_db)):
-    galleries = db.query(Gallery).order_by(Gallery.updated_at.desc()).all()
+    galleries = (
+        db.query(Gallery)
+        .options(*gallery_options())
+        .order_by(Gallery.updated_at.desc())
+        .all()
+    )
     return [GalleryRead.model_validate(gallery) for gallery in galleries]
 
 
@@ -1129,8 +1913,7 @@ def create_gallery(payload: GalleryCreate, db=Depends(get_db)):
     )
     db.add(gallery)
     db.flush()
-    db.refresh(gallery)
-    return GalleryRead.model_validate(gallery)
+    return GalleryRead.model_validate(load_gallery(db, gallery.id))
 
 
 @app.patch("/api/galleries/{gallery_id}", response_model=GalleryRead)
@@ -1143,8 +1926,7 @@ def update_gallery(gallery_id: int, payload: GalleryUpdate, db=Depends(get_db)):
         setattr(gallery, field, value)
 
     db.flush()
-    db.refresh(gallery)
-    return GalleryRead.model_validate(gallery)
+    return GalleryRead.model_validate(load_gallery(db, gallery.id))
 
 
 @app.post("/api/galleries/{gallery_id}/assets", response_model=GalleryRead)
@@ -1157,12 +1939,16 @@ def add_asset_to_gallery(gallery_id: int, payload: GalleryAssetAssignment, db=De
     if asset is None:
         raise HTTPException(status_code=404, detail="Asset not found")
 
-    if asset not in gallery.assets:
-        gallery.assets.append(asset)
+    linked = (
+        db.query(GalleryAssetLink.id)
+        .filter_by(gallery_id=gallery_id, asset_id=payload.asset_id)
+        .first()
+    )
+    if linked is None:
+        db.add(GalleryAssetLink(gallery_id=gallery_id, asset_id=payload.asset_id))
 
     db.flush()
-    db.refresh(gallery)
-    return GalleryRead.model_validate(gallery)
+    return GalleryRead.model_validate(load_gallery(db, gallery_id))
 
 
 @app.get(
@@ -1173,16 +1959,27 @@ def list_gallery_assets(gallery_id: int, db=Depends(get_db)):
     gallery = db.get(Gallery, gallery_id)
     if gallery is None:
         raise HTTPException(status_code=404, detail="Gallery not found")
-    return [GalleryAssetRead.model_validate(asset) for asset in gallery.assets]
+    assets = gallery_assets_query(db, gallery_id).all()
+    return [GalleryAssetRead.model_validate(asset) for asset in assets]
 
 
 @app.post("/api/studio/render", response_model=StudioRenderResponse)
-def render_studio_video(payload: StudioRenderRequest, db=Depends(get_db)):
-    assets = (
+async def render_studio_video(
+    payload: StudioRenderRequest,
+    db=Depends(get_db),
+    idempotency_key: str | None = IDEMPOTENCY_KEY_HEADER,
+):
+    return await idempotency.run(
+        "studio-render", idempotency_key, payload, db, lambda: _render_studio_video(payload, db)
+    )
+
+
+async def _render_studio_video(payload: StudioRenderRequest, db) -> StudioRenderResponse:
+    assets = await run_in_threadpool(
         db.query(GalleryAsset)
         .filter(GalleryAsset.id.in_(payload.asset_ids))
         .order_by(GalleryAsset.created_at.asc())
-        .all()
+        .all
     )
     if len(assets) != len(payload.asset_ids):
         raise HTTPException(status_code=404, detail="One or more assets were not found")
@@ -1190,33 +1987,40 @@ def render_studio_video(payload: StudioRenderRequest, db=Depends(get_db)):
     storyboard_prompt = " \n".join(
         f"Scene {index + 1}: {asset.title}" for index, asset in enumerate(assets)
     )
-    video_info = openai_client.create_video(
+    video_info = await openai_client.start_video(
         prompt=f"Compose a {payload.orientation} video with scenes: {storyboard_prompt}",
         aspect_ratio="9:16" if payload.orientation == "vertical" else "16:9",
         duration_seconds=min(12, 4 * len(assets)),
         quality="high",
     )
+    video_id = video_info.get("video_id")
 
     asset = GalleryAsset(
         asset_type="video",
         title=payload.title[:80] if payload.title else "Studio montage",
         description=payload.description
         or f"Studio composition ({payload.orientation}) crafted from {len(assets)} assets.",
-        url=video_info["url"],
+        url=f"/api/videos/{video_id}/content" if video_id else video_info["url"],
         metadata_json=json.dumps(
             {
+                "video_id": video_id,
                 "revised_prompt": video_info.get("revised_prompt"),
                 "source_asset_ids": payload.asset_ids,
                 "orientation": payload.orientation,
                 "thumbnail_url": video_info.get("thumbnail_url"),
+                "status": video_info.get("status"),
             }
         ),
     )
-    db.add(asset)
-    db.flush()
-    db.refresh(asset)
 
-    return StudioRenderResponse(asset=GalleryAssetRead.model_validate(asset))
+    def _store() -> StudioRenderResponse:
+        db.add(asset)
+        db.flush()
+        db.refresh(asset)
+        job = _track_video_job(db, asset, video_id)
+        return StudioRenderResponse(asset=GalleryAssetRead.model_validate(asset), job=job)
+
+    return await run_in_threadpool(_store)
 
 
 @app.get("/api/agents", response_model=list[AgentRead])
@@ -1270,12 +2074,12 @@ def update_agent(agent_id: int, payload: AgentUpdate, db=Depends(get_db)):
 
 
 @app.post("/api/agents/build", response_model=AgentBuildResponse)
-def build_agent(payload: AgentBuildRequest) -> AgentBuildResponse:
+async def build_agent(payload: AgentBuildRequest) -> AgentBuildResponse:
     brief = payload.prompt.strip()
     if payload.context:
         brief = f"{brief}\n\nContext:\n{payload.context.strip()}"
 
-    plan_data = openai_client.plan_agent(brief)
+    plan_data = await openai_client.plan_agent(brief)
     plan = AgentPlan.model_validate(plan_data)
     return AgentBuildResponse(plan=plan)
 
@@ -1287,8 +2091,23 @@ def list_audio_tracks(db=Depends(get_db)):
 
 
 @app.post("/api/audio-tracks", response_model=AudioTrackRead, status_code=status.HTTP_201_CREATED)
-def generate_audio_track(payload: AudioGenerationRequest, db=Depends(get_db)):
-    audio_info = elevenlabs_client.generate_audio(
+async def generate_audio_track(
+    payload: AudioGenerationRequest,
+    db=Depends(get_db),
+    idempotency_key: str | None = IDEMPOTENCY_KEY_HEADER,
+):
+    return await idempotency.run(
+        "audio-tracks",
+        idempotency_key,
+        payload,
+        db,
+        lambda: _generate_audio_track(payload, db),
+        status_code=status.HTTP_201_CREATED,
+    )
+
+
+async def _generate_audio_track(payload: AudioGenerationRequest, db) -> AudioTrackRead:
+    audio_info = await elevenlabs_client.generate_audio(
         payload.prompt,
         title=payload.title,
         voice=payload.voice,
@@ -1316,37 +2135,49 @@ def generate_audio_track(payload: AudioGenerationRequest, db=Depends(get_db)):
         if audio_info
         else None,
     )
-    db.add(track)
-    db.flush()
-    db.refresh(track)
-    return AudioTrackRead.model_validate(track)
+
+    def _store() -> AudioTrackRead:
+        db.add(track)
+        db.flush()
+        db.refresh(track)
+        return AudioTrackRead.model_validate(track)
+
+    return await run_in_threadpool(_store)
 
 
 @app.get("/api/data-catalog", response_model=DataCatalogResponse)
-def get_data_catalog(db=Depends(get_db)):
-    stats = DataCatalogStats(
-        conversations=db.query(func.count(Conversation.id)).scalar() or 0,
-        messages=db.query(func.count(Message.id)).scalar() or 0,
-        gallery_assets=db.query(func.count(GalleryAsset.id)).scalar() or 0,
-        galleries=db.query(func.count(Gallery.id)).scalar() or 0,
-        agents=db.query(func.count(Agent.id)).scalar() or 0,
-        audio_tracks=db.query(func.count(AudioTrack.id)).scalar() or 0,
-        widgets=db.query(func.count(WorkspaceWidget.id)).scalar() or 0,
-        code_projects=db.query(func.count(CodeProject.id)).scalar() or 0,
-        code_files=db.query(func.count(CodeFile.id)).scalar() or 0,
-    )
+def get_data_catalog(request: Request, db=Depends(get_db)):
+    """Serve the catalog from cache while no catalog table has changed.
+
+    Stats come from the denormalized ``catalog_counters`` rows, whose version
+    row doubles as the cache key, so a warm hit costs a single query.
+    """
+
+    counters = read_catalog_counters(db)
+    if any(name not in counters for name in CATALOG_TABLES):
+        refresh_catalog_counters()
+        counters = read_catalog_counters(db)
+    version = counters.get(CATALOG_VERSION, 0)
 
+    cached = catalog_cache.get(version)
+    if cached is None:
+        stats = DataCatalogStats(**{name: counters[name] for name in CATALOG_TABLES})
+        catalog = _build_data_catalog(db, stats)
+        cached = catalog_cache.put(version, catalog.model_dump_json().encode())
+    etag, body = cached
+
+    headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") in {f'"{etag}"', etag}:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def _build_data_catalog(db, stats: DataCatalogStats) -> DataCatalogResponse:
     limit = 6
 
     conversation_rows = (
-        db.query(
-            Conversation.id,
-            Conversation.title,
-            Conversation.updated_at,
-            func.count(Message.id).label("message_count"),
-        )
-        .outerjoin(Message)
-        .group_by(Conversation.id)
+        db.query(Conversation)
+        .options(*conversation_summary_options())
         .order_by(Conversation.updated_at.desc())
         .limit(limit)
         .all()
@@ -1464,3 +2295,67 @@ def get_data_catalog(db=Depends(get_db)):
         galleries=gallery_summaries,
         widgets=widget_summaries,
     )
+
+
+USAGE_DAYS_MAX = 366
+
+
+@app.get("/api/usage", response_model=UsageReport)
+def get_usage(
+    days: int = Query(default=30, ge=1, le=USAGE_DAYS_MAX),
+    model: str | None = None,
+    db=Depends(get_db),
+):
+    """Token and latency totals per model and per day from ``usage_rollups``.
+
+    The rollup is updated as assistant replies are stored, so this never
+    scans ``messages``.
+    """
+
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+
+    def _usage_fields(row) -> dict[str, Any]:
+        return {
+            "model": row.model,
+            "responses": row.responses,
+            "input_tokens": row.input_tokens,
+            "output_tokens": row.output_tokens,
+            "cached_tokens": row.cached_tokens,
+            "avg_latency_ms": (
+                round(row.latency_ms_total / row.latency_samples, 1)
+                if row.latency_samples
+                else None
+            ),
+            "max_latency_ms": row.latency_ms_max if row.latency_samples else None,
+        }
+
+    return UsageReport(
+        since=since,
+        models=[
+            UsageModelTotals(**_usage_fields(row))
+            for row in read_usage_totals(db, since=since, model=model)
+        ],
+        days=[
+            UsageRollupRead(day=row.day, **_usage_fields(row))
+            for row in read_usage(db, since=since, model=model)
+        ],
+    )
+
+
+@app.get("/api/metrics")
+def get_metrics() -> dict[str, dict[str, Any]]:
+    """In-process cache, coalescing, circuit breaker and admission state for this worker."""
+
+    return {
+        "response_cache": response_cache.stats(),
+        "history_cache": {"hits": history_cache.hits, "misses": history_cache.misses},
+        "video_cache": video_cache.stats(),
+        "derivatives": derivative_worker.stats(),
+        "duplicate_index": {"hashes": len(duplicate_index)},
+        "upstream_coalescing": {
+            "leaders": openai_client.inflight.leaders,
+            "coalesced": openai_client.inflight.coalesced,
+        },
+        "circuit_breakers": resilience.snapshot(),
+        "rate_limits": rate_limiter.snapshot(),
+    }
@@ -1,50 +1,429 @@
 """Wrapper around the OpenAI SDK using the latest responses API."""
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
-import time
-from typing import Any, Iterable
+from typing import Any, AsyncIterator, Iterable
 
 import httpx
-from openai import OpenAI, OpenAIError
+from openai import AsyncOpenAI, OpenAI, OpenAIError
 
 from .config import Settings
+from .http_clients import HTTPClients
+from .ratelimit import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_NORMAL,
+    RateLimiter,
+    UpstreamBusyError,
+    estimate_tokens,
+)
+from .resilience import CircuitOpenError, Resilience
+from .singleflight import AsyncSingleFlight, SingleFlight, request_key
 
 logger = logging.getLogger(__name__)
 
-
-def _format_history(history: Iterable[dict[str, str]]) -> list[dict[str, Any]]:
-    messages: list[dict[str, Any]] = []
-    for item in history:
-        role = item["role"]
-        content_type = "output_text" if role == "assistant" else "input_text"
-        messages.append(
+VIDEOS_URL = "https://api.openai.com/v1/videos"
+VIDEO_MODEL = "sora-2"
+
+# gpt-image-1 supports: 1024x1024, 1536x1024 (landscape), 1024x1536 (portrait), or auto
+# Map common sizes to gpt-image-1 supported sizes
+IMAGE_SIZE_MAPPING = {
+    "256x256": "1024x1024",
+    "512x512": "1024x1024",
+    "1024x1024": "1024x1024",
+    "1536x1024": "1536x1024",
+    "1024x1536": "1024x1536",
+    "1792x1024": "1536x1024",  # Map to closest supported size
+    "1024x1792": "1024x1536",  # Map to closest supported size
+}
+
+# gpt-image-1 supports: high, medium, low, or auto
+IMAGE_QUALITY_MAPPING = {
+    "high": "high",
+    "hd": "high",
+    "medium": "medium",
+    "standard": "medium",
+    "low": "low",
+}
+
+# Map aspect ratio to video size (sora-2 supports various sizes)
+VIDEO_SIZE_MAPPING = {
+    "16:9": "1280x720",    # landscape
+    "9:16": "720x1280",    # portrait
+    "1:1": "1024x1024",    # square
+    "4:3": "1024x768",     # standard
+    "3:4": "768x1024",     # portrait standard
+}
+
+AGENT_PLAN_INSTRUCTIONS = (
+    "You are an expert OpenAI agent architect. Given a product or operations brief, "
+    "design an autonomous agent. Respond strictly as minified JSON with the keys "
+    "name, mission, instructions, capabilities (array of strings), tools (array of strings), "
+    "workflow (string) and rationale (string). Ensure arrays are concise."
+)
+
+SUMMARY_INSTRUCTIONS = (
+    "You maintain the running summary of a long strategy conversation. Merge the existing "
+    "summary with the new turns into one updated summary in plain prose. Keep decisions, "
+    "open questions, names, numbers and commitments; drop pleasantries. Stay under "
+    "{max_words} words and reply with the summary only."
+)
+
+
+def format_message(item: dict[str, Any]) -> dict[str, Any]:
+    """Convert a ``role``/``content`` pair into a Responses API input item."""
+
+    role = item["role"]
+    content = item["content"]
+    if not isinstance(content, str):
+        # Already formatted, e.g. served from the conversation history cache.
+        return item
+    content_type = "output_text" if role == "assistant" else "input_text"
+    return {
+        "role": role,
+        "content": [
             {
-                "role": role,
-                "content": [
-                    {
-                        "type": content_type,
-                        "text": item["content"],
-                    }
-                ],
+                "type": content_type,
+                "text": content,
             }
-        )
-    return messages
+        ],
+    }
+
+
+def _format_history(history: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+    return [format_message(item) for item in history]
+
+
+def _output_text(response: Any) -> str:
+    """Pull the assistant text out of a Responses API result."""
+
+    if getattr(response, "output", None):
+        return response.output[0].content[0].text
+    output_text = getattr(response, "output_text", "")
+    if isinstance(output_text, list):
+        return "".join(output_text)
+    return output_text or ""
+
+
+def _chat_payload(response: Any) -> dict[str, Any]:
+    return {
+        "role": "assistant",
+        "content": _output_text(response),
+        "model": response.model,
+        "usage": response.usage or {},
+    }
+
+
+def _chat_error_payload(exc: Exception, model: str) -> dict[str, Any]:
+    return {
+        "role": "assistant",
+        "content": f"OpenAI API error: {exc}",
+        "model": model,
+        "usage": {},
+    }
+
+
+def _offline_chat_payload(model: str) -> dict[str, Any]:
+    return {
+        "role": "assistant",
+        "content": "Configure OPENAI_API_KEY to stream live responses.",
+        "model": model,
+        "usage": {},
+    }
+
+
+def _summary_history(
+    previous: str | None, turns: Iterable[dict[str, str]], max_tokens: int
+) -> list[dict[str, str]]:
+    transcript = "\n".join(f"{turn['role']}: {turn['content']}" for turn in turns)
+    return _structured_history(
+        SUMMARY_INSTRUCTIONS.format(max_words=max(max_tokens * 3 // 4, 50)),
+        f"Existing summary:\n{previous or '(none)'}\n\nNew turns:\n{transcript}",
+    )
+
+
+def _offline_summary(
+    previous: str | None, turns: Iterable[dict[str, str]], max_tokens: int
+) -> str:
+    """Extractive fallback: the opening of each turn, oldest lines dropped first."""
+
+    lines = previous.splitlines() if previous else []
+    for turn in turns:
+        text = " ".join(turn["content"].split())
+        lines.append(f"{turn['role']}: {text[:200]}{'…' if len(text) > 200 else ''}")
+    max_chars = max_tokens * 4
+    while len(lines) > 1 and sum(len(line) + 1 for line in lines) > max_chars:
+        lines.pop(0)
+    return "\n".join(lines)[-max_chars:]
+
+
+def _structured_history(system_prompt: str, user_prompt: str) -> list[dict[str, str]]:
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+
+
+def _request_tokens(request: dict[str, Any]) -> int:
+    """Tokens a Responses API request may consume, for the per-minute budget."""
+
+    return estimate_tokens(request.get("input")) + request.get("max_output_tokens", 0)
+
+
+def _image_request(prompt: str, size: str, quality: str) -> dict[str, Any]:
+    return {
+        "model": "gpt-image-1",
+        "prompt": prompt,
+        "size": IMAGE_SIZE_MAPPING.get(size, "auto"),
+        "quality": IMAGE_QUALITY_MAPPING.get(quality, "auto"),
+        "n": 1,
+        "output_format": "png",
+    }
+
+
+def _offline_image_payload(prompt: str) -> dict[str, Any]:
+    return {
+        "url": "https://placehold.co/600x600?text=Configure+OPENAI_API_KEY",
+        "revised_prompt": prompt,
+        "model": "gpt-image-1",
+    }
+
+
+def _image_error_payload(prompt: str, exc: Exception) -> dict[str, Any]:
+    return {
+        "url": "https://placehold.co/600x600?text=OpenAI+API+error",
+        "revised_prompt": f"{prompt} (error: {exc})",
+        "model": "gpt-image-1",
+    }
+
+
+def _image_payload(prompt: str, result: Any) -> dict[str, Any]:
+    data = result.data[0]
+    # gpt-image-1 returns b64_json, convert to data URL
+    if hasattr(data, "b64_json") and data.b64_json:
+        image_url = f"data:image/png;base64,{data.b64_json}"
+    else:
+        # Fallback to url if available
+        image_url = getattr(data, "url", "https://placehold.co/600x600?text=No+Image+Data")
+
+    return {
+        "url": image_url,
+        "revised_prompt": getattr(data, "revised_prompt", prompt),
+        "model": "gpt-image-1",
+    }
+
+
+def _video_orientation(aspect_ratio: str) -> str:
+    return "vertical" if aspect_ratio in {"9:16", "3:4"} else "landscape"
+
+
+def _video_seconds(duration_seconds: int) -> str:
+    # Sora-2 only supports specific durations: 4, 8, or 12 seconds
+    # Map the requested duration to the nearest supported value
+    if duration_seconds <= 4:
+        return "4"
+    if duration_seconds <= 8:
+        return "8"
+    return "12"
+
+
+def _video_headers(api_key: str | None) -> dict[str, str]:
+    return {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+    }
+
+
+def _video_request(prompt: str, aspect_ratio: str, video_seconds: str) -> dict[str, Any]:
+    return {
+        "prompt": prompt,
+        "model": VIDEO_MODEL,
+        "size": VIDEO_SIZE_MAPPING.get(aspect_ratio, "1280x720"),
+        "seconds": video_seconds,
+    }
+
+
+def _offline_video_payload(
+    prompt: str, aspect_ratio: str, duration_seconds: int, quality: str
+) -> dict[str, Any]:
+    placeholder_text = prompt.replace(" ", "+")[:80]
+    return {
+        "url": "https://samplelib.com/lib/preview/mp4/sample-5s.mp4",
+        "thumbnail_url": f"https://placehold.co/640x360?text={placeholder_text or 'Preview'}",
+        "model": "video-placeholder",
+        "orientation": _video_orientation(aspect_ratio),
+        "aspect_ratio": aspect_ratio,
+        "duration_seconds": duration_seconds,
+        "quality": quality,
+        "revised_prompt": prompt,
+    }
+
+
+def _processing_video_payload(
+    prompt: str, *, video_id: str, aspect_ratio: str, video_seconds: str, quality: str
+) -> dict[str, Any]:
+    return {
+        "url": f"{VIDEOS_URL}/{video_id}/content",
+        "thumbnail_url": "https://placehold.co/640x360?text=Processing",
+        "model": "sora-2",
+        "orientation": _video_orientation(aspect_ratio),
+        "aspect_ratio": aspect_ratio,
+        "duration_seconds": int(video_seconds),  # Convert back to int
+        "quality": quality,
+        "revised_prompt": prompt,
+        "video_id": video_id,
+        "status": "processing",
+    }
+
+
+def _video_error_payload(
+    prompt: str, exc: Exception, *, aspect_ratio: str, video_seconds: str, quality: str
+) -> dict[str, Any]:
+    # Log the actual error for debugging
+    logger.error(f"Video generation failed: {type(exc).__name__}: {exc}")
+
+    # Check if it's an HTTP error with status code
+    error_detail = str(exc)
+    if hasattr(exc, 'response'):
+        try:
+            error_detail = f"HTTP {exc.response.status_code}: {exc.response.text[:200]}"
+        except:
+            pass
+
+    return {
+        "url": "https://samplelib.com/lib/preview/mp4/sample-5s.mp4",
+        "thumbnail_url": f"https://placehold.co/640x360?text=API+Error",
+        "model": "sora-2-fallback",
+        "orientation": _video_orientation(aspect_ratio),
+        "aspect_ratio": aspect_ratio,
+        "duration_seconds": int(video_seconds),
+        "quality": quality,
+        "revised_prompt": f"{prompt} (API Error: {error_detail})",
+        "error": error_detail,
+    }
+
+
+def _agent_plan_baseline() -> dict[str, Any]:
+    return {
+        "name": "Product Ops Companion",
+        "mission": "Automate product rituals and prepare stakeholder-ready briefs.",
+        "instructions": (
+            "You are a meticulous product operations agent. Structure updates, uncover risks, "
+            "and surface next steps with crisp, executive-ready language."
+        ),
+        "capabilities": [
+            "Summarise research, feedback, and roadmap updates",
+            "Highlight blockers across engineering, design, and GTM",
+            "Draft follow-up actions with owners and deadlines",
+        ],
+        "tools": [
+            "Notion knowledge base",
+            "Jira issue tracker",
+            "Calendar availability API",
+        ],
+        "workflow": (
+            "1. Gather the latest notes, tickets, and KPIs.\n"
+            "2. Generate a concise update tailored to the audience.\n"
+            "3. Suggest actions, owners, and timelines.\n"
+            "4. Log decisions back to the workspace for traceability."
+        ),
+        "rationale": (
+            "Designed as a baseline response when the OpenAI API isn't configured."
+        ),
+    }
+
+
+def _agent_plan_input(prompt: str) -> list[dict[str, Any]]:
+    return [
+        {
+            "role": "system",
+            "content": [{"type": "input_text", "text": AGENT_PLAN_INSTRUCTIONS}],
+        },
+        {
+            "role": "user",
+            "content": [
+                {
+                    "type": "input_text",
+                    "text": prompt,
+                }
+            ],
+        },
+    ]
+
+
+def _parse_agent_plan(output_text: str, baseline: dict[str, Any]) -> dict[str, Any]:
+    try:
+        parsed = json.loads(output_text)
+        if isinstance(parsed, dict):
+            capabilities = parsed.get("capabilities")
+            if isinstance(capabilities, list):
+                capabilities_list = [
+                    str(item).strip() for item in capabilities if str(item).strip()
+                ]
+            else:
+                capabilities_list = baseline["capabilities"]
+
+            tools = parsed.get("tools")
+            if isinstance(tools, list):
+                tools_list = [str(item).strip() for item in tools if str(item).strip()]
+            else:
+                tools_list = baseline["tools"]
+
+            workflow = parsed.get("workflow")
+            workflow_text = workflow.strip() if isinstance(workflow, str) else None
+            rationale = parsed.get("rationale")
+            rationale_text = rationale.strip() if isinstance(rationale, str) else None
+
+            return {
+                "name": (parsed.get("name") or baseline["name"]).strip(),
+                "mission": (parsed.get("mission") or baseline["mission"]).strip(),
+                "instructions": (
+                    parsed.get("instructions") or baseline["instructions"]
+                ).strip(),
+                "capabilities": capabilities_list or baseline["capabilities"],
+                "tools": tools_list or baseline["tools"],
+                "workflow": workflow_text or baseline["workflow"],
+                "rationale": rationale_text or baseline["rationale"],
+            }
+    except (TypeError, ValueError):
+        pass
+
+    return baseline
 
 
 class OpenAIMegaClient:
-    """Thin wrapper that uses the latest OpenAI responses API endpoints."""
+    """Thin wrapper that uses the latest OpenAI responses API endpoints.
+
+    Identical non-streaming Responses API calls made concurrently share one
+    upstream request through :attr:`inflight`.
+    """
 
-    def __init__(self, settings: Settings):
+    def __init__(
+        self,
+        settings: Settings,
+        http: HTTPClients | None = None,
+        resilience: Resilience | None = None,
+        limiter: RateLimiter | None = None,
+    ):
         self._settings = settings
+        self._http = http or HTTPClients(settings)
+        self._resilience = resilience or Resilience(settings)
+        self._limiter = limiter or RateLimiter(settings)
         if settings.openai_api_key:
             self._client = OpenAI(
                 api_key=settings.openai_api_key,
                 organization=settings.openai_organization,
+                http_client=self._http.client,
+                # The SDK only applies its own long default to clients left at httpx's default.
+                timeout=self._http.model_timeout,
+                # Retries are handled by ``Resilience`` behind a circuit breaker.
+                max_retries=0,
             )
         else:
             self._client = None
+        self.inflight = SingleFlight()
 
     @property
     def is_live(self) -> bool:
@@ -52,45 +431,44 @@ class OpenAIMegaClient:
 
         return self._client is not None
 
-    def chat(self, history: Iterable[dict[str, str]], *, model: str) -> dict[str, Any]:
+    def _create_response(self, *, priority: int = PRIORITY_NORMAL, **request: Any) -> Any:
+        """``responses.create`` shared by identical requests already in flight."""
+
+        def call() -> Any:
+            self._limiter.acquire_sync(
+                "openai.responses",
+                model=request["model"],
+                tokens=_request_tokens(request),
+                priority=priority,
+            )
+            return self._resilience.call(
+                "openai.responses", lambda: self._client.responses.create(**request)
+            )
+
+        return self.inflight.do(request_key(request), call)
+
+    def chat(
+        self,
+        history: Iterable[dict[str, str]],
+        *,
+        model: str,
+        priority: int = PRIORITY_INTERACTIVE,
+    ) -> dict[str, Any]:
         """Call the Responses API to generate chat completions."""
 
         if self._client is None:
-            return {
-                "role": "assistant",
-                "content": "Configure OPENAI_API_KEY to stream live responses.",
-                "model": model,
-                "usage": {},
-            }
+            return _offline_chat_payload(model)
 
         try:
-            response = self._client.responses.create(
+            response = self._create_response(
+                priority=priority,
                 model=model,
                 input=_format_history(history),
             )
-        except OpenAIError as exc:  # pragma: no cover - best effort guard
-            return {
-                "role": "assistant",
-                "content": f"OpenAI API error: {exc}",
-                "model": model,
-                "usage": {},
-            }
+        except (OpenAIError, CircuitOpenError) as exc:  # pragma: no cover - best effort guard
+            return _chat_error_payload(exc, model)
 
-        if getattr(response, "output", None):
-            output = response.output[0].content[0].text
-        else:
-            output_text = getattr(response, "output_text", "")
-            if isinstance(output_text, list):
-                output = "".join(output_text)
-            else:
-                output = output_text or ""
-        usage = response.usage or {}
-        return {
-            "role": "assistant",
-            "content": output,
-            "model": response.model,
-            "usage": usage,
-        }
+        return _chat_payload(response)
 
     def structured_chat(
         self,
@@ -101,336 +479,364 @@ class OpenAIMegaClient:
     ) -> dict[str, Any]:
         """Small helper to request JSON-style outputs using the chat interface."""
 
-        history = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ]
-        return self.chat(history, model=model)
+        return self.chat(
+            _structured_history(system_prompt, user_prompt), model=model, priority=PRIORITY_NORMAL
+        )
 
     def create_image(self, prompt: str, *, size: str, quality: str) -> dict[str, Any]:
         """Generate an image using the Images API with gpt-image-1."""
 
         if self._client is None:
-            return {
-                "url": "https://placehold.co/600x600?text=Configure+OPENAI_API_KEY",
-                "revised_prompt": prompt,
-                "model": "gpt-image-1",
-            }
-
-        # gpt-image-1 supports: 1024x1024, 1536x1024 (landscape), 1024x1536 (portrait), or auto
-        # Map common sizes to gpt-image-1 supported sizes
-        size_mapping = {
-            "256x256": "1024x1024",
-            "512x512": "1024x1024",
-            "1024x1024": "1024x1024",
-            "1536x1024": "1536x1024",
-            "1024x1536": "1024x1536",
-            "1792x1024": "1536x1024",  # Map to closest supported size
-            "1024x1792": "1024x1536",  # Map to closest supported size
-        }
-        
-        gpt_image_size = size_mapping.get(size, "auto")
-        
-        # gpt-image-1 supports: high, medium, low, or auto
-        quality_mapping = {
-            "high": "high",
-            "hd": "high",
-            "medium": "medium",
-            "standard": "medium",
-            "low": "low",
-        }
-        gpt_image_quality = quality_mapping.get(quality, "auto")
+            return _offline_image_payload(prompt)
 
         try:
             # Use gpt-image-1 which returns base64-encoded images
-            result = self._client.images.generate(
-                model="gpt-image-1",
-                prompt=prompt,
-                size=gpt_image_size,
-                quality=gpt_image_quality,
-                n=1,
-                output_format="png",
+            request = _image_request(prompt, size, quality)
+            self._limiter.acquire_sync("openai.images", model=request["model"])
+            # A paid, non-idempotent POST: only resent when it certainly never ran.
+            result = self._resilience.call(
+                "openai.images",
+                lambda: self._client.images.generate(**request),
+                idempotent=False,
             )
-        except OpenAIError as exc:  # pragma: no cover - best effort guard
-            return {
-                "url": "https://placehold.co/600x600?text=OpenAI+API+error",
-                "revised_prompt": f"{prompt} (error: {exc})",
-                "model": "gpt-image-1",
-            }
+        except (OpenAIError, CircuitOpenError) as exc:  # pragma: no cover - best effort guard
+            return _image_error_payload(prompt, exc)
 
-        data = result.data[0]
-        # gpt-image-1 returns b64_json, convert to data URL
-        if hasattr(data, "b64_json") and data.b64_json:
-            image_url = f"data:image/png;base64,{data.b64_json}"
+        return _image_payload(prompt, result)
+
+    def plan_agent(self, prompt: str) -> dict[str, Any]:
+        """Create an agent blueprint by prompting the Responses API."""
+
+        baseline = _agent_plan_baseline()
+
+        if self._client is None:
+            return baseline
+
+        try:
+            response = self._create_response(
+                model="gpt-5-chat-latest",
+                input=_agent_plan_input(prompt),
+            )
+        except (OpenAIError, CircuitOpenError):
+            return baseline
+
+        return _parse_agent_plan(_output_text(response), baseline)
+
+    def summarize_conversation(
+        self,
+        previous: str | None,
+        turns: Iterable[dict[str, str]],
+        *,
+        max_tokens: int,
+        model: str = "gpt-4.1-mini",
+    ) -> str:
+        """Fold ``turns`` into the rolling summary ``previous``."""
+
+        turns = list(turns)
+        if self._client is None:
+            return _offline_summary(previous, turns, max_tokens)
+        try:
+            response = self._create_response(
+                priority=PRIORITY_BACKGROUND,
+                model=model,
+                input=_format_history(_summary_history(previous, turns, max_tokens)),
+                max_output_tokens=max_tokens,
+            )
+        except (OpenAIError, CircuitOpenError, UpstreamBusyError):
+            return _offline_summary(previous, turns, max_tokens)
+        return _output_text(response).strip() or _offline_summary(previous, turns, max_tokens)
+
+
+class AsyncOpenAIMegaClient:
+    """Async counterpart of :class:`OpenAIMegaClient` for ``async def`` routes.
+
+    Uses ``AsyncOpenAI`` and the shared pooled ``httpx.AsyncClient`` so waiting
+    on upstream I/O never occupies a threadpool worker.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        http: HTTPClients | None = None,
+        resilience: Resilience | None = None,
+        limiter: RateLimiter | None = None,
+    ):
+        self._settings = settings
+        self._http = http or HTTPClients(settings)
+        self._resilience = resilience or Resilience(settings)
+        self._limiter = limiter or RateLimiter(settings)
+        if settings.openai_api_key:
+            self._client = AsyncOpenAI(
+                api_key=settings.openai_api_key,
+                organization=settings.openai_organization,
+                http_client=self._http.async_client,
+                # The SDK only applies its own long default to clients left at httpx's default.
+                timeout=self._http.model_timeout,
+                # Retries are handled by ``Resilience`` behind a circuit breaker.
+                max_retries=0,
+            )
         else:
-            # Fallback to url if available
-            image_url = getattr(data, "url", "https://placehold.co/600x600?text=No+Image+Data")
-        
-        return {
-            "url": image_url,
-            "revised_prompt": getattr(data, "revised_prompt", prompt),
-            "model": "gpt-image-1",
-        }
+            self._client = None
+        self.inflight = AsyncSingleFlight()
 
-    def create_video(
-        self, prompt: str, *, aspect_ratio: str, duration_seconds: int, quality: str
+    @property
+    def is_live(self) -> bool:
+        """Return True when the OpenAI client is configured with a real API key."""
+
+        return self._client is not None
+
+    async def _create_response(self, *, priority: int = PRIORITY_NORMAL, **request: Any) -> Any:
+        """``responses.create`` shared by identical requests already in flight."""
+
+        async def call() -> Any:
+            await self._limiter.acquire(
+                "openai.responses",
+                model=request["model"],
+                tokens=_request_tokens(request),
+                priority=priority,
+            )
+            return await self._resilience.acall(
+                "openai.responses", lambda: self._client.responses.create(**request)
+            )
+
+        return await self.inflight.do(request_key(request), call)
+
+    async def chat(
+        self,
+        history: Iterable[dict[str, str]],
+        *,
+        model: str,
+        priority: int = PRIORITY_INTERACTIVE,
     ) -> dict[str, Any]:
-        """Generate a video using the OpenAI Sora video generation API.
-        
-        This uses the real /videos endpoint which is an asynchronous process:
-        1. POST /videos to start a render job
-        2. GET /videos/{video_id} to poll for completion status
-        3. GET /videos/{video_id}/content to fetch the final MP4
+        """Call the Responses API to generate chat completions."""
+
+        if self._client is None:
+            return _offline_chat_payload(model)
+
+        try:
+            response = await self._create_response(
+                priority=priority,
+                model=model,
+                input=_format_history(history),
+            )
+        except (OpenAIError, CircuitOpenError) as exc:  # pragma: no cover - best effort guard
+            return _chat_error_payload(exc, model)
+
+        return _chat_payload(response)
+
+    async def stream_chat(
+        self, history: Iterable[dict[str, str]], *, model: str
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Stream a Responses API reply as text deltas followed by a final event.
+
+        Yields ``{"type": "delta", "delta": str}`` for every output text chunk and
+        finishes with ``{"type": "completed", ...}`` carrying the same payload shape
+        returned by :meth:`chat`.
         """
 
         if self._client is None:
-            orientation = "vertical" if aspect_ratio in {"9:16", "3:4"} else "landscape"
-            placeholder_text = prompt.replace(" ", "+")[:80]
-            return {
-                "url": "https://samplelib.com/lib/preview/mp4/sample-5s.mp4",
-                "thumbnail_url": f"https://placehold.co/640x360?text={placeholder_text or 'Preview'}",
-                "model": "video-placeholder",
-                "orientation": orientation,
-                "aspect_ratio": aspect_ratio,
-                "duration_seconds": duration_seconds,
-                "quality": quality,
-                "revised_prompt": prompt,
+            payload = _offline_chat_payload(model)
+            yield {"type": "delta", "delta": payload["content"]}
+            yield {"type": "completed", **payload}
+            return
+
+        chunks: list[str] = []
+        try:
+            request = {"model": model, "input": _format_history(history)}
+            await self._limiter.acquire(
+                "openai.responses",
+                model=model,
+                tokens=_request_tokens(request),
+                priority=PRIORITY_INTERACTIVE,
+            )
+            # Only opening the stream is retried; nothing has been relayed yet.
+            stream = await self._resilience.acall(
+                "openai.responses",
+                lambda: self._client.responses.create(**request, stream=True),
+            )
+            response = None
+            async for event in stream:
+                event_type = getattr(event, "type", "")
+                if event_type == "response.output_text.delta":
+                    delta = getattr(event, "delta", "") or ""
+                    if delta:
+                        chunks.append(delta)
+                        yield {"type": "delta", "delta": delta}
+                elif event_type == "response.completed":
+                    response = getattr(event, "response", None)
+        # The SSE response has already started, so a shed request is reported in-stream.
+        except (OpenAIError, CircuitOpenError, UpstreamBusyError) as exc:  # pragma: no cover
+            message = f"OpenAI API error: {exc}"
+            yield {"type": "delta", "delta": message}
+            yield {
+                "type": "completed",
+                "role": "assistant",
+                "content": "".join(chunks) + message,
+                "model": model,
+                "usage": {},
             }
+            return
 
-        # Map aspect ratio to video size (sora-2 supports various sizes)
-        size_mapping = {
-            "16:9": "1280x720",    # landscape
-            "9:16": "720x1280",    # portrait
-            "1:1": "1024x1024",    # square
-            "4:3": "1024x768",     # standard
-            "3:4": "768x1024",     # portrait standard
+        yield {
+            "type": "completed",
+            "role": "assistant",
+            "content": "".join(chunks),
+            "model": getattr(response, "model", None) or model,
+            "usage": getattr(response, "usage", None) or {},
         }
-        video_size = size_mapping.get(aspect_ratio, "1280x720")
-        
-        # Sora-2 only supports specific durations: 4, 8, or 12 seconds
-        # Map the requested duration to the nearest supported value
-        if duration_seconds <= 4:
-            video_seconds = "4"
-        elif duration_seconds <= 8:
-            video_seconds = "8"
-        else:
-            video_seconds = "12"
+
+    async def structured_chat(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        *,
+        model: str = "gpt-4.1-mini",
+    ) -> dict[str, Any]:
+        """Small helper to request JSON-style outputs using the chat interface."""
+
+        return await self.chat(
+            _structured_history(system_prompt, user_prompt), model=model, priority=PRIORITY_NORMAL
+        )
+
+    async def create_image(self, prompt: str, *, size: str, quality: str) -> dict[str, Any]:
+        """Generate an image using the Images API with gpt-image-1."""
+
+        if self._client is None:
+            return _offline_image_payload(prompt)
 
         try:
-            # Start a video render job using the Videos API
-            
-            headers = {
-                "Authorization": f"Bearer {self._settings.openai_api_key}",
-                "Content-Type": "application/json",
-            }
-            
-            # Start the render job with JSON payload
-            response = httpx.post(
-                "https://api.openai.com/v1/videos",
-                headers=headers,
-                json={
-                    "prompt": prompt,
-                    "model": "sora-2",
-                    "size": video_size,
-                    "seconds": video_seconds,
-                },
-                timeout=30.0,
+            request = _image_request(prompt, size, quality)
+            await self._limiter.acquire("openai.images", model=request["model"])
+            # A paid, non-idempotent POST: only resent when it certainly never ran.
+            result = await self._resilience.acall(
+                "openai.images",
+                lambda: self._client.images.generate(**request),
+                idempotent=False,
             )
-            response.raise_for_status()
-            job_data = response.json()
-            
-            video_id = job_data.get("id")
+        except (OpenAIError, CircuitOpenError) as exc:  # pragma: no cover - best effort guard
+            return _image_error_payload(prompt, exc)
+
+        return _image_payload(prompt, result)
+
+    async def start_video(
+        self, prompt: str, *, aspect_ratio: str, duration_seconds: int, quality: str
+    ) -> dict[str, Any]:
+        """Submit a Sora render job and return without waiting for it to finish.
+
+        Live submissions come back with ``status="processing"`` and the upstream
+        ``video_id``; completion is tracked by :class:`app.jobs.VideoJobManager`.
+        Offline and failed submissions return a sample-clip placeholder and
+        carry no ``video_id``.
+        """
+
+        if self._client is None:
+            return _offline_video_payload(prompt, aspect_ratio, duration_seconds, quality)
+
+        video_seconds = _video_seconds(duration_seconds)
+        # Outside the fallback below, so a shed submission surfaces as a 503.
+        await self._limiter.acquire("openai.videos", model=VIDEO_MODEL)
+
+        try:
+            async def submit() -> httpx.Response:
+                response = await self._http.async_client.post(
+                    VIDEOS_URL,
+                    headers=_video_headers(self._settings.openai_api_key),
+                    json=_video_request(prompt, aspect_ratio, video_seconds),
+                )
+                return response.raise_for_status()
+
+            response = await self._resilience.acall("openai.videos", submit, idempotent=False)
+            video_id = response.json().get("id")
             if not video_id:
                 raise ValueError("No video ID returned from API")
-            
-            # Poll for completion (with timeout)
-            max_attempts = 60  # 60 attempts = ~5 minutes with 5s intervals
-            attempt = 0
-            
-            while attempt < max_attempts:
-                status_response = httpx.get(
-                    f"https://api.openai.com/v1/videos/{video_id}",
-                    headers=headers,
-                    timeout=30.0,
-                )
-                status_response.raise_for_status()
-                status_data = status_response.json()
-                
-                status = status_data.get("status")
-                
-                if status == "completed":
-                    # Fetch the final video content URL
-                    content_url = f"https://api.openai.com/v1/videos/{video_id}/content"
-                    
-                    orientation = "vertical" if aspect_ratio in {"9:16", "3:4"} else "landscape"
-                    
-                    return {
-                        "url": content_url,
-                        "thumbnail_url": status_data.get("thumbnail_url", "https://placehold.co/640x360?text=Video+Ready"),
-                        "model": "sora-2",
-                        "orientation": orientation,
-                        "aspect_ratio": aspect_ratio,
-                        "duration_seconds": int(video_seconds),  # Convert back to int
-                        "quality": quality,
-                        "revised_prompt": status_data.get("revised_prompt", prompt),
-                        "video_id": video_id,
-                    }
-                elif status == "failed":
-                    error_msg = status_data.get("error", "Unknown error")
-                    raise ValueError(f"Video generation failed: {error_msg}")
-                
-                # Still processing, wait before polling again
-                time.sleep(5)
-                attempt += 1
-            
-            # Timeout - return partial result
-            orientation = "vertical" if aspect_ratio in {"9:16", "3:4"} else "landscape"
-            return {
-                "url": f"https://api.openai.com/v1/videos/{video_id}/content",
-                "thumbnail_url": "https://placehold.co/640x360?text=Processing",
-                "model": "sora-2",
-                "orientation": orientation,
-                "aspect_ratio": aspect_ratio,
-                "duration_seconds": int(video_seconds),  # Convert back to int
-                "quality": quality,
-                "revised_prompt": prompt,
-                "video_id": video_id,
-                "status": "processing",
-            }
-            
         except Exception as exc:  # pragma: no cover - defensive guard
-            # Log the actual error for debugging
-            logger.error(f"Video generation failed: {type(exc).__name__}: {exc}")
-            
-            orientation = "vertical" if aspect_ratio in {"9:16", "3:4"} else "landscape"
-            
-            # Check if it's an HTTP error with status code
-            error_detail = str(exc)
-            if hasattr(exc, 'response'):
-                try:
-                    error_detail = f"HTTP {exc.response.status_code}: {exc.response.text[:200]}"
-                except:
-                    pass
-            
-            return {
-                "url": "https://samplelib.com/lib/preview/mp4/sample-5s.mp4",
-                "thumbnail_url": f"https://placehold.co/640x360?text=API+Error",
-                "model": "sora-2-fallback",
-                "orientation": orientation,
-                "aspect_ratio": aspect_ratio,
-                "duration_seconds": int(video_seconds) if isinstance(video_seconds, str) else duration_seconds,
-                "quality": quality,
-                "revised_prompt": f"{prompt} (API Error: {error_detail})",
-                "error": error_detail,
-            }
+            return _video_error_payload(
+                prompt,
+                exc,
+                aspect_ratio=aspect_ratio,
+                video_seconds=video_seconds,
+                quality=quality,
+            )
 
-    def plan_agent(self, prompt: str) -> dict[str, Any]:
+        return _processing_video_payload(
+            prompt,
+            video_id=video_id,
+            aspect_ratio=aspect_ratio,
+            video_seconds=video_seconds,
+            quality=quality,
+        )
+
+    async def fetch_video_statuses(self, video_ids: Iterable[str]) -> dict[str, dict[str, Any]]:
+        """Fetch the status of several Sora jobs concurrently over one connection pool.
+
+        Ids whose status request fails are left out of the result so the caller
+        simply retries them on its next poll.
+        """
+
+        ids = list(dict.fromkeys(video_ids))
+        if self._client is None or not ids:
+            return {}
+
+        headers = _video_headers(self._settings.openai_api_key)
+        client = self._http.async_client
+
+        async def fetch(video_id: str) -> dict[str, Any]:
+            async def get() -> httpx.Response:
+                response = await client.get(f"{VIDEOS_URL}/{video_id}", headers=headers)
+                return response.raise_for_status()
+
+            return (await self._resilience.acall("openai.videos", get)).json()
+
+        results = await asyncio.gather(
+            *(fetch(video_id) for video_id in ids), return_exceptions=True
+        )
+
+        statuses: dict[str, dict[str, Any]] = {}
+        for video_id, result in zip(ids, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Video status check failed for {video_id}: {result}")
+                continue
+            statuses[video_id] = result
+        return statuses
+
+    async def plan_agent(self, prompt: str) -> dict[str, Any]:
         """Create an agent blueprint by prompting the Responses API."""
 
-        baseline = {
-            "name": "Product Ops Companion",
-            "mission": "Automate product rituals and prepare stakeholder-ready briefs.",
-            "instructions": (
-                "You are a meticulous product operations agent. Structure updates, uncover risks, "
-                "and surface next steps with crisp, executive-ready language."
-            ),
-            "capabilities": [
-                "Summarise research, feedback, and roadmap updates",
-                "Highlight blockers across engineering, design, and GTM",
-                "Draft follow-up actions with owners and deadlines",
-            ],
-            "tools": [
-                "Notion knowledge base",
-                "Jira issue tracker",
-                "Calendar availability API",
-            ],
-            "workflow": (
-                "1. Gather the latest notes, tickets, and KPIs.\n"
-                "2. Generate a concise update tailored to the audience.\n"
-                "3. Suggest actions, owners, and timelines.\n"
-                "4. Log decisions back to the workspace for traceability."
-            ),
-            "rationale": (
-                "Designed as a baseline response when the OpenAI API isn't configured."
-            ),
-        }
+        baseline = _agent_plan_baseline()
 
         if self._client is None:
             return baseline
 
-        instructions = (
-            "You are an expert OpenAI agent architect. Given a product or operations brief, "
-            "design an autonomous agent. Respond strictly as minified JSON with the keys "
-            "name, mission, instructions, capabilities (array of strings), tools (array of strings), "
-            "workflow (string) and rationale (string). Ensure arrays are concise."
-        )
-
         try:
-            response = self._client.responses.create(
+            response = await self._create_response(
                 model="gpt-5-chat-latest",
-                input=[
-                    {
-                        "role": "system",
-                        "content": [{"type": "input_text", "text": instructions}],
-                    },
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "input_text",
-                                "text": prompt,
-                            }
-                        ],
-                    },
-                ],
+                input=_agent_plan_input(prompt),
             )
-        except OpenAIError:
+        except (OpenAIError, CircuitOpenError):
             return baseline
 
-        output_text = ""
-        if getattr(response, "output", None):
-            output_text = response.output[0].content[0].text
-        else:
-            raw = getattr(response, "output_text", "")
-            if isinstance(raw, list):
-                output_text = "".join(raw)
-            else:
-                output_text = raw or ""
+        return _parse_agent_plan(_output_text(response), baseline)
 
-        try:
-            parsed = json.loads(output_text)
-            if isinstance(parsed, dict):
-                capabilities = parsed.get("capabilities")
-                if isinstance(capabilities, list):
-                    capabilities_list = [
-                        str(item).strip() for item in capabilities if str(item).strip()
-                    ]
-                else:
-                    capabilities_list = baseline["capabilities"]
-
-                tools = parsed.get("tools")
-                if isinstance(tools, list):
-                    tools_list = [str(item).strip() for item in tools if str(item).strip()]
-                else:
-                    tools_list = baseline["tools"]
-
-                workflow = parsed.get("workflow")
-                workflow_text = workflow.strip() if isinstance(workflow, str) else None
-                rationale = parsed.get("rationale")
-                rationale_text = rationale.strip() if isinstance(rationale, str) else None
-
-                return {
-                    "name": (parsed.get("name") or baseline["name"]).strip(),
-                    "mission": (parsed.get("mission") or baseline["mission"]).strip(),
-                    "instructions": (
-                        parsed.get("instructions") or baseline["instructions"]
-                    ).strip(),
-                    "capabilities": capabilities_list or baseline["capabilities"],
-                    "tools": tools_list or baseline["tools"],
-                    "workflow": workflow_text or baseline["workflow"],
-                    "rationale": rationale_text or baseline["rationale"],
-                }
-        except (TypeError, ValueError):
-            pass
+    async def summarize_conversation(
+        self,
+        previous: str | None,
+        turns: Iterable[dict[str, str]],
+        *,
+        max_tokens: int,
+        model: str = "gpt-4.1-mini",
+    ) -> str:
+        """Fold ``turns`` into the rolling summary ``previous``."""
 
-        return baseline
+        turns = list(turns)
+        if self._client is None:
+            return _offline_summary(previous, turns, max_tokens)
+        try:
+            response = await self._create_response(
+                priority=PRIORITY_BACKGROUND,
+                model=model,
+                input=_format_history(_summary_history(previous, turns, max_tokens)),
+                max_output_tokens=max_tokens,
+            )
+        except (OpenAIError, CircuitOpenError, UpstreamBusyError):
+            return _offline_summary(previous, turns, max_tokens)
+        return _output_text(response).strip() or _offline_summary(previous, turns, max_tokens)
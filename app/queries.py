@@ -0,0 +1,88 @@
+"""Eager-loading plans for the endpoints that serialize lists of ORM rows."""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, selectinload, undefer
+
+from .database import Conversation, Gallery, GalleryAsset, GalleryAssetLink, engine
+
+
+def asset_membership_options() -> tuple:
+    """Load ``GalleryAsset.gallery_ids`` for a batch of assets in one query."""
+
+    return (selectinload(GalleryAsset.galleries).load_only(Gallery.id),)
+
+
+def gallery_options() -> tuple:
+    """Load galleries with their assets and memberships in two extra queries."""
+
+    return (
+        selectinload(Gallery.assets)
+        .selectinload(GalleryAsset.galleries)
+        .load_only(Gallery.id),
+    )
+
+
+def conversation_summary_options() -> tuple:
+    return (undefer(Conversation.message_count),)
+
+
+def load_gallery(db: Session, gallery_id: int) -> Optional[Gallery]:
+    """Fetch one gallery ready for ``GalleryRead``, refreshing any cached copy."""
+
+    return (
+        db.query(Gallery)
+        .options(*gallery_options())
+        .populate_existing()
+        .filter(Gallery.id == gallery_id)
+        .one_or_none()
+    )
+
+
+def gallery_assets_query(db: Session, gallery_id: int):
+    return (
+        db.query(GalleryAsset)
+        .join(GalleryAssetLink, GalleryAssetLink.asset_id == GalleryAsset.id)
+        .filter(GalleryAssetLink.gallery_id == gallery_id)
+        .options(*asset_membership_options())
+        .order_by(GalleryAsset.created_at.desc())
+    )
+
+
+@contextmanager
+def count_queries(bind: Engine = engine) -> Iterator[list[str]]:
+    """Collect the SQL statements executed on ``bind`` inside the block."""
+
+    statements: list[str] = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(bind, "before_cursor_execute", _record)
+    try:
+        yield statements
+    finally:
+        event.remove(bind, "before_cursor_execute", _record)
+
+
+@contextmanager
+def assert_max_queries(limit: int, bind: Engine = engine) -> Iterator[list[str]]:
+    """Fail when the block issues more than ``limit`` statements.
+
+    Used to pin the query budget of list endpoints, e.g.::
+
+        with assert_max_queries(3):
+            client.get("/api/galleries")
+    """
+
+    with count_queries(bind) as statements:
+        yield statements
+    if len(statements) > limit:
+        listing = "\n".join(f"  {sql}" for sql in statements)
+        raise AssertionError(
+            f"Expected at most {limit} queries, got {len(statements)}:\n{listing}"
+        )
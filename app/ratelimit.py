@@ -0,0 +1,251 @@
+"""Token-bucket admission control for upstream APIs, shared through SQLite."""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from sqlalchemy import case, func, update
+from sqlalchemy.dialects.sqlite import insert
+
+from .config import RateLimit, Settings
+from .database import RateLimitBucket, session_scope
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BACKGROUND = 2
+
+# Longest a queue head sleeps before re-reading the shared buckets, so it
+# notices capacity freed by other workers' refunds or config changes.
+MAX_POLL_SECONDS = 1.0
+
+
+class UpstreamBusyError(Exception):
+    """The admission queue for an upstream is full or the wait ran out."""
+
+    def __init__(self, lane: str, retry_after: float):
+        super().__init__(f"{lane} is saturated; retry in {max(1, math.ceil(retry_after))}s")
+        self.lane = lane
+        self.retry_after = retry_after
+
+
+def estimate_tokens(request: Any) -> int:
+    """Cheap upper-bound-ish token estimate (~4 characters per token)."""
+
+    text = request if isinstance(request, str) else json.dumps(request, default=str)
+    return (len(text) + 3) // 4
+
+
+def _take(buckets: list[tuple[str, int, float]], now: float) -> float:
+    """Atomically take ``cost`` from every ``(name, per_minute, cost)`` bucket.
+
+    Returns ``0`` when all were granted, otherwise the seconds until the
+    scarcest bucket can cover its cost; nothing is consumed in that case.
+    The first UPDATE takes SQLite's write lock, so the check-and-take is
+    atomic across worker processes.
+    """
+
+    table = RateLimitBucket.__table__
+    granted: list[tuple[str, int, float]] = []
+    wait = 0.0
+    with session_scope() as session:
+        connection = session.connection()
+        for name, per_minute, cost in buckets:
+            rate = per_minute / 60.0
+            connection.execute(
+                insert(table)
+                .values(name=name, tokens=float(per_minute), refilled_at=now, granted=0)
+                .on_conflict_do_nothing()
+            )
+            refilled = func.min(
+                float(per_minute), table.c.tokens + (now - table.c.refilled_at) * rate
+            )
+            row = connection.execute(
+                update(table)
+                .where(table.c.name == name)
+                .values(
+                    tokens=case((refilled >= cost, refilled - cost), else_=refilled),
+                    granted=case((refilled >= cost, 1), else_=0),
+                    refilled_at=now,
+                )
+                .returning(table.c.tokens, table.c.granted)
+            ).one()
+            if row.granted:
+                granted.append((name, per_minute, cost))
+            else:
+                wait = max(wait, (cost - row.tokens) / rate)
+        if wait:
+            _give_back(connection, granted)
+    return wait
+
+
+def _give_back(connection: Any, buckets: list[tuple[str, int, float]]) -> None:
+    table = RateLimitBucket.__table__
+    for name, per_minute, cost in buckets:
+        connection.execute(
+            update(table)
+            .where(table.c.name == name)
+            .values(tokens=func.min(float(per_minute), table.c.tokens + cost))
+        )
+
+
+def _refund(buckets: list[tuple[str, int, float]]) -> None:
+    """Return tokens taken for a caller that is no longer waiting for them."""
+
+    with session_scope() as session:
+        _give_back(session.connection(), buckets)
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    buckets: list = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class _Lane:
+    def __init__(self) -> None:
+        self.heap: list[_Waiter] = []
+        self.pump: Optional[asyncio.Task] = None
+        self.granted = 0
+        self.shed = 0
+
+
+class RateLimiter:
+    """Per-endpoint and per-model token buckets with a bounded priority queue.
+
+    Bucket levels live in the ``rate_limit_buckets`` table so every uvicorn
+    worker draws from the same budget. Within a worker, callers that cannot
+    be admitted wait in a queue ordered by priority then arrival; when the
+    queue is full, or a caller would wait longer than ``max_wait``, it is shed
+    with :class:`UpstreamBusyError`.
+    """
+
+    def __init__(self, settings: Settings):
+        self.limits: dict[str, RateLimit] = settings.upstream_rate_limits
+        self.queue_size = settings.rate_limit_queue_size
+        self.max_wait = settings.rate_limit_max_wait_seconds
+        self._lanes: dict[str, _Lane] = {}
+        self._seq = itertools.count()
+        self._sync_queue: list[tuple[int, int]] = []
+        self._sync_ready = threading.Condition()
+
+    def _buckets(
+        self, endpoint: str, model: Optional[str], tokens: int
+    ) -> tuple[str, list[tuple[str, int, float]]]:
+        lane = f"{endpoint}:{model}" if model else endpoint
+        limit = self.limits.get(lane) or self.limits.get(endpoint)
+        buckets: list[tuple[str, int, float]] = []
+        if limit is not None and limit.rpm > 0:
+            buckets.append((f"{lane}:rpm", limit.rpm, 1.0))
+        if limit is not None and limit.tpm > 0 and tokens:
+            # A request larger than a whole minute's budget still gets through alone.
+            buckets.append((f"{lane}:tpm", limit.tpm, float(min(tokens, limit.tpm))))
+        return lane, buckets
+
+    async def acquire(
+        self,
+        endpoint: str,
+        *,
+        model: Optional[str] = None,
+        tokens: int = 0,
+        priority: int = PRIORITY_NORMAL,
+    ) -> None:
+        lane_name, buckets = self._buckets(endpoint, model, tokens)
+        if not buckets:
+            return
+        lane = self._lanes.setdefault(lane_name, _Lane())
+        if not lane.heap and not await asyncio.to_thread(_take, buckets, time.time()):
+            lane.granted += 1
+            return
+        if len(lane.heap) >= self.queue_size:
+            lane.shed += 1
+            raise UpstreamBusyError(lane_name, self.max_wait)
+
+        waiter = _Waiter(
+            priority, next(self._seq), buckets, asyncio.get_running_loop().create_future()
+        )
+        heapq.heappush(lane.heap, waiter)
+        if lane.pump is None or lane.pump.done():
+            lane.pump = asyncio.create_task(self._pump(lane))
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.max_wait)
+        except asyncio.TimeoutError:
+            if waiter in lane.heap:
+                lane.heap.remove(waiter)
+                heapq.heapify(lane.heap)
+            if not waiter.future.done() or waiter.future.cancelled():
+                lane.shed += 1
+                raise UpstreamBusyError(lane_name, self.max_wait) from None
+        except asyncio.CancelledError:
+            if waiter in lane.heap:
+                lane.heap.remove(waiter)
+                heapq.heapify(lane.heap)
+            raise
+
+    async def _pump(self, lane: _Lane) -> None:
+        """Admit the head of ``lane`` whenever its buckets can cover it."""
+
+        while lane.heap:
+            head = lane.heap[0]
+            wait = await asyncio.to_thread(_take, head.buckets, time.time())
+            if not wait:
+                if lane.heap and lane.heap[0] is head:
+                    heapq.heappop(lane.heap)
+                    lane.granted += 1
+                    head.future.set_result(None)
+                else:
+                    # The head timed out or was cancelled while its tokens were taken.
+                    await asyncio.to_thread(_refund, head.buckets)
+                continue
+            await asyncio.sleep(min(wait, MAX_POLL_SECONDS))
+
+    def acquire_sync(
+        self,
+        endpoint: str,
+        *,
+        model: Optional[str] = None,
+        tokens: int = 0,
+        priority: int = PRIORITY_NORMAL,
+    ) -> None:
+        """Blocking variant for the sync client; callers queue by priority then arrival."""
+
+        lane_name, buckets = self._buckets(endpoint, model, tokens)
+        if not buckets:
+            return
+        deadline = time.monotonic() + self.max_wait
+        ticket = (priority, next(self._seq))
+        with self._sync_ready:
+            heapq.heappush(self._sync_queue, ticket)
+            try:
+                while True:
+                    if self._sync_queue[0] != ticket:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise UpstreamBusyError(lane_name, self.max_wait)
+                        self._sync_ready.wait(min(remaining, MAX_POLL_SECONDS))
+                        continue
+                    wait = _take(buckets, time.time())
+                    if not wait:
+                        return
+                    if time.monotonic() + wait > deadline:
+                        raise UpstreamBusyError(lane_name, wait)
+                    # Waiting releases the lock, so a more urgent caller can take the head.
+                    self._sync_ready.wait(min(wait, MAX_POLL_SECONDS))
+            finally:
+                self._sync_queue.remove(ticket)
+                heapq.heapify(self._sync_queue)
+                self._sync_ready.notify_all()
+
+    def snapshot(self) -> dict[str, dict[str, int]]:
+        return {
+            name: {"queued": len(lane.heap), "granted": lane.granted, "shed": lane.shed}
+            for name, lane in self._lanes.items()
+        }
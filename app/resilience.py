@@ -0,0 +1,257 @@
+"""Retry with backoff and per-endpoint circuit breakers for upstream calls."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+import httpx
+from openai import APIConnectionError
+
+from .config import Settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling upstream while an endpoint's breaker is open."""
+
+    def __init__(self, endpoint: str, retry_in: float):
+        super().__init__(f"{endpoint} is unavailable; retrying in {retry_in:.0f}s")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+def _response(exc: BaseException) -> Optional[httpx.Response]:
+    response = getattr(exc, "response", None)
+    return response if isinstance(response, httpx.Response) else None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Transport failures, timeouts and 408/409/429/5xx responses are worth retrying."""
+
+    if isinstance(exc, (httpx.TransportError, APIConnectionError)):
+        return True
+    response = _response(exc)
+    return response is not None and response.status_code in RETRYABLE_STATUSES
+
+
+def is_safe_to_resend(exc: BaseException) -> bool:
+    """Whether the upstream certainly did not act on a non-idempotent request."""
+
+    if isinstance(exc, APIConnectionError) and exc.__cause__ is not None:
+        # The SDK wraps the transport error it got from httpx.
+        exc = exc.__cause__
+    if isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout)):
+        return True
+    response = _response(exc)
+    return response is not None and response.status_code in {429, 503}
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Delay requested by ``retry-after-ms`` or ``Retry-After`` (seconds or HTTP date)."""
+
+    response = _response(exc)
+    if response is None:
+        return None
+    headers = response.headers
+    if "retry-after-ms" in headers:
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """Closed → open after ``failure_threshold`` consecutive failures.
+
+    While open every call fails fast with :class:`CircuitOpenError`; after
+    ``reset_seconds`` a single half-open probe is let through and its outcome
+    closes or re-opens the breaker.
+    """
+
+    def __init__(self, endpoint: str, *, failure_threshold: int, reset_seconds: float):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.retries = 0
+        self.rejected = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            elapsed = time.monotonic() - self.opened_at
+            if self.state == OPEN and elapsed >= self.reset_seconds:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            self.rejected += 1
+            raise CircuitOpenError(self.endpoint, max(self.reset_seconds - elapsed, 0.0))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def release_probe(self) -> None:
+        """Let the next caller probe when this one was cancelled before an outcome."""
+
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.warning(
+                        "Circuit for %s opened after %d failures", self.endpoint, self.failures
+                    )
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "retries": self.retries,
+                "rejected": self.rejected,
+            }
+
+
+class Resilience:
+    """Runs upstream calls with jittered exponential retry behind a breaker.
+
+    ``endpoint`` names the breaker, e.g. ``openai.responses``. Only
+    :func:`is_retryable` errors are retried and counted as failures; any other
+    exception (a 400, a validation error) propagates at once and counts as a
+    healthy upstream. Calls that create upstream jobs pass
+    ``idempotent=False`` and are only resent when :func:`is_safe_to_resend`.
+    """
+
+    def __init__(self, settings: Settings):
+        self.attempts = max(settings.upstream_retry_attempts, 1)
+        self.base_delay = settings.upstream_retry_base_delay_seconds
+        self.max_delay = settings.upstream_retry_max_delay_seconds
+        self.failure_threshold = settings.circuit_failure_threshold
+        self.reset_seconds = settings.circuit_reset_seconds
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(endpoint)
+            if breaker is None:
+                breaker = self._breakers[endpoint] = CircuitBreaker(
+                    endpoint,
+                    failure_threshold=self.failure_threshold,
+                    reset_seconds=self.reset_seconds,
+                )
+            return breaker
+
+    def _next_delay(self, attempt: int, exc: BaseException, idempotent: bool) -> Optional[float]:
+        """Seconds to wait before retry ``attempt + 1``, or ``None`` to give up."""
+
+        if attempt + 1 >= self.attempts:
+            return None
+        if not idempotent and not is_safe_to_resend(exc):
+            return None
+        requested = retry_after_seconds(exc)
+        if requested is not None:
+            # Waiting longer than our own cap would only hold a worker hostage.
+            return requested if requested <= self.max_delay else None
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def call(self, endpoint: str, fn: Callable[[], T], *, idempotent: bool = True) -> T:
+        breaker = self.breaker(endpoint)
+        attempt = 0
+        while True:
+            breaker.before_call()
+            try:
+                result = fn()
+            except Exception as exc:
+                delay = self._on_failure(breaker, attempt, exc, idempotent)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                # Cancellation or interpreter exit says nothing about the upstream.
+                breaker.release_probe()
+                raise
+            breaker.record_success()
+            return result
+
+    async def acall(
+        self, endpoint: str, fn: Callable[[], Awaitable[T]], *, idempotent: bool = True
+    ) -> T:
+        breaker = self.breaker(endpoint)
+        attempt = 0
+        while True:
+            breaker.before_call()
+            try:
+                result = await fn()
+            except Exception as exc:
+                delay = self._on_failure(breaker, attempt, exc, idempotent)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                # Cancellation or interpreter exit says nothing about the upstream.
+                breaker.release_probe()
+                raise
+            breaker.record_success()
+            return result
+
+    def _on_failure(
+        self, breaker: CircuitBreaker, attempt: int, exc: BaseException, idempotent: bool
+    ) -> Optional[float]:
+        if not is_retryable(exc):
+            breaker.record_success()
+            return None
+        breaker.record_failure()
+        delay = self._next_delay(attempt, exc, idempotent)
+        if delay is not None:
+            breaker.retries += 1
+        return delay
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.endpoint: breaker.snapshot() for breaker in breakers}
@@ -0,0 +1,152 @@
+"""Two-tier cache for structured widget responses."""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import delete, select
+
+from .database import ResponseCacheEntry, session_scope
+
+# Values of the ``X-Response-Cache`` request header.
+CACHE_DEFAULT = "default"
+CACHE_REFRESH = "refresh"  # skip lookups but store the fresh response
+CACHE_BYPASS = "bypass"  # neither read nor write
+CACHE_MODES = {CACHE_DEFAULT, CACHE_REFRESH, CACHE_BYPASS}
+
+
+def cache_mode(cache_control: Optional[str], override: Optional[str]) -> str:
+    """Map ``X-Response-Cache`` or standard ``Cache-Control`` directives to a mode."""
+
+    if override:
+        mode = override.strip().lower()
+        return mode if mode in CACHE_MODES else CACHE_DEFAULT
+    directives = {part.strip().lower() for part in (cache_control or "").split(",")}
+    if "no-store" in directives:
+        return CACHE_BYPASS
+    if "no-cache" in directives:
+        return CACHE_REFRESH
+    return CACHE_DEFAULT
+
+
+class ResponseCache:
+    """In-memory LRU in front of the ``response_cache`` table.
+
+    Keys hash the model with both prompts, so only byte-identical requests
+    share an entry. Both tiers expire entries after ``ttl_seconds``; the table
+    drops its least recently used rows once it holds more than
+    ``disk_entries``.
+    """
+
+    def __init__(self, *, ttl_seconds: int, memory_entries: int, disk_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self._memory: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bypasses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    @staticmethod
+    def key(model: str, system_prompt: str, user_prompt: str) -> str:
+        digest = hashlib.sha256()
+        for part in (
+            model,
+            hashlib.sha256(system_prompt.encode("utf-8")).hexdigest(),
+            hashlib.sha256(user_prompt.encode("utf-8")).hexdigest(),
+        ):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get_memory(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return value
+
+    def get_disk(self, key: str) -> Optional[Any]:
+        """Read the SQLite tier and promote a live hit into memory."""
+
+        now = datetime.utcnow()
+        with session_scope() as session:
+            entry = session.get(ResponseCacheEntry, key)
+            if entry is None or entry.expires_at <= now:
+                self.misses += 1
+                return None
+            entry.accessed_at = now
+            value = json.loads(entry.value)
+            remaining = (entry.expires_at - now).total_seconds()
+        self.disk_hits += 1
+        self._remember(key, value, time.time() + remaining)
+        return value
+
+    def put(self, key: str, model: str, value: Any) -> None:
+        now = datetime.utcnow()
+        self._remember(key, value, time.time() + self.ttl_seconds)
+        with session_scope() as session:
+            session.merge(
+                ResponseCacheEntry(
+                    key=key,
+                    model=model,
+                    value=json.dumps(value),
+                    expires_at=now + timedelta(seconds=self.ttl_seconds),
+                    accessed_at=now,
+                )
+            )
+            session.flush()
+            self._trim_disk(session, now)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        with session_scope() as session:
+            session.execute(delete(ResponseCacheEntry))
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "memory_entries": len(self._memory),
+        }
+
+    def _remember(self, key: str, value: Any, expires_at: float) -> None:
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _trim_disk(self, session, now: datetime) -> None:
+        session.execute(delete(ResponseCacheEntry).where(ResponseCacheEntry.expires_at <= now))
+        # Everything older than the newest ``disk_entries`` rows by access time.
+        cutoff = session.scalar(
+            select(ResponseCacheEntry.accessed_at)
+            .order_by(ResponseCacheEntry.accessed_at.desc())
+            .offset(self.disk_entries)
+            .limit(1)
+        )
+        if cutoff is not None:
+            session.execute(
+                delete(ResponseCacheEntry).where(ResponseCacheEntry.accessed_at <= cutoff)
+            )
@@ -1,11 +1,16 @@
 """Pydantic schemas for API interactions."""
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime
 import json
-from typing import Any, Optional
+from typing import Annotated, Any, Optional
 
-from pydantic import BaseModel, Field, model_validator
+from pydantic import AfterValidator, BaseModel, Field, model_validator
+
+from .storage import resolve_asset_url
+
+# Stored media references (``/media/{sha256}``) resolved to the URL clients fetch.
+AssetUrl = Annotated[str, AfterValidator(resolve_asset_url)]
 
 
 class ConversationCreate(BaseModel):
@@ -38,6 +43,10 @@ class MessageRead(BaseModel):
     content: str
     model: Optional[str]
     token_usage: Optional[str]
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    cached_tokens: Optional[int] = None
+    latency_ms: Optional[int] = None
     created_at: datetime
 
     class Config:
@@ -52,15 +61,25 @@ class GalleryAssetCreate(BaseModel):
     metadata: Optional[dict[str, Any]] = None
 
 
+class ImageDerivative(BaseModel):
+    url: AssetUrl
+    width: int
+    height: int
+    media_type: str
+
+
 class GalleryAssetRead(BaseModel):
     id: int
     asset_type: str
     title: str
     description: Optional[str]
-    url: str
+    url: AssetUrl
     metadata_json: Optional[str]
     metadata: Optional[dict[str, Any]] = None
     gallery_ids: list[int] = Field(default_factory=list)
+    derivatives: list[ImageDerivative] = Field(default_factory=list)
+    # ``srcset`` strings keyed by MIME type, in preference order, for <picture> sources.
+    srcset: dict[str, str] = Field(default_factory=dict)
     created_at: datetime
 
     class Config:
@@ -82,6 +101,7 @@ class GalleryAssetRead(BaseModel):
                 'url': data.url,
                 'metadata_json': data.metadata_json,
                 'gallery_ids': data.gallery_ids,
+                'derivatives': json.loads(data.derivatives_json or "[]"),
                 'created_at': data.created_at,
             }
             return extracted
@@ -95,6 +115,13 @@ class GalleryAssetRead(BaseModel):
                 self.metadata = json.loads(self.metadata_json)
             except (ValueError, TypeError):
                 self.metadata = None
+        if self.derivatives and not self.srcset:
+            for derivative in self.derivatives:
+                candidate = f"{derivative.url} {derivative.width}w"
+                current = self.srcset.get(derivative.media_type)
+                self.srcset[derivative.media_type] = (
+                    f"{current}, {candidate}" if current else candidate
+                )
         return self
 
 
@@ -145,10 +172,18 @@ class ImageRequest(BaseModel):
     size: str = Field(default="1024x1024")
     quality: str = Field(default="high")
     aspect_ratio: str = Field(default="1:1")
+    skip_duplicate: bool = False
 
 
 class ImageResponse(BaseModel):
     asset: GalleryAssetRead
+    # Set when ``skip_duplicate`` returned an existing near-identical image.
+    duplicate_of: Optional[int] = None
+
+
+class DuplicateMatch(BaseModel):
+    asset: GalleryAssetRead
+    distance: int
 
 
 class VideoRequest(BaseModel):
@@ -158,8 +193,21 @@ class VideoRequest(BaseModel):
     quality: str = Field(default="high")
 
 
+class VideoJobRead(BaseModel):
+    id: str
+    asset_id: Optional[int]
+    video_id: str
+    status: str
+    progress: int = 0
+    attempts: int = 0
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+
 class VideoResponse(BaseModel):
     asset: GalleryAssetRead
+    job: Optional[VideoJobRead] = None
 
 
 class StudioRenderRequest(BaseModel):
@@ -171,6 +219,7 @@ class StudioRenderRequest(BaseModel):
 
 class StudioRenderResponse(BaseModel):
     asset: GalleryAssetRead
+    job: Optional[VideoJobRead] = None
 
 
 class AgentBase(BaseModel):
@@ -267,7 +316,7 @@ class AudioTrackRead(BaseModel):
     duration_seconds: Optional[int]
     voice: Optional[str]
     track_type: str
-    url: str
+    url: AssetUrl
     created_at: datetime
     metadata_json: Optional[str] = None
     metadata: Optional[dict[str, Any]] = None
@@ -321,7 +370,7 @@ class GalleryAssetSummary(BaseModel):
     asset_type: str
     title: str
     description: Optional[str]
-    url: str
+    url: AssetUrl
     created_at: datetime
 
 
@@ -333,7 +382,7 @@ class AudioTrackSummary(BaseModel):
     duration_seconds: Optional[int]
     voice: Optional[str]
     track_type: str
-    url: str
+    url: AssetUrl
     created_at: datetime
 
 
@@ -387,6 +436,33 @@ class DataCatalogResponse(BaseModel):
     widgets: list[WorkspaceWidgetSummary] = Field(default_factory=list)
 
 
+class UsageRollupRead(BaseModel):
+    day: date
+    model: str
+    responses: int
+    input_tokens: int
+    output_tokens: int
+    cached_tokens: int
+    avg_latency_ms: Optional[float]
+    max_latency_ms: Optional[int]
+
+
+class UsageModelTotals(BaseModel):
+    model: str
+    responses: int
+    input_tokens: int
+    output_tokens: int
+    cached_tokens: int
+    avg_latency_ms: Optional[float]
+    max_latency_ms: Optional[int]
+
+
+class UsageReport(BaseModel):
+    since: date
+    models: list[UsageModelTotals] = Field(default_factory=list)
+    days: list[UsageRollupRead] = Field(default_factory=list)
+
+
 class CodeFileBase(BaseModel):
     path: str = Field(..., min_length=1, max_length=512)
     language: Optional[str] = Field(default=None, max_length=64)
@@ -2,7 +2,10 @@ const state = {
   conversations: [],
   currentConversationId: null,
   messages: {},
+  messageCursors: {},
+  loadingOlderMessages: {},
   assets: [],
+  galleryCursor: null,
   galleries: [],
   widgets: [],
   filters: {
@@ -21,6 +24,7 @@ const state = {
   agentPlan: null,
   audioTracks: [],
   dataCatalog: null,
+  dataCatalogEtag: null,
 };
 
 const conversationListEl = document.getElementById('conversation-list');
@@ -133,6 +137,68 @@ async function fetchJSON(url, options) {
   return res.json();
 }
 
+async function streamSSE(url, options, onEvent) {
+  const res = await fetch(url, {
+    headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+    ...options,
+  });
+  if (!res.ok || !res.body) {
+    const message = await res.text();
+    throw new Error(message || 'Request failed');
+  }
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  const dispatch = (frame) => {
+    let eventName = 'message';
+    const dataLines = [];
+    frame.split('\n').forEach((line) => {
+      if (line.startsWith('event:')) {
+        eventName = line.slice(6).trim();
+      } else if (line.startsWith('data:')) {
+        dataLines.push(line.slice(5).trimStart());
+      }
+    });
+    if (dataLines.length) {
+      onEvent(eventName, JSON.parse(dataLines.join('\n')));
+    }
+  };
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let boundary = buffer.indexOf('\n\n');
+    while (boundary !== -1) {
+      dispatch(buffer.slice(0, boundary));
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf('\n\n');
+    }
+  }
+  if (buffer.trim()) {
+    dispatch(buffer);
+  }
+}
+
+function watchVideoJob(job, onProgress) {
+  if (!job || (job.status !== 'queued' && job.status !== 'in_progress')) {
+    return Promise.resolve(job);
+  }
+  return new Promise((resolve) => {
+    const source = new EventSource(`/api/jobs/${job.id}/events`);
+    source.addEventListener('progress', (event) => {
+      if (onProgress) onProgress(JSON.parse(event.data));
+    });
+    source.addEventListener('done', (event) => {
+      source.close();
+      resolve(JSON.parse(event.data));
+    });
+    source.onerror = () => {
+      source.close();
+      resolve(null);
+    };
+  });
+}
+
 function bindChatWorkspace() {
   const nextForm = document.getElementById('chat-form');
   if (chatFormEl && chatFormEl !== nextForm) {
@@ -253,6 +319,7 @@ function renderConversations() {
 function renderMessages(conversationId) {
   if (!chatThreadEl) return;
   const messages = state.messages[conversationId] || [];
+  watchThreadScroll(chatThreadEl, conversationId);
   chatThreadEl.innerHTML = '';
   if (!messages.length) {
     const placeholder = document.createElement('div');
@@ -282,14 +349,62 @@ async function loadConversations() {
   }
 }
 
+const MESSAGE_PAGE_SIZE = 50;
+
+async function fetchMessagePage(conversationId, beforeId) {
+  const params = new URLSearchParams({ limit: String(MESSAGE_PAGE_SIZE) });
+  if (beforeId) params.set('before_id', beforeId);
+  const res = await fetch(`/api/conversations/${conversationId}/messages?${params}`);
+  if (!res.ok) {
+    const message = await res.text();
+    throw new Error(message || 'Request failed');
+  }
+  return { messages: await res.json(), cursor: res.headers.get('X-Next-Cursor') };
+}
+
 async function selectConversation(conversationId) {
   state.currentConversationId = conversationId;
   renderConversations();
-  const messages = await fetchJSON(`/api/conversations/${conversationId}/messages`);
+  const { messages, cursor } = await fetchMessagePage(conversationId);
   state.messages[conversationId] = messages;
+  state.messageCursors[conversationId] = cursor;
   renderMessages(conversationId);
 }
 
+async function loadOlderMessages(conversationId) {
+  const cursor = state.messageCursors[conversationId];
+  if (!cursor || state.loadingOlderMessages[conversationId]) return;
+  state.loadingOlderMessages[conversationId] = true;
+  try {
+    const { messages, cursor: next } = await fetchMessagePage(conversationId, cursor);
+    state.messageCursors[conversationId] = next;
+    // Keep each open thread anchored to the message the user was reading.
+    const threads = [...document.querySelectorAll(`[data-message-thread="${conversationId}"]`)];
+    const offsets = threads.map((threadEl) => threadEl.scrollHeight - threadEl.scrollTop);
+    state.messages[conversationId] = [...messages, ...(state.messages[conversationId] || [])];
+    threads.forEach((threadEl, index) => {
+      if (threadEl === chatThreadEl) {
+        renderMessages(conversationId);
+      } else {
+        renderMessagesInThread(threadEl, conversationId);
+      }
+      threadEl.scrollTop = threadEl.scrollHeight - offsets[index];
+    });
+  } finally {
+    state.loadingOlderMessages[conversationId] = false;
+  }
+}
+
+function watchThreadScroll(threadEl, conversationId) {
+  threadEl.dataset.messageThread = String(conversationId);
+  if (threadEl.dataset.historyScroll) return;
+  threadEl.dataset.historyScroll = 'true';
+  threadEl.addEventListener('scroll', () => {
+    if (threadEl.scrollTop > 40) return;
+    loadOlderMessages(Number(threadEl.dataset.messageThread)).catch((error) => console.error(error));
+  });
+}
+
 async function createConversation() {
   console.log('createConversation called');
   // Create with default name, user can edit inline
@@ -553,6 +668,7 @@ async function openConversationWidget(conversationId) {
 function renderMessagesInThread(threadEl, conversationId) {
   if (!threadEl) return;
   const messages = state.messages[conversationId] || [];
+  watchThreadScroll(threadEl, conversationId);
   threadEl.innerHTML = '';
   
   if (!messages.length) {
@@ -896,7 +1012,7 @@ function createVideoWidget(record) {
       if (submitButton) submitButton.disabled = true;
       if (statusEl) statusEl.textContent = 'Rendering storyboard…';
       try {
-        await fetchJSON('/api/videos', {
+        const response = await fetchJSON('/api/videos', {
           method: 'POST',
           body: JSON.stringify({
             prompt,
@@ -909,6 +1025,16 @@ function createVideoWidget(record) {
         if (statusEl) statusEl.textContent = 'Video queued and saved to the feed.';
         await loadGallery();
         await loadGalleries();
+        watchVideoJob(response.job, (job) => {
+          if (statusEl) statusEl.textContent = `Rendering video… ${job.progress}%`;
+        }).then((job) => {
+          if (!job) return;
+          if (statusEl) {
+            statusEl.textContent =
+              job.status === 'completed' ? 'Video ready in the feed.' : 'Video render failed.';
+          }
+          loadGallery();
+        });
       } catch (error) {
         console.error(error);
         if (statusEl) statusEl.textContent = 'Generation failed. Check your server logs.';
@@ -2909,27 +3035,73 @@ async function sendMessage(event) {
 
   const conversationId = state.currentConversationId;
   const localMessage = { role: 'user', content };
-  state.messages[conversationId] = [...(state.messages[conversationId] || []), localMessage];
+  const pendingReply = { role: 'assistant', content: '' };
+  state.messages[conversationId] = [
+    ...(state.messages[conversationId] || []),
+    localMessage,
+    pendingReply,
+  ];
   renderMessages(conversationId);
   chatInputEl.value = '';
+  const replyBubble = chatThreadEl.lastElementChild;
 
   try {
-    const response = await fetchJSON(`/api/conversations/${conversationId}/messages`, {
-      method: 'POST',
-      body: JSON.stringify({ content, model: modelSelectEl.value }),
-    });
-    state.messages[conversationId] = [
-      ...state.messages[conversationId].slice(0, -1),
-      response.user_message,
-      response.assistant_message,
-    ];
-    renderMessages(conversationId);
+    await streamSSE(
+      `/api/conversations/${conversationId}/messages/stream`,
+      {
+        method: 'POST',
+        body: JSON.stringify({ content, model: modelSelectEl.value }),
+      },
+      (eventName, data) => {
+        if (eventName === 'delta') {
+          pendingReply.content += data.delta;
+          if (replyBubble && replyBubble.isConnected) {
+            replyBubble.innerText = pendingReply.content;
+            chatThreadEl.scrollTop = chatThreadEl.scrollHeight;
+          }
+        } else if (eventName === 'done') {
+          state.messages[conversationId] = [
+            ...state.messages[conversationId].filter(
+              (message) => message !== localMessage && message !== pendingReply,
+            ),
+            data.user_message,
+            data.assistant_message,
+          ];
+          if (state.currentConversationId === conversationId) {
+            renderMessages(conversationId);
+          }
+        } else if (eventName === 'error') {
+          throw new Error(data.detail || 'Streaming failed');
+        }
+      },
+    );
   } catch (error) {
     console.error(error);
     alert('Unable to reach the OpenAI backend. Check your server logs.');
   }
 }
 
+function createAssetImage(asset, sizes) {
+  // Returns the element to insert plus its <img>; derivatives become <picture> sources.
+  const img = document.createElement('img');
+  img.src = asset.url;
+  img.decoding = 'async';
+  const srcset = asset.srcset || {};
+  const types = Object.keys(srcset);
+  if (!types.length) return { element: img, img };
+  const picture = document.createElement('picture');
+  picture.className = 'responsive-picture';
+  types.forEach((type) => {
+    const source = document.createElement('source');
+    source.type = type;
+    source.srcset = srcset[type];
+    source.sizes = sizes;
+    picture.appendChild(source);
+  });
+  picture.appendChild(img);
+  return { element: picture, img };
+}
+
 function filterAssets() {
   const search = state.filters.feedSearch.toLowerCase();
   const type = state.filters.feedType;
@@ -2949,17 +3121,18 @@ function renderGallery() {
     empty.className = 'gallery-card__meta';
     empty.textContent = 'No assets yet. Use the Studio to generate new visuals.';
     galleryEl.appendChild(empty);
-    return;
+    if (!state.galleryCursor) return;
   }
 
   assets.forEach((asset) => {
     const card = document.createElement('article');
     card.className = 'gallery-card';
 
-    const mediaWrapper = document.createElement(asset.asset_type === 'video' ? 'video' : 'img');
     const thumbnail = asset.metadata?.thumbnail_url;
-    mediaWrapper.src = asset.asset_type === 'video' ? asset.url : asset.url;
+    let mediaWrapper;
     if (asset.asset_type === 'video') {
+      mediaWrapper = document.createElement('video');
+      mediaWrapper.src = asset.url;
       mediaWrapper.controls = true;
       mediaWrapper.muted = true;
       mediaWrapper.loop = true;
@@ -2969,7 +3142,10 @@ function renderGallery() {
         mediaWrapper.poster = thumbnail;
       }
     } else {
-      mediaWrapper.alt = asset.title;
+      const { element, img } = createAssetImage(asset, '(max-width: 640px) 100vw, 320px');
+      img.alt = asset.title;
+      img.loading = 'lazy';
+      mediaWrapper = element;
     }
     card.appendChild(mediaWrapper);
 
@@ -3039,6 +3215,25 @@ function renderGallery() {
     card.appendChild(content);
     galleryEl.appendChild(card);
   });
+
+  if (state.galleryCursor) {
+    const loadMore = document.createElement('button');
+    loadMore.className = 'btn';
+    loadMore.type = 'button';
+    loadMore.textContent = 'Load older assets';
+    loadMore.addEventListener('click', async () => {
+      loadMore.disabled = true;
+      loadMore.textContent = 'Loading…';
+      try {
+        await loadMoreGallery();
+      } catch (error) {
+        console.error(error);
+        loadMore.disabled = false;
+        loadMore.textContent = 'Load older assets';
+      }
+    });
+    galleryEl.appendChild(loadMore);
+  }
 }
 
 function renderImageWidgetGalleries() {
@@ -3059,8 +3254,7 @@ function renderImageWidgetGalleries() {
       const figure = document.createElement('figure');
       figure.className = 'image-widget__item';
 
-      const img = document.createElement('img');
-      img.src = asset.url;
+      const { element: picture, img } = createAssetImage(asset, '(max-width: 640px) 50vw, 240px');
       img.alt = asset.title || 'Generated image';
       img.loading = 'lazy';
 
@@ -3075,7 +3269,7 @@ function renderImageWidgetGalleries() {
 
       caption.appendChild(title);
       caption.appendChild(meta);
-      figure.appendChild(img);
+      figure.appendChild(picture);
       figure.appendChild(caption);
       gallery.appendChild(figure);
     });
@@ -3138,9 +3332,36 @@ function renderVideoWidgetReels() {
   });
 }
 
+const GALLERY_FIELDS = 'id,asset_type,title,description,url,srcset,metadata,created_at';
+const GALLERY_PAGE_SIZE = 60;
+
+async function fetchGalleryPage(before) {
+  const params = new URLSearchParams({ limit: String(GALLERY_PAGE_SIZE), fields: GALLERY_FIELDS });
+  if (before) params.set('before', before);
+  const res = await fetch(`/api/gallery?${params}`);
+  if (!res.ok) {
+    const message = await res.text();
+    throw new Error(message || 'Request failed');
+  }
+  return { assets: await res.json(), cursor: res.headers.get('X-Next-Cursor') };
+}
+
+async function loadMoreGallery() {
+  if (!state.galleryCursor) return;
+  const { assets, cursor } = await fetchGalleryPage(state.galleryCursor);
+  state.assets = [...state.assets, ...assets];
+  state.galleryCursor = cursor;
+  refreshAssetViews();
+}
+
 async function loadGallery() {
-  const assets = await fetchJSON('/api/gallery');
+  const { assets, cursor } = await fetchGalleryPage();
   state.assets = assets;
+  state.galleryCursor = cursor;
+  refreshAssetViews();
+}
+
+function refreshAssetViews() {
   syncComposerSelection();
   renderGallery();
   renderImageWidgetGalleries();
@@ -3246,8 +3467,9 @@ async function handleGenerateAsset(event) {
     type === 'video' ? 'Generating video storyboard…' : 'Generating image asset…'
   );
   try {
+    let videoJob = null;
     if (type === 'video') {
-      await fetchJSON('/api/videos', {
+      const response = await fetchJSON('/api/videos', {
         method: 'POST',
         body: JSON.stringify({
           prompt,
@@ -3256,6 +3478,7 @@ async function handleGenerateAsset(event) {
           quality: studioQualityEl.value,
         }),
       });
+      videoJob = response.job;
     } else {
       await fetchJSON('/api/images', {
         method: 'POST',
@@ -3276,7 +3499,21 @@ async function handleGenerateAsset(event) {
     syncDurationVisibility();
     await loadGallery();
     await loadGalleries();
-    setStudioStatus('success', 'Asset saved to the feed.');
+    if (videoJob) {
+      setStudioStatus('loading', 'Video queued — rendering in the background…');
+      watchVideoJob(videoJob, (job) => {
+        setStudioStatus('loading', `Rendering video… ${job.progress}%`);
+      }).then((job) => {
+        if (job && job.status === 'completed') {
+          setStudioStatus('success', 'Video ready in the feed.');
+        } else {
+          setStudioStatus('error', 'Video render failed. Check your API configuration.');
+        }
+        loadGallery();
+      });
+    } else {
+      setStudioStatus('success', 'Asset saved to the feed.');
+    }
   } catch (error) {
     console.error(error);
     setStudioStatus('error', 'Generation failed. Check your API configuration.');
@@ -3967,8 +4204,9 @@ function renderComposerLibrary() {
     if (state.composer.selectedAssets.some((item) => item.id === asset.id)) {
       tile.classList.add('is-selected');
     }
-    const media = document.createElement(asset.asset_type === 'video' ? 'video' : 'img');
+    let media;
     if (asset.asset_type === 'video') {
+      media = document.createElement('video');
       media.src = asset.url;
       media.muted = true;
       media.loop = true;
@@ -3978,7 +4216,7 @@ function renderComposerLibrary() {
         media.poster = asset.metadata.thumbnail_url;
       }
     } else {
-      media.src = asset.url;
+      media = createAssetImage(asset, '160px').element;
     }
     tile.appendChild(media);
 
@@ -4031,8 +4269,9 @@ function renderComposerTimeline() {
 
     const thumb = document.createElement('div');
     thumb.className = 'timeline-thumb';
-    const thumbMedia = document.createElement(asset.asset_type === 'video' ? 'video' : 'img');
+    let thumbMedia;
     if (asset.asset_type === 'video') {
+      thumbMedia = document.createElement('video');
       thumbMedia.src = asset.url;
       thumbMedia.muted = true;
       thumbMedia.playsInline = true;
@@ -4041,7 +4280,7 @@ function renderComposerTimeline() {
         thumbMedia.poster = asset.metadata.thumbnail_url;
       }
     } else {
-      thumbMedia.src = asset.url;
+      thumbMedia = createAssetImage(asset, '96px').element;
     }
     thumb.appendChild(thumbMedia);
 
@@ -4119,7 +4358,7 @@ async function handleComposerRender() {
   composerRenderBtn.disabled = true;
   composerRenderBtn.textContent = 'Rendering…';
   try {
-    await fetchJSON('/api/studio/render', {
+    const response = await fetchJSON('/api/studio/render', {
       method: 'POST',
       body: JSON.stringify({
         title: composerTitleEl.value || 'Studio montage',
@@ -4133,6 +4372,9 @@ async function handleComposerRender() {
     composerDescriptionEl.value = '';
     await loadGallery();
     await loadGalleries();
+    watchVideoJob(response.job).then((job) => {
+      if (job) loadGallery();
+    });
   } catch (error) {
     console.error(error);
     alert('Unable to render video.');
@@ -4899,11 +5141,36 @@ function renderDataWarehouse() {
   renderDataCatalog();
 }
 
+async function fetchDataCatalog() {
+  const headers = { 'Content-Type': 'application/json' };
+  if (state.dataCatalog && state.dataCatalogEtag) {
+    headers['If-None-Match'] = state.dataCatalogEtag;
+  }
+  const res = await fetch('/api/data-catalog', { headers });
+  if (res.status === 304) {
+    return false;
+  }
+  if (!res.ok) {
+    const message = await res.text();
+    throw new Error(message || 'Request failed');
+  }
+  state.dataCatalog = await res.json();
+  state.dataCatalogEtag = res.headers.get('ETag');
+  return true;
+}
+
 async function loadDataCatalog(forceRefresh = false) {
   if (!dataPanelEl) return;
   if (!forceRefresh && state.dataCatalog) {
     renderDataWarehouse();
     setDataStatus('');
+    try {
+      if (await fetchDataCatalog()) {
+        renderDataWarehouse();
+      }
+    } catch (error) {
+      console.error(error);
+    }
     return;
   }
 
@@ -4918,8 +5185,7 @@ async function loadDataCatalog(forceRefresh = false) {
   setDataStatus('Loading the data backend mega gallery…');
 
   try {
-    const payload = await fetchJSON('/api/data-catalog');
-    state.dataCatalog = payload;
+    await fetchDataCatalog();
     renderDataWarehouse();
     setDataStatus('Mega gallery synced.', 'success');
   } catch (error) {
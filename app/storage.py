@@ -0,0 +1,310 @@
+"""Media store selection, the S3-compatible backend and asset URL resolution."""
+from __future__ import annotations
+
+import hashlib
+import hmac
+import re
+import tempfile
+from datetime import datetime, timezone
+from typing import IO, Iterable, Iterator, Optional
+from urllib.parse import quote, urlsplit
+
+import httpx
+
+from .blobs import (
+    BLOB_HASH_PATTERN,
+    CHUNK_SIZE,
+    IMMUTABLE_CACHE_CONTROL,
+    SNIFF_BYTES,
+    BlobStore,
+    MediaStore,
+    sniff_media_type,
+)
+from .config import Settings, get_settings
+from .http_clients import HTTPClients
+
+MEDIA_URL_PATTERN = re.compile(r"^/media/(?P<hash>[0-9a-f]{64})$")
+# Uploads up to this size are hashed in memory before being sent.
+SPOOL_BYTES = 8 * 1024 * 1024
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+
+
+def object_key(prefix: str, blob_hash: str) -> str:
+    if not BLOB_HASH_PATTERN.match(blob_hash):
+        raise ValueError(f"Invalid blob hash: {blob_hash!r}")
+    return f"{prefix}{blob_hash[:2]}/{blob_hash[2:4]}/{blob_hash}"
+
+
+def _hmac(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode("utf-8"), hashlib.sha256).digest()
+
+
+def _amz_date(now: Optional[datetime]) -> str:
+    return (now or datetime.now(timezone.utc)).strftime("%Y%m%dT%H%M%SZ")
+
+
+class SigV4Signer:
+    """AWS Signature Version 4 for S3-compatible object stores."""
+
+    def __init__(self, access_key: str, secret_key: str, region: str, service: str = "s3"):
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.service = service
+
+    def _scope(self, day: str) -> str:
+        return f"{day}/{self.region}/{self.service}/aws4_request"
+
+    def _signature(self, day: str, string_to_sign: str) -> str:
+        key = _hmac(f"AWS4{self.secret_key}".encode("utf-8"), day)
+        for part in (self.region, self.service, "aws4_request"):
+            key = _hmac(key, part)
+        return hmac.new(key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def _string_to_sign(
+        self,
+        method: str,
+        url: str,
+        query: dict[str, str],
+        headers: dict[str, str],
+        payload_hash: str,
+        stamp: str,
+    ) -> str:
+        canonical_query = "&".join(
+            f"{quote(name, safe='-_.~')}={quote(value, safe='-_.~')}"
+            for name, value in sorted(query.items())
+        )
+        names = sorted(name.lower() for name in headers)
+        lowered = {name.lower(): value.strip() for name, value in headers.items()}
+        canonical_request = "\n".join(
+            [
+                method,
+                urlsplit(url).path or "/",
+                canonical_query,
+                "".join(f"{name}:{lowered[name]}\n" for name in names),
+                ";".join(names),
+                payload_hash,
+            ]
+        )
+        return "\n".join(
+            [
+                "AWS4-HMAC-SHA256",
+                stamp,
+                self._scope(stamp[:8]),
+                hashlib.sha256(canonical_request.encode("utf-8")).hexdigest(),
+            ]
+        )
+
+    def sign_headers(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str],
+        payload_hash: str,
+        *,
+        now: Optional[datetime] = None,
+    ) -> dict[str, str]:
+        """Return ``headers`` plus the ``Authorization`` and ``x-amz-*`` headers."""
+
+        stamp = _amz_date(now)
+        headers = {
+            **headers,
+            "host": urlsplit(url).netloc,
+            "x-amz-content-sha256": payload_hash,
+            "x-amz-date": stamp,
+        }
+        string_to_sign = self._string_to_sign(method, url, {}, headers, payload_hash, stamp)
+        signed_headers = ";".join(sorted(name.lower() for name in headers))
+        headers["Authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key}/{self._scope(stamp[:8])}, "
+            f"SignedHeaders={signed_headers}, "
+            f"Signature={self._signature(stamp[:8], string_to_sign)}"
+        )
+        del headers["host"]
+        return headers
+
+    def presign(
+        self, method: str, url: str, expires_in: int, *, now: Optional[datetime] = None
+    ) -> str:
+        """Return ``url`` with query-string credentials valid for ``expires_in`` seconds."""
+
+        stamp = _amz_date(now)
+        query = {
+            "X-Amz-Algorithm": "AWS4-HMAC-SHA256",
+            "X-Amz-Credential": f"{self.access_key}/{self._scope(stamp[:8])}",
+            "X-Amz-Date": stamp,
+            "X-Amz-Expires": str(expires_in),
+            "X-Amz-SignedHeaders": "host",
+        }
+        string_to_sign = self._string_to_sign(
+            method, url, query, {"host": urlsplit(url).netloc}, UNSIGNED_PAYLOAD, stamp
+        )
+        query["X-Amz-Signature"] = self._signature(stamp[:8], string_to_sign)
+        return url + "?" + "&".join(
+            f"{name}={quote(value, safe='-_.~')}" for name, value in query.items()
+        )
+
+
+def _read_chunks(handle: IO[bytes]) -> Iterator[bytes]:
+    while chunk := handle.read(CHUNK_SIZE):
+        yield chunk
+
+
+class S3BlobStore(MediaStore):
+    """Blobs as objects in an S3-compatible bucket (AWS S3, MinIO, R2, …).
+
+    Objects are addressed path-style (``{endpoint}/{bucket}/{key}``) so local
+    stand-ins work without DNS. Clients download straight from the bucket
+    through presigned URLs, or through ``public_base_url`` when the bucket is
+    fronted by a CDN, so media bytes never pass through the app.
+    """
+
+    def __init__(
+        self,
+        *,
+        endpoint_url: str,
+        bucket: str,
+        access_key: str,
+        secret_key: str,
+        region: str = "us-east-1",
+        prefix: str = "",
+        public_base_url: Optional[str] = None,
+        presign_expiry_seconds: int = 3600,
+        http: HTTPClients,
+    ):
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.bucket = bucket
+        self.prefix = prefix
+        self.public_base_url = public_base_url.rstrip("/") if public_base_url else None
+        self.presign_expiry_seconds = presign_expiry_seconds
+        self._signer = SigV4Signer(access_key, secret_key, region)
+        self._http = http
+
+    def object_url(self, blob_hash: str) -> str:
+        return f"{self.endpoint_url}/{self.bucket}/{quote(object_key(self.prefix, blob_hash))}"
+
+    def _request(
+        self,
+        method: str,
+        blob_hash: str,
+        *,
+        headers: Optional[dict[str, str]] = None,
+        payload_hash: str = UNSIGNED_PAYLOAD,
+        **kwargs,
+    ) -> httpx.Response:
+        url = self.object_url(blob_hash)
+        signed = self._signer.sign_headers(method, url, headers or {}, payload_hash)
+        return self._http.client.request(method, url, headers=signed, **kwargs)
+
+    def exists(self, blob_hash: str) -> bool:
+        response = self._request("HEAD", blob_hash)
+        if response.status_code == 404:
+            return False
+        response.raise_for_status()
+        return True
+
+    def put_stream(self, chunks: Iterable[bytes]) -> str:
+        # The key is the digest, so the body is spooled while hashing and
+        # uploaded afterwards; that digest doubles as the signed payload hash.
+        digest = hashlib.sha256()
+        size = 0
+        head = b""
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES) as spool:
+            for chunk in chunks:
+                digest.update(chunk)
+                spool.write(chunk)
+                if len(head) < SNIFF_BYTES:
+                    head += chunk[: SNIFF_BYTES - len(head)]
+                size += len(chunk)
+            blob_hash = digest.hexdigest()
+            if self.exists(blob_hash):
+                return blob_hash
+            spool.seek(0)
+            self._request(
+                "PUT",
+                blob_hash,
+                headers={
+                    "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+                    "Content-Length": str(size),
+                    "Content-Type": sniff_media_type(head),
+                },
+                payload_hash=blob_hash,
+                content=_read_chunks(spool),
+            ).raise_for_status()
+        return blob_hash
+
+    def open(self, blob_hash: str) -> Iterator[bytes]:
+        url = self.object_url(blob_hash)
+        headers = self._signer.sign_headers("GET", url, {}, UNSIGNED_PAYLOAD)
+        request = self._http.client.build_request("GET", url, headers=headers)
+        response = self._http.client.send(request, stream=True)
+        if response.status_code == 404:
+            response.close()
+            raise FileNotFoundError(blob_hash)
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError:
+            response.close()
+            raise
+
+        def chunks() -> Iterator[bytes]:
+            try:
+                yield from response.iter_bytes(CHUNK_SIZE)
+            finally:
+                response.close()
+
+        return chunks()
+
+    def delete(self, blob_hash: str) -> None:
+        response = self._request("DELETE", blob_hash)
+        if response.status_code != 404:
+            response.raise_for_status()
+
+    def direct_url(self, blob_hash: str) -> Optional[str]:
+        if self.public_base_url:
+            return self.public_url(blob_hash)
+        return self._signer.presign("GET", self.object_url(blob_hash), self.presign_expiry_seconds)
+
+    def public_url(self, blob_hash: str) -> str:
+        if self.public_base_url:
+            return f"{self.public_base_url}/{quote(object_key(self.prefix, blob_hash))}"
+        # Presigned URLs expire, so responses keep the stable app URL that
+        # redirects to a fresh one.
+        return super().public_url(blob_hash)
+
+
+def create_media_store(settings: Settings, http: Optional[HTTPClients] = None) -> MediaStore:
+    """Build the backend selected by ``MEDIA_STORAGE``."""
+
+    if settings.media_storage == "s3":
+        if not (settings.s3_endpoint_url and settings.s3_bucket):
+            raise ValueError("MEDIA_STORAGE=s3 requires S3_ENDPOINT_URL and S3_BUCKET")
+        return S3BlobStore(
+            endpoint_url=settings.s3_endpoint_url,
+            bucket=settings.s3_bucket,
+            access_key=settings.s3_access_key_id or "",
+            secret_key=settings.s3_secret_access_key or "",
+            region=settings.s3_region,
+            prefix=settings.s3_prefix,
+            public_base_url=settings.s3_public_base_url,
+            presign_expiry_seconds=settings.s3_presign_expiry_seconds,
+            http=http or HTTPClients(settings),
+        )
+    return BlobStore(settings.media_root)
+
+
+def resolve_asset_url(url: str) -> str:
+    """Map a stored ``/media/{sha256}`` reference to the URL clients should use.
+
+    Only a public (CDN) base URL changes anything: other backends are served,
+    or redirected to presigned URLs, by ``GET /media/{sha256}``.
+    """
+
+    settings = get_settings()
+    if settings.media_storage != "s3" or not settings.s3_public_base_url:
+        return url
+    match = MEDIA_URL_PATTERN.match(url)
+    if match is None:
+        return url
+    base = settings.s3_public_base_url.rstrip("/")
+    return f"{base}/{quote(object_key(settings.s3_prefix, match.group('hash')))}"
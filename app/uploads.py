@@ -0,0 +1,149 @@
+"""Incremental ``multipart/form-data`` parsing for streamed uploads.
+
+Starlette's form parser spools every file before the handler runs. This
+reader yields each part's body as it arrives instead, so an upload can be
+hashed and written to the media store in one pass with bounded memory.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterator, Optional
+
+import anyio.from_thread
+
+BOUNDARY_PATTERN = re.compile(r'boundary="?(?P<boundary>[^";]{1,70})"?', re.I)
+PARAM_PATTERN = re.compile(r';\s*(?P<name>[\w*-]+)="?(?P<value>(?<=")[^"]*|[^";]*)"?')
+MAX_HEADER_BYTES = 16 * 1024
+
+
+class MultipartError(ValueError):
+    """The request body is not well-formed ``multipart/form-data``."""
+
+
+@dataclass
+class Part:
+    name: str
+    filename: Optional[str]
+    content_type: Optional[str]
+
+
+def parse_boundary(content_type: str) -> bytes:
+    if not content_type.lower().startswith("multipart/form-data"):
+        raise MultipartError("Expected a multipart/form-data body")
+    match = BOUNDARY_PATTERN.search(content_type)
+    if match is None:
+        raise MultipartError("Missing multipart boundary")
+    return match.group("boundary").encode("latin-1")
+
+
+class MultipartReader:
+    """Read parts from an async byte stream; each part must be consumed in turn.
+
+    ``await next_part()`` returns the next part's headers (``None`` after the
+    closing boundary) and ``iter_part()`` then yields that part's body.
+    """
+
+    def __init__(self, stream: AsyncIterator[bytes], boundary: bytes):
+        self._stream = stream.__aiter__()
+        # A leading CRLF lets the first boundary match the same delimiter as the rest.
+        self._buffer = bytearray(b"\r\n")
+        self._delimiter = b"\r\n--" + boundary
+        self._exhausted = False
+        self._in_part = False
+
+    async def _fill(self) -> None:
+        try:
+            self._buffer += await self._stream.__anext__()
+        except StopAsyncIteration:
+            if self._exhausted:
+                raise MultipartError("Unexpected end of multipart body") from None
+            self._exhausted = True
+
+    async def next_part(self) -> Optional[Part]:
+        if self._in_part:
+            async for _ in self.iter_part():
+                pass
+        while True:
+            index = self._buffer.find(self._delimiter)
+            if index >= 0 and len(self._buffer) >= index + len(self._delimiter) + 2:
+                break
+            if index < 0:
+                # Drop preamble bytes that can no longer start a delimiter.
+                del self._buffer[: max(len(self._buffer) - len(self._delimiter), 0)]
+            await self._fill()
+        del self._buffer[: index + len(self._delimiter)]
+        if self._buffer[:2] == b"--":
+            return None
+
+        while (end := self._buffer.find(b"\r\n\r\n")) < 0:
+            if len(self._buffer) > MAX_HEADER_BYTES:
+                raise MultipartError("Multipart part headers are too large")
+            await self._fill()
+        headers = {}
+        for line in bytes(self._buffer[2:end]).decode("utf-8", "replace").split("\r\n"):
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        del self._buffer[: end + 4]
+
+        disposition = headers.get("content-disposition", "")
+        params = {
+            match.group("name").lower(): match.group("value")
+            for match in PARAM_PATTERN.finditer(disposition)
+        }
+        if not disposition.lower().startswith("form-data") or "name" not in params:
+            raise MultipartError("Part is missing a form-data Content-Disposition")
+        self._in_part = True
+        return Part(
+            name=params["name"],
+            filename=params.get("filename"),
+            content_type=headers.get("content-type"),
+        )
+
+    async def iter_part(self) -> AsyncIterator[bytes]:
+        """Yield the current part's body up to (not including) the next boundary."""
+
+        keep = len(self._delimiter) - 1
+        while self._in_part:
+            index = self._buffer.find(self._delimiter)
+            if index >= 0:
+                chunk = bytes(self._buffer[:index])
+                del self._buffer[:index]
+                self._in_part = False
+            elif len(self._buffer) > keep:
+                chunk = bytes(self._buffer[:-keep])
+                del self._buffer[:-keep]
+            else:
+                chunk = b""
+            if chunk:
+                yield chunk
+            if self._in_part:
+                await self._fill()
+
+    async def read_part(self, limit: int) -> bytes:
+        """Return the current part's body, rejecting bodies over ``limit`` bytes."""
+
+        data = bytearray()
+        async for chunk in self.iter_part():
+            data += chunk
+            if len(data) > limit:
+                raise MultipartError("Form field is too large")
+        return bytes(data)
+
+
+def blocking_chunks(chunks: AsyncIterator[bytes]) -> Iterator[bytes]:
+    """Drive ``chunks`` from a worker thread started by ``run_in_threadpool``."""
+
+    iterator = chunks.__aiter__()
+
+    async def step() -> tuple[bool, bytes]:
+        try:
+            return False, await iterator.__anext__()
+        except StopAsyncIteration:
+            return True, b""
+
+    while True:
+        done, chunk = anyio.from_thread.run(step)
+        if done:
+            return
+        yield chunk
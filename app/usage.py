@@ -0,0 +1,107 @@
+"""Structured token usage and the per-model, per-day usage rollup."""
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Optional
+
+from sqlalchemy import event, func
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from .database import Message, SessionLocal, UsageRollup
+
+ROLLUP_FIELDS = ("input_tokens", "output_tokens", "cached_tokens")
+UNKNOWN_MODEL = "unknown"
+
+
+def _field(source: Any, name: str) -> Any:
+    if source is None:
+        return None
+    if isinstance(source, dict):
+        return source.get(name)
+    return getattr(source, name, None)
+
+
+def usage_counts(usage: Any) -> dict[str, Optional[int]]:
+    """Pull token counts out of a Responses API ``usage`` object or dict."""
+
+    return {
+        "input_tokens": _field(usage, "input_tokens"),
+        "output_tokens": _field(usage, "output_tokens"),
+        "cached_tokens": _field(_field(usage, "input_tokens_details"), "cached_tokens"),
+    }
+
+
+def _empty_bucket() -> dict[str, int]:
+    return dict.fromkeys(
+        ("responses", *ROLLUP_FIELDS, "latency_samples", "latency_ms_total", "latency_ms_max"), 0
+    )
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _track_usage(session: Session, flush_context) -> None:
+    totals: dict[tuple[date, str], dict[str, int]] = defaultdict(_empty_bucket)
+    for instance in session.new:
+        if not isinstance(instance, Message) or instance.role != "assistant":
+            continue
+        created_at = instance.created_at or datetime.utcnow()
+        bucket = totals[(created_at.date(), instance.model or UNKNOWN_MODEL)]
+        bucket["responses"] += 1
+        for name in ROLLUP_FIELDS:
+            bucket[name] += getattr(instance, name) or 0
+        if instance.latency_ms is not None:
+            bucket["latency_samples"] += 1
+            bucket["latency_ms_total"] += instance.latency_ms
+            bucket["latency_ms_max"] = max(bucket["latency_ms_max"], instance.latency_ms)
+    if not totals:
+        return
+
+    table = UsageRollup.__table__
+    connection = session.connection()
+    now = datetime.utcnow()
+    for (day, model), values in totals.items():
+        statement = insert(table).values(
+            day=day, model=model, created_at=now, updated_at=now, **values
+        )
+        excluded = statement.excluded
+        connection.execute(
+            statement.on_conflict_do_update(
+                index_elements=[table.c.day, table.c.model],
+                set_={
+                    **{
+                        name: table.c[name] + excluded[name]
+                        for name in ("responses", *ROLLUP_FIELDS, "latency_samples", "latency_ms_total")
+                    },
+                    "latency_ms_max": func.max(table.c.latency_ms_max, excluded.latency_ms_max),
+                    "updated_at": now,
+                },
+            )
+        )
+
+
+def read_usage(
+    session: Session, *, since: date, model: Optional[str] = None
+) -> list[UsageRollup]:
+    query = session.query(UsageRollup).filter(UsageRollup.day >= since)
+    if model:
+        query = query.filter(UsageRollup.model == model)
+    return query.order_by(UsageRollup.day.desc(), UsageRollup.model).all()
+
+
+def read_usage_totals(session: Session, *, since: date, model: Optional[str] = None):
+    """Sum the rollup per model; rows carry the same names as :class:`UsageRollup`."""
+
+    query = session.query(
+        UsageRollup.model,
+        func.sum(UsageRollup.responses).label("responses"),
+        func.sum(UsageRollup.input_tokens).label("input_tokens"),
+        func.sum(UsageRollup.output_tokens).label("output_tokens"),
+        func.sum(UsageRollup.cached_tokens).label("cached_tokens"),
+        func.sum(UsageRollup.latency_samples).label("latency_samples"),
+        func.sum(UsageRollup.latency_ms_total).label("latency_ms_total"),
+        func.max(UsageRollup.latency_ms_max).label("latency_ms_max"),
+    ).filter(UsageRollup.day >= since)
+    if model:
+        query = query.filter(UsageRollup.model == model)
+    return query.group_by(UsageRollup.model).order_by(UsageRollup.model).all()
@@ -0,0 +1,87 @@
+"""Size-bounded on-disk LRU of Sora video bytes proxied from OpenAI."""
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from .singleflight import AsyncSingleFlight
+
+VIDEO_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+PARTIAL_PREFIX = ".tmp-"
+
+
+class VideoCache:
+    """Keep whole video files under ``root``, evicting the least recently served.
+
+    A video is downloaded once per id: concurrent misses share one fill, which
+    is written to a temporary file and renamed into place, so readers (in
+    this or another worker) never see a partial file. Recency is the file's
+    mtime, bumped on every hit.
+    """
+
+    def __init__(self, root: Path | str, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.inflight = AsyncSingleFlight()
+        self.hits = 0
+        self.misses = 0
+
+    def path_for(self, video_id: str) -> Path:
+        if not VIDEO_ID_PATTERN.match(video_id):
+            raise ValueError(f"Invalid video id: {video_id!r}")
+        return self.root / video_id
+
+    async def get(self, video_id: str, download: Callable[[Path], Awaitable[None]]) -> Path:
+        """Return the cached file for ``video_id``, filling it with ``download(path)``."""
+
+        path = self.path_for(video_id)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return await self.inflight.do(video_id, lambda: self._fill(path, download))
+        self.hits += 1
+        return path
+
+    async def _fill(self, path: Path, download: Callable[[Path], Awaitable[None]]) -> Path:
+        if path.is_file():
+            return path
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.root, prefix=PARTIAL_PREFIX)
+        os.close(fd)
+        try:
+            await download(Path(tmp_name))
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        await asyncio.to_thread(self._evict, keep=path)
+        return path
+
+    def _evict(self, *, keep: Path) -> None:
+        entries = []
+        for entry in os.scandir(self.root):
+            if entry.name.startswith(PARTIAL_PREFIX) or not entry.is_file():
+                continue
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, Path(entry.path)))
+        total = sum(size for _, size, _ in entries)
+        # Files still being sent stay readable after unlink on POSIX.
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.inflight.coalesced,
+        }
@@ -0,0 +1,40 @@
+"""Index the columns list endpoints order and filter by.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:00:00
+"""
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# (table, index name, columns). ``code_files.project_id`` and
+# ``gallery_asset_links.gallery_id`` are already the leading columns of
+# their unique constraints, so they need no index of their own.
+INDEXES = [
+    ("messages", "ix_messages_conversation_created", ["conversation_id", "created_at"]),
+    ("gallery_assets", "ix_gallery_assets_created_id", ["created_at", "id"]),
+    ("gallery_asset_links", "ix_gallery_asset_links_asset", ["asset_id"]),
+    ("conversations", "ix_conversations_updated_at", ["updated_at"]),
+    ("galleries", "ix_galleries_updated_at", ["updated_at"]),
+    ("agents", "ix_agents_updated_at", ["updated_at"]),
+    ("audio_tracks", "ix_audio_tracks_created_at", ["created_at"]),
+]
+
+
+def upgrade() -> None:
+    # Databases created before migrations existed may already carry some of
+    # these from ``create_all``.
+    for table, name, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+    op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    for table, name, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
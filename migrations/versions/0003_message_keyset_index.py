@@ -0,0 +1,28 @@
+"""Index messages by ``(conversation_id, id)`` for keyset pagination.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00
+"""
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_messages_conversation_id",
+        "messages",
+        ["conversation_id", "id"],
+        if_not_exists=True,
+    )
+    op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_messages_conversation_id", table_name="messages", if_exists=True)
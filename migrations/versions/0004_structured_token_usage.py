@@ -0,0 +1,90 @@
+"""Store token usage as integers and roll it up per model and day.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00
+"""
+from __future__ import annotations
+
+import re
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+USAGE_COLUMNS = ["input_tokens", "output_tokens", "cached_tokens", "latency_ms"]
+# Legacy rows hold ``str(usage)``: either a ``ResponseUsage(...)`` repr or a dict.
+_LEGACY_PATTERNS = {
+    name: re.compile(rf"\b{name}'?\s*[=:]\s*(\d+)")
+    for name in ("input_tokens", "output_tokens", "cached_tokens")
+}
+
+
+def _backfill_usage(bind) -> None:
+    rows = bind.execute(
+        sa.text("SELECT id, token_usage FROM messages WHERE token_usage LIKE '%input_tokens%'")
+    ).all()
+    updates = []
+    for message_id, token_usage in rows:
+        values = {
+            name: int(match.group(1))
+            for name, pattern in _LEGACY_PATTERNS.items()
+            if (match := pattern.search(token_usage))
+        }
+        if values:
+            updates.append({"id": message_id, **dict.fromkeys(_LEGACY_PATTERNS, None), **values})
+    if updates:
+        bind.execute(
+            sa.text(
+                "UPDATE messages SET input_tokens = :input_tokens, "
+                "output_tokens = :output_tokens, cached_tokens = :cached_tokens WHERE id = :id"
+            ),
+            updates,
+        )
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("messages") as batch:
+        for name in USAGE_COLUMNS:
+            batch.add_column(sa.Column(name, sa.Integer(), nullable=True))
+
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table("usage_rollups"):
+        op.create_table(
+            "usage_rollups",
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("model", sa.String(128), primary_key=True),
+            sa.Column("responses", sa.Integer(), nullable=False),
+            sa.Column("input_tokens", sa.Integer(), nullable=False),
+            sa.Column("output_tokens", sa.Integer(), nullable=False),
+            sa.Column("cached_tokens", sa.Integer(), nullable=False),
+            sa.Column("latency_samples", sa.Integer(), nullable=False),
+            sa.Column("latency_ms_total", sa.Integer(), nullable=False),
+            sa.Column("latency_ms_max", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        )
+
+    _backfill_usage(bind)
+    # Seed the rollup once from history; from here on it is kept incrementally.
+    op.execute("DELETE FROM usage_rollups")
+    op.execute(
+        "INSERT INTO usage_rollups (day, model, responses, input_tokens, output_tokens, "
+        "cached_tokens, latency_samples, latency_ms_total, latency_ms_max, created_at, updated_at) "
+        "SELECT date(created_at), COALESCE(model, 'unknown'), count(*), "
+        "COALESCE(sum(input_tokens), 0), COALESCE(sum(output_tokens), 0), "
+        "COALESCE(sum(cached_tokens), 0), 0, 0, 0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP "
+        "FROM messages WHERE role = 'assistant' "
+        "GROUP BY date(created_at), COALESCE(model, 'unknown')"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("usage_rollups")
+    with op.batch_alter_table("messages") as batch:
+        for name in reversed(USAGE_COLUMNS):
+            batch.drop_column(name)
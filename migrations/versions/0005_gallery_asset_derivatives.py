@@ -0,0 +1,26 @@
+"""Record responsive image derivatives on gallery assets.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:00:00
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing images are picked up by the derivative backfill on startup.
+    with op.batch_alter_table("gallery_assets") as batch:
+        batch.add_column(sa.Column("derivatives_json", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("gallery_assets") as batch:
+        batch.drop_column("derivatives_json")
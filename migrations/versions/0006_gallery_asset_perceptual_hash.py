@@ -0,0 +1,33 @@
+"""Record perceptual hashes of gallery images for duplicate detection.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 00:00:00
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("gallery_assets") as batch:
+        batch.add_column(sa.Column("perceptual_hash", sa.BigInteger(), nullable=True))
+        batch.create_index("ix_gallery_assets_perceptual_hash", ["perceptual_hash"])
+    # Hashes are computed by the derivative worker, so send processed images
+    # back through its startup backfill; unchanged derivatives dedupe in the store.
+    op.execute(
+        "UPDATE gallery_assets SET derivatives_json = NULL "
+        "WHERE asset_type = 'image' AND perceptual_hash IS NULL"
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("gallery_assets") as batch:
+        batch.drop_index("ix_gallery_assets_perceptual_hash")
+        batch.drop_column("perceptual_hash")
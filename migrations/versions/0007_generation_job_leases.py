@@ -0,0 +1,40 @@
+"""Lease generation jobs to one poller at a time.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 00:00:00
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+LEASE_COLUMNS = [
+    sa.Column("lease_owner", sa.String(length=64), nullable=True),
+    sa.Column("lease_until", sa.DateTime(timezone=True), nullable=True),
+]
+
+
+def upgrade() -> None:
+    # Databases from before migrations existed get ``generation_jobs`` from
+    # ``create_all`` in ``init_db``, already carrying the lease columns.
+    columns = sa.inspect(op.get_bind()).get_columns("generation_jobs")
+    existing = {column["name"] for column in columns}
+    missing = [column for column in LEASE_COLUMNS if column.name not in existing]
+    if not missing:
+        return
+    with op.batch_alter_table("generation_jobs") as batch:
+        for column in missing:
+            batch.add_column(column)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("generation_jobs") as batch:
+        batch.drop_column("lease_until")
+        batch.drop_column("lease_owner")
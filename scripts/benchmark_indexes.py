@@ -0,0 +1,154 @@
+"""Compare query plans and timings of hot list queries before/after migration 0001.
+
+Usage::
+
+    python scripts/benchmark_indexes.py --messages 2000000 --assets 1000000
+
+A scratch SQLite database is built from the models, stripped of the
+``0001`` indexes and filled with synthetic rows. Every hot query is explained
+and timed, the migration is applied with ``alembic upgrade 0001`` and the
+same queries are measured again.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+QUERIES = {
+    "conversation history": (
+        "SELECT id, role, content FROM messages WHERE conversation_id = :conversation "
+        "ORDER BY created_at"
+    ),
+    "gallery first page": (
+        "SELECT id, title FROM gallery_assets ORDER BY created_at DESC, id DESC LIMIT 61"
+    ),
+    "gallery deep page": (
+        "SELECT id, title FROM gallery_assets "
+        "WHERE (created_at, id) < (:cursor, :cursor_id) "
+        "ORDER BY created_at DESC, id DESC LIMIT 61"
+    ),
+    "asset memberships": (
+        "SELECT asset_id, gallery_id FROM gallery_asset_links "
+        "WHERE asset_id IN (:cursor_id, :cursor_id - 1, :cursor_id - 2)"
+    ),
+    "recent conversations": (
+        "SELECT id, title FROM conversations ORDER BY updated_at DESC LIMIT 6"
+    ),
+}
+
+
+def _populate(connection, *, messages: int, assets: int, conversations: int) -> None:
+    from sqlalchemy import text
+
+    timestamp = "strftime('%Y-%m-%d %H:%M:%f', '2026-01-01', '+' || x || ' seconds')"
+    sequence = "WITH RECURSIVE seq(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM seq LIMIT :n) "
+    statements = [
+        (
+            "INSERT INTO conversations (id, title, created_at, updated_at) "
+            f"SELECT x, 'Conversation ' || x, {timestamp}, {timestamp} FROM seq",
+            conversations,
+        ),
+        (
+            "INSERT INTO messages (conversation_id, role, content, created_at, updated_at) "
+            f"SELECT (x * 7919) % :conversations + 1, 'user', 'message ' || x, "
+            f"{timestamp}, {timestamp} FROM seq",
+            messages,
+        ),
+        (
+            "INSERT INTO gallery_assets (id, asset_type, title, url, created_at, updated_at) "
+            f"SELECT x, 'image', 'Asset ' || x, '/media/' || x, {timestamp}, {timestamp} FROM seq",
+            assets,
+        ),
+        (
+            "INSERT INTO galleries (id, name, created_at, updated_at) "
+            f"SELECT x, 'Gallery ' || x, {timestamp}, {timestamp} FROM seq",
+            100,
+        ),
+        (
+            "INSERT INTO gallery_asset_links (gallery_id, asset_id, created_at, updated_at) "
+            f"SELECT x % 100 + 1, x, {timestamp}, {timestamp} FROM seq",
+            assets,
+        ),
+    ]
+    for statement, rows in statements:
+        connection.execute(
+            text(sequence + statement), {"n": rows, "conversations": conversations}
+        )
+
+
+def _measure(connection, params: dict, repeat: int) -> None:
+    from sqlalchemy import text
+
+    for label, sql in QUERIES.items():
+        plan = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params).all()
+        started = time.perf_counter()
+        for _ in range(repeat):
+            connection.execute(text(sql), params).all()
+        elapsed = (time.perf_counter() - started) / repeat * 1000
+        print(f"  {label:<22} {elapsed:9.2f} ms")
+        for row in plan:
+            print(f"      {row[-1]}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=2_000_000)
+    parser.add_argument("--assets", type=int, default=1_000_000)
+    parser.add_argument("--conversations", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="mega-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+
+    from alembic import command
+    from sqlalchemy import text
+
+    from app.database import Base, _alembic_config, engine
+
+    migration = ROOT / "migrations" / "versions" / "0001_hot_path_indexes.py"
+    namespace: dict = {}
+    exec(compile(migration.read_text(), str(migration), "exec"), namespace)
+
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        for _, name, _ in namespace["INDEXES"]:
+            connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        print(f"Populating {workdir}/bench.db …")
+        started = time.perf_counter()
+        _populate(
+            connection,
+            messages=args.messages,
+            assets=args.assets,
+            conversations=args.conversations,
+        )
+        print(f"  done in {time.perf_counter() - started:.1f}s")
+        connection.execute(text("ANALYZE"))
+
+    cursor_id = args.assets // 2
+    with engine.connect() as connection:
+        cursor = connection.execute(
+            text("SELECT created_at FROM gallery_assets WHERE id = :id"), {"id": cursor_id}
+        ).scalar()
+    params = {"conversation": args.conversations // 2, "cursor": cursor, "cursor_id": cursor_id}
+
+    print("\nBefore migration 0001")
+    with engine.connect() as connection:
+        _measure(connection, params, args.repeat)
+
+    command.upgrade(_alembic_config(), "0001")
+
+    print("\nAfter migration 0001")
+    with engine.connect() as connection:
+        _measure(connection, params, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Drive concurrent chat and widget writes against each SQLite profile.
+
+Usage::
+
+    python scripts/benchmark_sqlite_contention.py --workers 4 --clients 32 --requests 50
+
+For every profile a scratch database is initialised, the app is started with
+``uvicorn --workers`` so several processes compete for the database lock,
+and ``--clients`` threads interleave ``POST /api/conversations/{id}/messages``
+and ``POST /api/widgets``. Chat runs against the offline OpenAI stub, so the
+numbers reflect database contention rather than upstream latency.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_ready(base_url: str, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            httpx.get(f"{base_url}/api/conversations", timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError("uvicorn did not become ready in time")
+
+
+def _client_loop(base_url: str, conversation_id: int, requests: int) -> list[tuple[float, int]]:
+    results = []
+    with httpx.Client(base_url=base_url, timeout=60.0) as client:
+        for index in range(requests):
+            started = time.perf_counter()
+            try:
+                if index % 2:
+                    response = client.post(
+                        "/api/widgets",
+                        json={"widget_type": "notes", "title": f"Widget {index}"},
+                    )
+                else:
+                    response = client.post(
+                        f"/api/conversations/{conversation_id}/messages",
+                        json={"content": f"Message {index}"},
+                    )
+                status_code = response.status_code
+            except httpx.HTTPError:
+                status_code = 599
+            results.append((time.perf_counter() - started, status_code))
+    return results
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run_profile(profile: str, args: argparse.Namespace) -> None:
+    workdir = tempfile.mkdtemp(prefix=f"mega-contention-{profile}-")
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{workdir}/bench.db",
+        "MEDIA_ROOT": f"{workdir}/media",
+        "SQLITE_PROFILE": profile,
+        "OPENAI_API_KEY": "",
+        "ELEVENLABS_API_KEY": "",
+        "PYTHONPATH": str(ROOT),
+    }
+    # Create the schema once so the workers do not race on it at startup.
+    subprocess.run(
+        [sys.executable, "-c", "from app.database import init_db; init_db()"],
+        cwd=ROOT,
+        env=env,
+        check=True,
+    )
+
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--port",
+            str(port),
+            "--workers",
+            str(args.workers),
+            "--log-level",
+            "warning",
+        ],
+        cwd=ROOT,
+        env=env,
+        stderr=subprocess.DEVNULL if args.quiet else None,
+    )
+    try:
+        _wait_until_ready(base_url, process)
+        conversation_ids = [
+            httpx.post(f"{base_url}/api/conversations", json={"title": f"Bench {i}"}).json()["id"]
+            for i in range(args.clients)
+        ]
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.clients) as pool:
+            batches = list(
+                pool.map(
+                    lambda conversation_id: _client_loop(base_url, conversation_id, args.requests),
+                    conversation_ids,
+                )
+            )
+        elapsed = time.perf_counter() - started
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    results = [result for batch in batches for result in batch]
+    latencies = [latency * 1000 for latency, _ in results]
+    failures = sum(1 for _, status_code in results if status_code >= 400)
+    print(f"\nprofile={profile}")
+    print(f"  requests   {len(results)} in {elapsed:.1f}s ({len(results) / elapsed:.0f} req/s)")
+    print(
+        f"  latency    p50 {statistics.median(latencies):.1f} ms  "
+        f"p95 {_percentile(latencies, 0.95):.1f} ms  p99 {_percentile(latencies, 0.99):.1f} ms"
+    )
+    print(f"  failures   {failures}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--quiet", action="store_true", help="hide server tracebacks")
+    parser.add_argument(
+        "--profiles", nargs="+", default=["default", "tuned"], choices=["default", "tuned"]
+    )
+    args = parser.parse_args()
+    for profile in args.profiles:
+        run_profile(profile, args)
+
+
+if __name__ == "__main__":
+    main()
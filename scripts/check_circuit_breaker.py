@@ -0,0 +1,73 @@
+"""Fail when a cancelled half-open probe leaves a circuit breaker stuck.
+
+Usage::
+
+    python scripts/check_circuit_breaker.py
+
+A breaker is opened by one connection failure, then the half-open probe is
+cancelled mid-flight, as happens when a client disconnects. The next call
+must be allowed through as a fresh probe and close the breaker, rather than
+being rejected with ``CircuitOpenError`` forever.
+"""
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+RESET_SECONDS = 0.05
+
+
+async def _check() -> None:
+    from app.config import Settings
+    from app.resilience import CLOSED, CircuitOpenError, Resilience
+
+    resilience = Resilience(
+        Settings(
+            UPSTREAM_RETRY_ATTEMPTS=1,
+            CIRCUIT_FAILURE_THRESHOLD=1,
+            CIRCUIT_RESET_SECONDS=RESET_SECONDS,
+        )
+    )
+    endpoint = "check.probe"
+
+    async def refused() -> None:
+        raise httpx.ConnectError("connection refused")
+
+    async def hangs() -> None:
+        await asyncio.sleep(60)
+
+    async def succeeds() -> str:
+        return "ok"
+
+    try:
+        await resilience.acall(endpoint, refused)
+    except httpx.ConnectError:
+        pass
+    await asyncio.sleep(RESET_SECONDS * 2)
+
+    probe = asyncio.create_task(resilience.acall(endpoint, hangs))
+    await asyncio.sleep(0.01)
+    probe.cancel()
+    try:
+        await probe
+    except asyncio.CancelledError:
+        pass
+
+    try:
+        result = await resilience.acall(endpoint, succeeds)
+    except CircuitOpenError as exc:
+        sys.exit(f"FAIL breaker stayed open after a cancelled probe: {exc}")
+    state = resilience.breaker(endpoint).state
+    if result != "ok" or state != CLOSED:
+        sys.exit(f"FAIL next probe returned {result!r} with breaker {state}")
+    print("ok   a cancelled half-open probe lets the next call probe and close the breaker")
+
+
+if __name__ == "__main__":
+    asyncio.run(_check())
@@ -0,0 +1,75 @@
+"""Fail when the gallery page the frontend requests drops fields it renders.
+
+Usage::
+
+    python scripts/check_gallery_projection.py
+
+``GALLERY_FIELDS`` is read from ``app/static/js/app.js`` and sent as the
+``fields`` projection of ``GET /api/gallery`` against a scratch database
+holding one image with WebP and AVIF derivatives. Every field the grid needs
+must come back, including the ``srcset`` that turns the image into a
+``<picture>`` with modern formats.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+REQUIRED = {"id", "asset_type", "title", "url", "srcset", "created_at"}
+DERIVATIVES = [
+    {"url": "/media/thumb-avif", "width": 320, "height": 240, "media_type": "image/avif"},
+    {"url": "/media/thumb-webp", "width": 320, "height": 240, "media_type": "image/webp"},
+]
+
+
+def _frontend_fields() -> str:
+    source = (ROOT / "app" / "static" / "js" / "app.js").read_text(encoding="utf-8")
+    match = re.search(r"const GALLERY_FIELDS = '([^']*)';", source)
+    if match is None:
+        sys.exit("GALLERY_FIELDS not found in app/static/js/app.js")
+    return match.group(1)
+
+
+def main() -> None:
+    workdir = tempfile.mkdtemp(prefix="gallery-projection-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/projection.db"
+    os.environ["MEDIA_ROOT"] = f"{workdir}/media"
+    os.environ["OPENAI_API_KEY"] = ""
+
+    from fastapi.testclient import TestClient
+
+    from app.database import GalleryAsset, session_scope
+    from app.main import app
+
+    fields = _frontend_fields()
+    with TestClient(app) as client:
+        with session_scope() as session:
+            session.add(
+                GalleryAsset(
+                    asset_type="image",
+                    title="Projected",
+                    url="/media/original",
+                    derivatives_json=json.dumps(DERIVATIVES),
+                )
+            )
+        response = client.get("/api/gallery", params={"fields": fields})
+        response.raise_for_status()
+    item = response.json()[0]
+
+    missing = sorted(REQUIRED - set(item))
+    if missing:
+        sys.exit(f"FAIL GALLERY_FIELDS={fields!r} omits {', '.join(missing)}")
+    if set(item["srcset"]) != {derivative["media_type"] for derivative in DERIVATIVES}:
+        sys.exit(f"FAIL srcset has no derivative sources: {item['srcset']!r}")
+    print(f"ok   GALLERY_FIELDS={fields!r} returns {', '.join(sorted(item))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Fail when ``init_db`` cannot bring an older database up to the current schema.
+
+Usage::
+
+    python scripts/check_migrations.py
+
+A scratch SQLite database is rebuilt with the original schema from before
+migrations existed (no ``alembic_version`` table), then with the schema as it
+stood at every revision in ``migrations/versions``. After ``init_db`` each one
+must have the same columns as a database created fresh from the models.
+
+The older schemas are rebuilt by creating the models and running
+``alembic downgrade``. For the original schema the tables added since then
+are also dropped, because ``init_db`` creates them with ``create_all``
+before it runs the migrations.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+# Tables in the schema that predates migrations.
+BASELINE_TABLES = {
+    "agents",
+    "audio_tracks",
+    "code_files",
+    "code_projects",
+    "conversations",
+    "galleries",
+    "gallery_asset_links",
+    "gallery_assets",
+    "messages",
+    "workspace_widgets",
+}
+
+
+def _schema(engine) -> dict[str, list[str]]:
+    from sqlalchemy import inspect
+
+    inspector = inspect(engine)
+    return {
+        table: sorted(column["name"] for column in inspector.get_columns(table))
+        for table in inspector.get_table_names()
+    }
+
+
+def _reset(engine, path: str) -> None:
+    engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def _build(engine, revision: str) -> None:
+    """Recreate the schema as of ``revision``; ``"base"`` means before migrations."""
+
+    from alembic import command
+    from sqlalchemy import text
+
+    from app.database import Base, _alembic_config
+
+    Base.metadata.create_all(bind=engine)
+    command.stamp(_alembic_config(), "head")
+    command.downgrade(_alembic_config(), revision)
+    if revision != "base":
+        return
+    with engine.begin() as connection:
+        for table in _schema(engine):
+            if table not in BASELINE_TABLES:
+                connection.execute(text(f'DROP TABLE "{table}"'))
+
+
+def main() -> None:
+    workdir = tempfile.mkdtemp(prefix="migrations-")
+    path = f"{workdir}/migrations.db"
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+
+    from alembic.script import ScriptDirectory
+
+    from app.database import _alembic_config, engine, init_db
+
+    init_db()
+    expected = _schema(engine)
+    scripts = ScriptDirectory.from_config(_alembic_config())
+    revisions = [script.revision for script in reversed(list(scripts.walk_revisions()))]
+
+    failures = 0
+    for revision in ["base", *revisions]:
+        _reset(engine, path)
+        _build(engine, revision)
+        try:
+            init_db()
+        except Exception as exc:
+            failures += 1
+            print(f"FAIL from {revision}: {type(exc).__name__}: {exc}".splitlines()[0])
+            continue
+        actual = _schema(engine)
+        differences = [
+            table
+            for table in sorted(set(expected) | set(actual))
+            if expected.get(table) != actual.get(table)
+        ]
+        if differences:
+            failures += 1
+            print(f"FAIL from {revision}: columns differ in {', '.join(differences)}")
+        else:
+            print(f"ok   from {revision}")
+    _reset(engine, path)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Fail when a list endpoint issues more SQL statements than its budget.
+
+Usage::
+
+    python scripts/check_query_budgets.py --rows 25
+
+A scratch SQLite database is seeded with ``--rows`` parents (galleries,
+code projects, conversations), each with several children, and every
+endpoint in ``BUDGETS`` is requested twice: once cold and once after the
+data has doubled. Both requests must stay within the budget, so an N+1
+regression shows up as a failure here rather than as a slow page.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+# Endpoint -> most statements one request may issue, regardless of row count.
+BUDGETS = {
+    "/api/galleries": 3,
+    "/api/code/projects": 2,
+    "/api/conversations": 1,
+    # Counters plus one preview query per catalog table on a cold cache.
+    "/api/data-catalog": 7,
+}
+CHILDREN = 4
+
+
+def _seed(rows: int) -> None:
+    from app.database import (
+        CodeFile,
+        CodeProject,
+        Conversation,
+        Gallery,
+        GalleryAsset,
+        GalleryAssetLink,
+        Message,
+        session_scope,
+    )
+
+    with session_scope() as session:
+        start = session.query(CodeProject).count()
+        for index in range(start, start + rows):
+            gallery = Gallery(name=f"Gallery {index}")
+            project = CodeProject(name=f"Project {index}")
+            conversation = Conversation(title=f"Conversation {index}")
+            session.add_all([gallery, project, conversation])
+            session.flush()
+            for child in range(CHILDREN):
+                asset = GalleryAsset(asset_type="image", title=f"Asset {child}", url="/x.png")
+                session.add(asset)
+                session.flush()
+                session.add_all(
+                    [
+                        GalleryAssetLink(gallery_id=gallery.id, asset_id=asset.id),
+                        CodeFile(project_id=project.id, path=f"src/file_{child}.py"),
+                        Message(conversation_id=conversation.id, role="user", content="hi"),
+                    ]
+                )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=25, help="parents seeded per table")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="query-budgets-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/budgets.db"
+    os.environ["MEDIA_ROOT"] = f"{workdir}/media"
+    os.environ["OPENAI_API_KEY"] = ""
+
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from app.queries import assert_max_queries
+
+    failures = 0
+    with TestClient(app) as client:
+        for round_number in (1, 2):
+            _seed(args.rows)
+            for path, budget in BUDGETS.items():
+                try:
+                    with assert_max_queries(budget) as statements:
+                        response = client.get(path)
+                    response.raise_for_status()
+                except AssertionError as exc:
+                    failures += 1
+                    print(f"FAIL {path} (round {round_number}): {exc}")
+                else:
+                    print(f"ok   {path} (round {round_number}): {len(statements)}/{budget} queries")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Run a minimal S3-compatible object store for trying ``MEDIA_STORAGE=s3`` locally.
+
+Usage::
+
+    python scripts/local_object_store.py --root ./object-store --port 9000 \
+        --access-key dev --secret-key dev-secret
+
+Then start the app with ``MEDIA_STORAGE=s3 S3_ENDPOINT_URL=http://127.0.0.1:9000
+S3_BUCKET=media S3_ACCESS_KEY_ID=dev S3_SECRET_ACCESS_KEY=dev-secret``.
+
+Only what the media store uses is implemented: path-style ``PUT``, ``GET``
+(with single ``Range`` requests), ``HEAD`` and ``DELETE`` of objects, each
+authenticated with a SigV4 ``Authorization`` header or a presigned query
+string. Buckets are plain directories under ``--root`` and are created on
+first write. Use MinIO or a real bucket for anything beyond local testing.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from fastapi import FastAPI, HTTPException, Request  # noqa: E402
+from fastapi.responses import Response  # noqa: E402
+
+from app.blobs import range_file_response  # noqa: E402
+from app.storage import UNSIGNED_PAYLOAD, SigV4Signer  # noqa: E402
+
+CREDENTIAL = r"(?P<key>[^/]+)/(?P<day>\d{8})/(?P<region>[^/]+)/s3/aws4_request"
+AUTHORIZATION_PATTERN = re.compile(
+    rf"^AWS4-HMAC-SHA256 Credential={CREDENTIAL}, "
+    r"SignedHeaders=(?P<headers>[^,]+), Signature=(?P<signature>[0-9a-f]{64})$"
+)
+STORED_HEADERS = ("content-type", "cache-control")
+
+
+def _verify(request: Request, access_key: str, secret_key: str) -> str:
+    """Check the request's SigV4 signature and return its payload hash."""
+
+    query = dict(request.query_params)
+    if "X-Amz-Signature" in query:
+        match = re.match(rf"^{CREDENTIAL}$", query.get("X-Amz-Credential", ""))
+        stamp = query.get("X-Amz-Date", "")
+        signature = query.pop("X-Amz-Signature")
+        signed_names = query.get("X-Amz-SignedHeaders", "").split(";")
+        payload_hash = UNSIGNED_PAYLOAD
+        issued = datetime.strptime(stamp, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+        if time.time() > issued.timestamp() + int(query.get("X-Amz-Expires", "0")):
+            raise HTTPException(status_code=403, detail="Request has expired")
+    else:
+        match = AUTHORIZATION_PATTERN.match(request.headers.get("authorization", ""))
+        stamp = request.headers.get("x-amz-date", "")
+        signature = match.group("signature") if match else ""
+        signed_names = match.group("headers").split(";") if match else []
+        payload_hash = request.headers.get("x-amz-content-sha256", "")
+        query = {}
+    if match is None or match.group("key") != access_key:
+        raise HTTPException(status_code=403, detail="Invalid access key")
+
+    signer = SigV4Signer(access_key, secret_key, match.group("region"))
+    headers = {name: request.headers.get(name, "") for name in signed_names}
+    expected = signer._signature(
+        stamp[:8],
+        signer._string_to_sign(
+            request.method, str(request.url), query, headers, payload_hash, stamp
+        ),
+    )
+    if not hmac.compare_digest(expected, signature):
+        raise HTTPException(status_code=403, detail="SignatureDoesNotMatch")
+    return payload_hash
+
+
+def create_app(root: Path, access_key: str, secret_key: str) -> FastAPI:
+    app = FastAPI(title="Local object store")
+
+    def object_path(bucket: str, key: str) -> Path:
+        path = (root / bucket / key).resolve()
+        if root.resolve() not in path.parents:
+            raise HTTPException(status_code=400, detail="Invalid key")
+        return path
+
+    def metadata_path(path: Path) -> Path:
+        return path.with_name(path.name + ".meta.json")
+
+    @app.put("/{bucket}/{key:path}")
+    async def put_object(bucket: str, key: str, request: Request) -> Response:
+        payload_hash = _verify(request, access_key, secret_key)
+        path = object_path(bucket, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                async for chunk in request.stream():
+                    digest.update(chunk)
+                    handle.write(chunk)
+            if payload_hash != UNSIGNED_PAYLOAD and digest.hexdigest() != payload_hash:
+                raise HTTPException(status_code=400, detail="XAmzContentSHA256Mismatch")
+            os.replace(tmp_name, path)
+        finally:
+            Path(tmp_name).unlink(missing_ok=True)
+        metadata = {
+            name: request.headers[name] for name in STORED_HEADERS if name in request.headers
+        }
+        metadata_path(path).write_text(json.dumps(metadata))
+        return Response(status_code=200, headers={"ETag": f'"{digest.hexdigest()}"'})
+
+    @app.api_route("/{bucket}/{key:path}", methods=["GET", "HEAD"])
+    def get_object(bucket: str, key: str, request: Request) -> Response:
+        _verify(request, access_key, secret_key)
+        path = object_path(bucket, key)
+        if not path.is_file():
+            raise HTTPException(status_code=404, detail="NoSuchKey")
+        metadata = json.loads(metadata_path(path).read_text() or "{}")
+        return range_file_response(
+            request,
+            path,
+            media_type=metadata.get("content-type", "application/octet-stream"),
+            cache_control=metadata.get("cache-control"),
+        )
+
+    @app.delete("/{bucket}/{key:path}")
+    def delete_object(bucket: str, key: str, request: Request) -> Response:
+        _verify(request, access_key, secret_key)
+        path = object_path(bucket, key)
+        path.unlink(missing_ok=True)
+        metadata_path(path).unlink(missing_ok=True)
+        return Response(status_code=204)
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--root", type=Path, default=Path("./object-store"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--access-key", default="dev")
+    parser.add_argument("--secret-key", default="dev-secret")
+    args = parser.parse_args()
+    args.root.mkdir(parents=True, exist_ok=True)
+    app = create_app(args.root, args.access_key, args.secret_key)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Copy the local media blob store into the configured S3-compatible bucket.
+
+Usage::
+
+    MEDIA_STORAGE=s3 S3_ENDPOINT_URL=… S3_BUCKET=… python scripts/offload_media.py
+
+Every blob under ``MEDIA_ROOT`` is streamed into the bucket unless an object
+with the same digest is already there. Assets keep their ``/media/{sha256}``
+URLs, so no database rows change. Pass ``--delete`` to remove local copies
+once they are uploaded.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--delete", action="store_true", help="remove local copies after upload")
+    args = parser.parse_args()
+
+    from app.blobs import BLOB_HASH_PATTERN, BlobStore
+    from app.config import get_settings
+    from app.storage import S3BlobStore, create_media_store
+
+    settings = get_settings()
+    target = create_media_store(settings)
+    if not isinstance(target, S3BlobStore):
+        parser.error("set MEDIA_STORAGE=s3 and the S3_* variables first")
+    source = BlobStore(settings.media_root)
+
+    copied = skipped = 0
+    for path in sorted(source.root.glob("??/??/*")):
+        blob_hash = path.name
+        if not BLOB_HASH_PATTERN.match(blob_hash):
+            continue
+        if target.exists(blob_hash):
+            skipped += 1
+        else:
+            if target.put_stream(source.open(blob_hash)) != blob_hash:
+                print(f"  {blob_hash}: content does not match its digest, left in place")
+                continue
+            copied += 1
+        if args.delete:
+            source.delete(blob_hash)
+    print(f"Copied {copied} blob(s), {skipped} already present in {settings.s3_bucket}")
+
+
+if __name__ == "__main__":
+    main()